@@ -88,6 +88,14 @@ DATABASES = {
 }
 
 
+# Pragmas applied to each SQLite connection (see scraper.sqlite): 'production' enables WAL,
+# so the web views keep reading while the scraper writes
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'default')
+
+# Run the scraper's database writes on a dedicated writer thread (scraper.writers.ThreadedWriter)
+SCRAPER_WRITER_THREAD = os.getenv('SCRAPER_WRITER_THREAD', str(SQLITE_PROFILE == 'production')).lower() == 'true'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -129,6 +137,33 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Scraper browser sessions: saved login cookies and reusable Chrome profiles
+SCRAPER_SESSION_DIR = os.getenv('SCRAPER_SESSION_DIR', str(BASE_DIR / '.scraper_sessions'))
+
+# Learned navigation selectors (which selector matched each step last time)
+SCRAPER_SELECTOR_CACHE = os.getenv('SCRAPER_SELECTOR_CACHE', str(Path(SCRAPER_SESSION_DIR) / 'selector_cache.json'))
+
+# Site the scraper logs in to; point it at a replay server to run offline
+SCRAPER_BASE_URL = os.getenv('SCRAPER_BASE_URL', 'https://eclerksla.com/Home')
+
+# Results endpoint for the http fetch engine, with {page}, {start}, {limit}, {from_date} and
+# {to_date} placeholders (copy it from the browser's network panel after a search)
+SCRAPER_HTTP_RESULTS_URL = os.getenv('SCRAPER_HTTP_RESULTS_URL', '')
+
+# Shared across the web and scraper processes so the scraper's writes refresh the list facets
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', str(BASE_DIR / '.django_cache')),
+    }
+}
+
+# Seconds cached parish facets and search counts live before being recomputed
+SCRAPER_FACET_CACHE_TIMEOUT = int(os.getenv('SCRAPER_FACET_CACHE_TIMEOUT', 3600))
+
+# Serve Prometheus metrics for scraper runs at /metrics/ (off by default: it is unauthenticated)
+SCRAPER_METRICS_ENABLED = os.getenv('SCRAPER_METRICS_ENABLED', 'False').lower() == 'true'
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -1,13 +1,128 @@
 from django.contrib import admin
-from .models import CriminalRecord
+from .charges import charge_counts, records_with_charge
+from .defendants import normalize_name
+from .models import Charge, CriminalRecord, Defendant, ScrapeCheckpoint, ScrapeJob, ScrapePage, ScrapeRun
+from .pagination import EstimatedCountPaginator
+from .search import search_records
+
+class ChargeCodeFilter(admin.SimpleListFilter):
+    """Filter by one of the most frequent charge codes (an index lookup on Charge)"""
+    title = 'charge code'
+    parameter_name = 'charge_code'
+
+    def lookups(self, request, model_admin):
+        return [(row['code'], f"{row['code']} {row['description']}".strip()) for row in charge_counts(limit=25)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return records_with_charge(queryset, self.value())
+        return queryset
+
+
+class ChargeInline(admin.TabularInline):
+    model = Charge
+    fields = ('ordinal', 'code', 'description')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
 
 class CriminalRecordAdmin(admin.ModelAdmin):
     list_display = ('defendant_name', 'case_number', 'parish', 'date_filed', 'alert_available')
-    list_filter = ('parish', 'sex', 'race', 'alert_available')
+    list_filter = ('parish', ChargeCodeFilter, 'sex', 'race', 'alert_available')
+    inlines = [ChargeInline]
+    raw_id_fields = ('defendant',)
     search_fields = ('defendant_name', 'case_number', 'charges')
-    readonly_fields = ('scraped_timestamp',)
+    readonly_fields = ('scraped_timestamp', 'last_seen', 'last_changed', 'content_hash')
     date_hierarchy = 'date_filed'
-    ordering = ('-date_filed',)
+    ordering = ('-date_filed', '-id')
+    # The changelist is offset-paginated; skip the exact COUNTs that dominate on large tables
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_records(queryset, search_term), False
 
 admin.site.register(CriminalRecord, CriminalRecordAdmin)
 
+
+class DefendantRecordInline(admin.TabularInline):
+    model = CriminalRecord
+    fields = ('case_number', 'date_filed', 'parish', 'charges')
+    readonly_fields = fields
+    ordering = ('-date_filed',)
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+
+class DefendantAdmin(admin.ModelAdmin):
+    list_display = ('name', 'birth_date', 'sex', 'race', 'created_at')
+    list_filter = ('sex', 'race')
+    search_fields = ('normalized_name',)
+    readonly_fields = ('key', 'normalized_name', 'created_at')
+    inlines = [DefendantRecordInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        # One prefix match on the indexed normalized name, e.g. 'doe, john' -> 'DOE JOHN%'
+        return queryset.filter(normalized_name__startswith=normalize_name(search_term)), False
+
+admin.site.register(Defendant, DefendantAdmin)
+
+
+class ChargeAdmin(admin.ModelAdmin):
+    list_display = ('code', 'description', 'record', 'ordinal')
+    search_fields = ('=code', 'description')
+    list_select_related = ('record',)
+    raw_id_fields = ('record',)
+    ordering = ('code', 'record')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+admin.site.register(Charge, ChargeAdmin)
+
+
+class ScrapeCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('from_date', 'to_date', 'last_completed_page', 'completed', 'updated_at')
+    list_filter = ('completed',)
+    readonly_fields = ('updated_at',)
+    ordering = ('-updated_at',)
+
+admin.site.register(ScrapeCheckpoint, ScrapeCheckpointAdmin)
+
+
+class ScrapePageInline(admin.TabularInline):
+    model = ScrapePage
+    fields = ('shard', 'page_number', 'started_at', 'seconds', 'rows_parsed', 'records',
+              'inserted', 'updated', 'unchanged', 'skipped', 'errors')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+class ScrapeRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'finished_at', 'from_date', 'to_date', 'success', 'pages', 'rows_parsed',
+                    'inserted', 'updated', 'unchanged', 'skipped', 'errors', 'seconds_per_page')
+    list_filter = ('success',)
+    date_hierarchy = 'started_at'
+    readonly_fields = ('started_at', 'finished_at', 'parameters', 'seconds_per_page', 'metrics')
+    ordering = ('-started_at',)
+    inlines = [ScrapePageInline]
+
+admin.site.register(ScrapeRun, ScrapeRunAdmin)
+
+
+class ScrapeJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'from_date', 'to_date', 'account', 'priority', 'status', 'attempts',
+                    'run_after', 'lease_owner', 'lease_expires_at')
+    list_filter = ('status', 'account')
+    readonly_fields = ('attempts', 'lease_owner', 'lease_expires_at', 'last_error', 'run', 'created_at', 'updated_at')
+    ordering = ('-created_at',)
+
+admin.site.register(ScrapeJob, ScrapeJobAdmin)
@@ -1,6 +1,36 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from .search import ensure_search_index
+    ensure_search_index(connections[using])
 
 
 class ScraperConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scraper'
+
+    def ready(self):
+        # SQLite table rebuilds during migrations drop the full-text sync triggers
+        post_migrate.connect(ensure_search_index, sender=self)
+
+        # Single-row edits (admin, shell) expire the cached list facets; bulk writes update them
+        from .facets import invalidate_facets
+        from .models import CriminalRecord
+        post_save.connect(invalidate_facets, sender=CriminalRecord, dispatch_uid='scraper_facets_save')
+        post_delete.connect(invalidate_facets, sender=CriminalRecord, dispatch_uid='scraper_facets_delete')
+
+        # The writer parses charges in bulk; keep single-row edits in step too
+        from .charges import sync_record_charges
+        post_save.connect(sync_record_charges, sender=CriminalRecord, dispatch_uid='scraper_charges_save')
+
+        # Likewise for defendants, which the writer resolves per batch
+        from .defendants import sync_record_defendant
+        post_save.connect(sync_record_defendant, sender=CriminalRecord, dispatch_uid='scraper_defendants_save')
+
+        # WAL and cache pragmas for the production SQLite profile
+        from .sqlite import configure_connection
+        connection_created.connect(configure_connection, dispatch_uid='scraper_sqlite_pragmas')
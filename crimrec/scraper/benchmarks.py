@@ -0,0 +1,334 @@
+import os
+import sys
+import time
+import platform
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from statistics import median, quantiles
+import django
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+from .exporters import RecordExporter
+from .models import CriminalRecord
+from .dates import DateParser, date_parser
+from .parsing import DATE_COLUMNS, build_record, parse_results_html
+from .replay import ReplayServer, ReplaySite
+from .selector_cache import SelectorCache
+from .sqlite import PROFILES
+from .writers import RecordWriter, ThreadedWriter
+
+logger = logging.getLogger(__name__)
+
+# Stages timed for every scale, in pipeline order
+PIPELINE_STAGES = ('row_extraction', 'build_record', 'parse_date', 'persist', 'export')
+# Stages that need Chrome, timed once against a replay server
+BROWSER_STAGES = ('driver_startup', 'login', 'navigation', 'search', 'browser_extraction')
+# Browser-stage rows (one replayed site) are fixed regardless of scale
+BROWSER_PAGES = 3
+# Rows the list view's first page shows
+READ_LATENCY_PAGE_SIZE = 50
+
+
+def parse_scale(value):
+    """'1k' -> 1000, '100k' -> 100000, '1m' -> 1000000"""
+    value = value.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+
+class StageTimer:
+    """Accumulates wall time per stage across many short timed sections"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, stage, started):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - started
+
+    def report(self, rows):
+        return {
+            stage: {'seconds': round(seconds, 6), 'rows': rows,
+                    'rows_per_second': round(rows / seconds, 1) if seconds else None}
+            for stage, seconds in self.seconds.items()
+        }
+
+
+def result_pages(rows, rows_per_page=50, captures_dir=None):
+    """Yield results-page HTML holding at least rows rows (recorded pages are cycled)"""
+    # Recorded pages hold however many rows they captured; every page holds at least one
+    pages = rows if captures_dir else -(-rows // rows_per_page)
+    site = ReplaySite(captures_dir=captures_dir, pages=pages, rows_per_page=rows_per_page)
+    for page in range(1, pages + 1):
+        yield site.results_page(page)
+
+
+# Stand-in for the shared facet cache while a benchmark writes to a scratch database
+SCRATCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                              'LOCATION': 'scraper-benchmark'}}
+
+
+@contextmanager
+def scratch_database(profile=None):
+    """Point the default database at a freshly migrated temporary file, and the cache at memory
+
+    Covers this thread and any thread started inside the block, so writer and reader threads
+    use the scratch file too; the real database and the shared cache are never touched.
+    Only SQLite can be pointed at a file, so other backends are refused up front.
+    """
+    original_settings = connections.settings[DEFAULT_DB_ALIAS]
+    original = connections[DEFAULT_DB_ALIAS]
+    if original.vendor != 'sqlite':
+        raise CommandError(f"Benchmarks need a SQLite database to copy into a scratch file, not {original.vendor}")
+    overrides = {'CACHES': SCRATCH_CACHES}
+    if profile:
+        overrides['SQLITE_PROFILE'] = profile
+    with tempfile.TemporaryDirectory() as tmp, override_settings(**overrides):
+        scratch_settings = dict(original_settings, NAME=os.path.join(tmp, 'benchmark.sqlite3'))
+        scratch = original.__class__(scratch_settings, DEFAULT_DB_ALIAS)
+        connections.settings[DEFAULT_DB_ALIAS] = scratch_settings
+        connections[DEFAULT_DB_ALIAS] = scratch
+        try:
+            call_command('migrate', database=DEFAULT_DB_ALIAS, interactive=False, verbosity=0)
+            yield
+        finally:
+            scratch.close()
+            connections.settings[DEFAULT_DB_ALIAS] = original_settings
+            connections[DEFAULT_DB_ALIAS] = original
+            # Content type ids cached while migrating belong to the scratch database
+            ContentType.objects.clear_cache()
+
+
+def benchmark_pipeline(rows, rows_per_page=50, captures_dir=None, batch_size=1000):
+    """Time parse -> build -> persist -> export for rows records in a scratch database
+
+    Pages are generated (or replayed) one at a time so memory stays flat at any scale;
+    only the stage work itself is timed. Persistence and export run against a temporary
+    migrated database (see scratch_database), so triggers, charges and defendants are
+    written as in a real run without holding the real database's write lock.
+
+    build_record parses dates through the shared date_parser, so its memo is cleared first,
+    as in a fresh scrape process. The parse_date stage times the same per-value parsing on a
+    DateParser of its own, which build_record has not already warmed with these values.
+    """
+    timer = StageTimer()
+    processed = 0
+    date_parser.clear()
+    dates = DateParser()
+    with scratch_database():
+        # Captured pages repeat case numbers; a run suffix keeps every benchmark row distinct
+        suffix = 0
+        writer = RecordWriter(batch_size=batch_size)
+        for html in result_pages(rows, rows_per_page, captures_dir):
+            started = time.perf_counter()
+            extracted = parse_results_html(html)
+            timer.add('row_extraction', started)
+
+            started = time.perf_counter()
+            records = [build_record(cells, alert) for cells, alert in extracted if len(cells) >= 5]
+            timer.add('build_record', started)
+
+            columns = {name: [cells[index] for cells, _ in extracted if len(cells) > index]
+                       for name, index in DATE_COLUMNS.items()}
+            started = time.perf_counter()
+            for name, values in columns.items():
+                for value in values:
+                    dates.parse(value, name)
+            timer.add('parse_date', started)
+
+            started = time.perf_counter()
+            for record in records:
+                if processed >= rows:
+                    break
+                if captures_dir:
+                    suffix += 1
+                    record['case_number'] = f"{record['case_number']}-B{suffix}"
+                record['date_filed'] = record['date_filed'] or timezone.now().date()
+                writer.add(record)
+                processed += 1
+            timer.add('persist', started)
+            if processed >= rows:
+                break
+
+        started = time.perf_counter()
+        writer.flush()
+        timer.add('persist', started)
+
+        started = time.perf_counter()
+        exported = 0
+        for chunk in RecordExporter(CriminalRecord.objects.order_by('-date_filed', '-id'), 'csv'):
+            exported += len(chunk)
+        timer.add('export', started)
+
+    report = timer.report(processed)
+    report['export']['bytes'] = exported
+    report['parse_date'].update(cache_hits=dates.hits, cache_misses=dates.misses)
+    return report
+
+
+def benchmark_browser(headless=True, pages=BROWSER_PAGES, rows_per_page=50, captures_dir=None):
+    """Time the Chrome stages of a real EClerksScraper run against a local replay server"""
+    from .scrapers import EClerksScraper
+    from .sharding import NullWriter
+
+    # The replay server accepts any login; never touch the real account's saved cookies
+    os.environ.setdefault('ECLERKS_EMAIL', 'benchmark@replay.invalid')
+    os.environ.setdefault('ECLERKS_PASSWORD', 'benchmark')
+
+    timer = StageTimer()
+    site = ReplaySite(captures_dir=captures_dir, pages=pages, rows_per_page=rows_per_page)
+    # Selector hits on the replay site must not reorder the selectors real runs try first
+    with ReplayServer(site) as server, tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        scraper = EClerksScraper(headless=headless, writer=NullWriter(), use_checkpoints=False,
+                                 reuse_session=False, base_url=f"{server.url}/Home",
+                                 selector_cache=SelectorCache(os.path.join(tmp, 'selector_cache.json')))
+        scraper.login_email = 'benchmark@replay.invalid'
+        timer.add('driver_startup', started)
+        try:
+            for stage, step in (('login', scraper.login), ('navigation', scraper.navigate_to_search_page)):
+                started = time.perf_counter()
+                if not step():
+                    raise RuntimeError(f"Browser benchmark failed at {stage}")
+                timer.add(stage, started)
+
+            started = time.perf_counter()
+            scraper.set_date_range("01/01/2024", "12/31/2024")
+            if not scraper.execute_search():
+                raise RuntimeError("Browser benchmark failed at search")
+            timer.add('search', started)
+
+            started = time.perf_counter()
+            scraper.scrape_records(max_pages=pages)
+            timer.add('browser_extraction', started)
+        finally:
+            scraper.close_sinks()
+            scraper.quit()
+    return timer.report(scraper.records_scraped)
+
+
+def _ingest(records, batch_size, rows_per_page):
+    """Write records through a ThreadedWriter, flushing after each page like the scraper"""
+    writer = ThreadedWriter(RecordWriter(batch_size=batch_size))
+    try:
+        for start in range(0, len(records), rows_per_page):
+            for record in records[start:start + rows_per_page]:
+                writer.add(dict(record))
+            writer.flush()
+    finally:
+        writer.close()
+
+
+def _read_until(done, latencies, errors):
+    """Run the list view's first page and parish count queries until done is set"""
+    try:
+        while not done.is_set():
+            started = time.perf_counter()
+            try:
+                list(CriminalRecord.objects.order_by('-date_filed', '-id')[:READ_LATENCY_PAGE_SIZE])
+                list(CriminalRecord.objects.values('parish').annotate(count=Count('id')).order_by())
+            except OperationalError:
+                errors.append(1)
+                continue
+            latencies.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+
+
+def benchmark_read_latency(rows=20000, batch_size=100, readers=2, rows_per_page=50, profiles=None):
+    """Latency of list view reads while rows are ingested, under each SQLITE_PROFILE
+
+    Each profile gets a migrated scratch database (see scratch_database). Rows go through
+    RecordWriter on a ThreadedWriter, a page per flush, so the search index triggers,
+    charges and defendants are written as in a real run, while reader threads repeatedly
+    run the list view's first page and parish count queries. Returns, per profile, the
+    number of reads, their median, p95 and max milliseconds, reads that failed as locked,
+    and ingest seconds.
+    """
+    records = []
+    for html in result_pages(rows, rows_per_page):
+        for cells, alert in parse_results_html(html):
+            if len(records) < rows and len(cells) >= 5:
+                record = build_record(cells, alert)
+                record['case_number'] = f"{record['case_number']}-{len(records)}"
+                record['date_filed'] = record['date_filed'] or timezone.now().date()
+                records.append(record)
+
+    report = {}
+    for profile in profiles or PROFILES:
+        with scratch_database(profile):
+            done = threading.Event()
+            latencies, errors = [], []
+            threads = [threading.Thread(target=_read_until, args=(done, latencies, errors)) for _ in range(readers)]
+            for thread in threads:
+                thread.start()
+            started = time.perf_counter()
+            try:
+                _ingest(records, batch_size, rows_per_page)
+            finally:
+                ingest_seconds = time.perf_counter() - started
+                done.set()
+                for thread in threads:
+                    thread.join()
+
+        milliseconds = sorted(latency * 1000 for latency in latencies)
+        report[profile] = {
+            'reads': len(milliseconds),
+            'locked': len(errors),
+            'median_ms': round(median(milliseconds), 3) if milliseconds else None,
+            'p95_ms': round(quantiles(milliseconds, n=20)[-1], 3) if len(milliseconds) > 1 else None,
+            'max_ms': round(milliseconds[-1], 3) if milliseconds else None,
+            'ingest_seconds': round(ingest_seconds, 3),
+        }
+    return report
+
+
+def run_benchmarks(scales, rows_per_page=50, captures_dir=None, browser=False, headless=True, read_latency=False):
+    """Full benchmark document: environment metadata plus per-scale stage timings"""
+    results = {
+        'meta': {
+            'started_at': timezone.now().isoformat(),
+            'python': sys.version.split()[0],
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'platform': platform.platform(),
+            'captures': bool(captures_dir),
+        },
+        'scales': {},
+    }
+    for rows in scales:
+        logger.info(f"Benchmarking pipeline at {rows} rows")
+        results['scales'][str(rows)] = benchmark_pipeline(rows, rows_per_page, captures_dir)
+    if browser:
+        results['browser'] = benchmark_browser(headless=headless, rows_per_page=rows_per_page,
+                                               captures_dir=captures_dir)
+    if read_latency:
+        logger.info("Benchmarking read latency during ingest")
+        results['read_latency'] = benchmark_read_latency(rows_per_page=rows_per_page)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """[(scale, stage, baseline_seconds, seconds, change, regressed)] for stages in both runs
+
+    A stage regresses when it is more than tolerance (a fraction) slower than the baseline.
+    """
+    rows = []
+    sections = [(scale, results['scales'][scale], baseline.get('scales', {}).get(scale, {}))
+                for scale in results['scales']]
+    if 'browser' in results:
+        sections.append(('browser', results['browser'], baseline.get('browser', {})))
+    for scale, stages, baseline_stages in sections:
+        for stage, timing in stages.items():
+            if stage not in baseline_stages:
+                continue
+            before = baseline_stages[stage]['seconds']
+            change = (timing['seconds'] - before) / before if before else 0.0
+            rows.append((scale, stage, before, timing['seconds'], change, change > tolerance))
+    return rows
@@ -0,0 +1,69 @@
+import logging
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef
+from .models import Charge, CriminalRecord
+from .parsing import normalize_charge_code, parse_charges
+
+logger = logging.getLogger(__name__)
+
+CODE_LENGTH = Charge._meta.get_field('code').max_length
+DESCRIPTION_LENGTH = Charge._meta.get_field('description').max_length
+
+
+def build_charges(record_id, text):
+    """Unsaved Charge rows for one record's charges text"""
+    return [
+        Charge(record_id=record_id, ordinal=ordinal, code=code[:CODE_LENGTH],
+               description=description[:DESCRIPTION_LENGTH])
+        for ordinal, (code, description) in enumerate(parse_charges(text), start=1)
+    ]
+
+
+def replace_charges(charges_by_record):
+    """Rewrite the Charge rows of {record_id: charges text} with one DELETE and one bulk INSERT"""
+    charges = [charge for record_id, text in charges_by_record.items() for charge in build_charges(record_id, text)]
+    with transaction.atomic():
+        Charge.objects.filter(record_id__in=list(charges_by_record)).delete()
+        Charge.objects.bulk_create(charges)
+    return len(charges)
+
+
+def sync_record_charges(sender, instance, **kwargs):
+    """post_save receiver: re-parse the charges of a record edited one at a time"""
+    replace_charges({instance.pk: instance.charges})
+
+
+def backfill_charges(batch_size=2000, rebuild=False):
+    """Parse charges for records that have none (every record with rebuild); returns (records, charges)"""
+    if rebuild:
+        Charge.objects.all().delete()
+    missing = CriminalRecord.objects.filter(~Exists(Charge.objects.filter(record=OuterRef('pk'))))
+    records = charges = 0
+    last_id = 0
+    while True:
+        # Seek by id so each batch is an index range scan, not an ever-growing OFFSET
+        batch = list(missing.filter(id__gt=last_id).order_by('id').values_list('id', 'charges')[:batch_size])
+        if not batch:
+            break
+        charges += replace_charges(dict(batch))
+        records += len(batch)
+        last_id = batch[-1][0]
+        logger.info(f"Parsed charges for {records} records ({charges} charges)")
+    return records, charges
+
+
+def records_with_charge(records, code):
+    """Records having a charge with this statute code, with or without an RS prefix (an index lookup per record)"""
+    return records.filter(Exists(Charge.objects.filter(record=OuterRef('pk'), code=normalize_charge_code(code))))
+
+
+def charge_counts(parish='', limit=50):
+    """Most frequent charge codes: [{'code', 'description', 'records'}], optionally within one parish"""
+    charges = Charge.objects.exclude(code='')
+    if parish:
+        charges = charges.filter(record__parish__iexact=parish)
+    return list(
+        charges.values('code')
+        .annotate(records=Count('record', distinct=True), description=Max('description'))
+        .order_by('-records', 'code')[:limit]
+    )
@@ -0,0 +1,92 @@
+import re
+from collections import OrderedDict
+from datetime import date, datetime
+
+# Formats tried, in order, for a date cell
+DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%m-%d-%Y", "%d/%m/%Y")
+# The site's own format; matched without strptime, falling back to day-first like DATE_FORMATS
+SLASH_DATE_RE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+
+
+def _slash_date(first, second, year):
+    """MM/DD/YYYY, else DD/MM/YYYY, else None, exactly as the two strptime formats would"""
+    first, second, year = int(first), int(second), int(year)
+    try:
+        return date(year, first, second)
+    except ValueError:
+        pass
+    try:
+        return date(year, second, first)
+    except ValueError:
+        return None
+
+
+class DateParser:
+    """Parses date cells, memoizing results in a bounded LRU
+
+    Most dates in a run repeat (filing dates above all), so a value is only parsed once
+    while it stays among the cache_size most recently used. MM/DD/YYYY values skip
+    strptime entirely. For the rest, the format that last worked for a column is tried
+    first, so a column in another format does not pay for failed attempts on every row.
+    The formats other than the slash ones cannot match the same text, so the result never
+    depends on the order they are tried in, and cached results are shared by all columns.
+    """
+
+    def __init__(self, cache_size=4096):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        # column name -> format that parsed its latest non-slash value
+        self.column_formats = {}
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, value, column=None):
+        """date for value, or None when it is empty or in no known format"""
+        if not value:
+            return None
+        text = value.strip()
+        if not text:
+            return None
+        try:
+            parsed = self.cache[text]
+            self.cache.move_to_end(text)
+            self.hits += 1
+            return parsed
+        except KeyError:
+            pass
+
+        self.misses += 1
+        parsed = self._parse(text, column)
+        self.cache[text] = parsed
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return parsed
+
+    def _parse(self, text, column):
+        match = SLASH_DATE_RE.match(text)
+        if match:
+            return _slash_date(*match.groups())
+
+        formats = DATE_FORMATS
+        locked = self.column_formats.get(column)
+        if locked:
+            formats = (locked,) + tuple(fmt for fmt in DATE_FORMATS if fmt != locked)
+        for fmt in formats:
+            try:
+                parsed = datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+            if column is not None:
+                self.column_formats[column] = fmt
+            return parsed
+        return None
+
+    def clear(self):
+        self.cache.clear()
+        self.column_formats.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by build_record and parse_date; workers are separate processes, each with its own
+date_parser = DateParser()
@@ -0,0 +1,88 @@
+import re
+import hashlib
+import logging
+from django.db import transaction
+from .models import CriminalRecord, Defendant
+
+logger = logging.getLogger(__name__)
+
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+NAME_LENGTH = Defendant._meta.get_field('name').max_length
+
+
+def normalize_name(name):
+    """'Doe,  John A.' -> 'DOE JOHN A'"""
+    return ' '.join(PUNCTUATION_RE.sub(' ', name or '').upper().split())
+
+
+def defendant_key(record):
+    """Identity of the person on a record dict: normalized name, birth date, sex and race"""
+    birth_date = record.get('birth_date')
+    text = '\x1f'.join([
+        normalize_name(record.get('defendant_name')),
+        birth_date.isoformat() if birth_date else '',
+        record.get('sex') or 'U',
+        record.get('race') or 'U',
+    ])
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def resolve_defendants(records):
+    """{defendant_key: Defendant id} for record dicts, creating the people not seen before
+
+    One lookup for the whole batch, then one bulk insert for the new keys. Concurrent
+    writers inserting the same person are absorbed by ignore_conflicts and the re-read.
+    """
+    by_key = {}
+    for record in records:
+        by_key.setdefault(defendant_key(record), record)
+    ids = dict(Defendant.objects.filter(key__in=list(by_key)).order_by().values_list('key', 'id'))
+    missing = [key for key in by_key if key not in ids]
+    if missing:
+        Defendant.objects.bulk_create([
+            Defendant(
+                key=key,
+                name=by_key[key]['defendant_name'][:NAME_LENGTH],
+                normalized_name=normalize_name(by_key[key]['defendant_name'])[:NAME_LENGTH],
+                birth_date=by_key[key].get('birth_date'),
+                sex=by_key[key].get('sex') or 'U',
+                race=by_key[key].get('race') or 'U',
+            )
+            for key in missing
+        ], ignore_conflicts=True)
+        ids.update(Defendant.objects.filter(key__in=missing).order_by().values_list('key', 'id'))
+    return ids
+
+
+def sync_record_defendant(sender, instance, **kwargs):
+    """post_save receiver: link a record edited one at a time to its defendant"""
+    record = {name: CriminalRecord._meta.get_field(name).to_python(getattr(instance, name))
+              for name in ('defendant_name', 'birth_date', 'sex', 'race')}
+    defendant_id = resolve_defendants([record])[defendant_key(record)]
+    if instance.defendant_id != defendant_id:
+        # update() rather than save(), which would send post_save again
+        CriminalRecord.objects.filter(pk=instance.pk).update(defendant=defendant_id)
+        instance.defendant_id = defendant_id
+
+
+def backfill_defendants(batch_size=2000):
+    """Link stored records without a defendant; returns (records linked, defendants now stored)"""
+    fields = ('id', 'defendant_name', 'birth_date', 'sex', 'race')
+    linked = 0
+    last_id = 0
+    while True:
+        batch = list(
+            CriminalRecord.objects.filter(defendant__isnull=True, id__gt=last_id).order_by('id').values(*fields)[:batch_size]
+        )
+        if not batch:
+            break
+        with transaction.atomic():
+            ids = resolve_defendants(batch)
+            CriminalRecord.objects.bulk_update(
+                [CriminalRecord(id=row['id'], defendant_id=ids[defendant_key(row)]) for row in batch],
+                ['defendant'],
+            )
+        linked += len(batch)
+        last_id = batch[-1]['id']
+        logger.info(f"Linked {linked} records to defendants")
+    return linked, Defendant.objects.count()
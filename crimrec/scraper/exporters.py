@@ -0,0 +1,92 @@
+import io
+import csv
+import json
+import zlib
+from datetime import date
+
+# Column order shared by every export (and the scraper's own CSV)
+EXPORT_FIELDS = [
+    'defendant_name',
+    'birth_date',
+    'sex',
+    'race',
+    'case_number',
+    'date_filed',
+    'charges',
+    'arrest_citation_date',
+    'parish',
+    'alert_available',
+]
+EXPORT_FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class RecordExporter:
+    """Stream a queryset as CSV or JSON Lines bytes, optionally gzip-compressed
+
+    Rows are read with values_list().iterator(), so neither model instances nor the full
+    result are held in memory; output is produced in chunks of chunk_size rows.
+    """
+
+    def __init__(self, queryset, fmt='csv', compress=False, chunk_size=2000):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        self.queryset = queryset
+        self.fmt = fmt
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+
+    @property
+    def content_type(self):
+        return 'application/gzip' if self.compress else CONTENT_TYPES[self.fmt]
+
+    @property
+    def extension(self):
+        return f"{self.fmt}.gz" if self.compress else self.fmt
+
+    def rows(self):
+        return self.queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=self.chunk_size)
+
+    def chunks(self):
+        """Encoded text, one chunk per chunk_size rows"""
+        buffer = io.StringIO()
+        if self.fmt == 'csv':
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_FIELDS)
+            write = writer.writerow
+        else:
+            def write(row):
+                buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=_json_default))
+                buffer.write('\n')
+
+        pending = 0
+        for row in self.rows():
+            write(row)
+            self.rows_written += 1
+            pending += 1
+            if pending >= self.chunk_size:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def __iter__(self):
+        if not self.compress:
+            yield from self.chunks()
+            return
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in self.chunks():
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
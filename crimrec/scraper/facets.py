@@ -0,0 +1,92 @@
+import time
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from .models import CriminalRecord
+from .pagination import estimated_count
+
+logger = logging.getLogger(__name__)
+
+PARISH_COUNTS_KEY = 'scraper:facets:parishes'
+VERSION_KEY = 'scraper:facets:version'
+
+
+def facet_timeout():
+    return getattr(settings, 'SCRAPER_FACET_CACHE_TIMEOUT', 60 * 60)
+
+
+def facet_version():
+    """Generation number embedded in per-filter count keys; bumping it orphans them all"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def parish_counts():
+    """[(parish, count), ...] sorted by parish, served from the cache when possible"""
+    counts = cache.get(PARISH_COUNTS_KEY)
+    if counts is None:
+        counts = {
+            row['parish']: row['count']
+            for row in CriminalRecord.objects.order_by().values('parish').annotate(count=Count('id'))
+        }
+        cache.set(PARISH_COUNTS_KEY, counts, facet_timeout())
+    return sorted(counts.items())
+
+
+def total_count():
+    return sum(count for _, count in parish_counts())
+
+
+def record_count(records, query='', parish='', charge=''):
+    """(count, is_estimate) for the list view's current filters
+
+    Unfiltered and per-parish counts come straight from the parish facet; search and charge
+    counts are cached per filter combination until the next write.
+    """
+    if not query and not charge:
+        if not parish:
+            return total_count(), False
+        return sum(count for name, count in parish_counts() if name.lower() == parish.lower()), False
+
+    digest = hashlib.sha1(f"{query}\x00{parish.lower()}\x00{charge.upper()}".encode('utf-8')).hexdigest()
+    key = f"scraper:facets:count:{facet_version()}:{digest}"
+    cached = cache.get(key)
+    if cached is None:
+        cached = estimated_count(records)
+        cache.set(key, cached, facet_timeout())
+    return tuple(cached)
+
+
+def apply_parish_deltas(deltas):
+    """Adjust cached parish counts by {parish: +/-n} after a write and expire search counts
+
+    Counts that are not cached yet are left to be computed on the next page load. Concurrent
+    writers can race on the read-modify-write; the cache timeout bounds any drift.
+    """
+    counts = cache.get(PARISH_COUNTS_KEY)
+    if counts is not None and deltas:
+        for parish, delta in deltas.items():
+            counts[parish] = counts.get(parish, 0) + delta
+            if counts[parish] <= 0:
+                counts.pop(parish)
+        cache.set(PARISH_COUNTS_KEY, counts, facet_timeout())
+    _bump_version()
+
+
+def invalidate_facets(**kwargs):
+    """Drop every cached facet (also used as a post_save/post_delete receiver)"""
+    cache.delete(PARISH_COUNTS_KEY)
+    _bump_version()
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # The version was evicted; a timestamp cannot collide with earlier generations
+        cache.set(VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,33 @@
+import hashlib
+from datetime import date
+
+# Scraped fields covered by CriminalRecord.content_hash, in hashing order
+HASH_FIELDS = (
+    'defendant_name',
+    'birth_date',
+    'sex',
+    'race',
+    'date_filed',
+    'charges',
+    'arrest_citation_date',
+    'parish',
+    'alert_available',
+)
+SEPARATOR = '\x1f'
+
+
+def normalize(value):
+    """Canonical text for a scraped value: whitespace runs collapsed, line breaks kept"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, date):
+        return value.isoformat()
+    return '\n'.join(' '.join(line.split()) for line in str(value).strip().splitlines())
+
+
+def content_hash(record):
+    """Hex digest of a record dict's normalized HASH_FIELDS; equal hashes mean nothing to update"""
+    text = SEPARATOR.join(normalize(record.get(field)) for field in HASH_FIELDS)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,135 @@
+import json
+import time
+import asyncio
+import logging
+import urllib.error
+import urllib.request
+from .parsing import RESULT_COLUMNS, parse_results_html
+
+logger = logging.getLogger(__name__)
+
+# Keys that may hold the row list in a JSON results response
+JSON_ROW_KEYS = ('data', 'rows', 'records', 'results', 'items')
+
+
+class HttpFetchError(Exception):
+    pass
+
+
+class SessionExpired(HttpFetchError):
+    pass
+
+
+def cookie_header(cookies):
+    """Cookie request header from Selenium cookie dicts"""
+    return '; '.join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+
+
+def parse_results_json(payload):
+    """(cells, alert_available) tuples from a JSON results payload
+
+    Rows may be lists in grid column order or objects keyed by the column names.
+    """
+    rows = payload
+    if isinstance(payload, dict):
+        rows = next((payload[key] for key in JSON_ROW_KEYS if isinstance(payload.get(key), list)), [])
+    parsed = []
+    for row in rows:
+        if isinstance(row, dict):
+            cells = ['' if row.get(column) is None else str(row.get(column)) for column in RESULT_COLUMNS[:9]]
+            alert = bool(row.get('alert') or row.get('alert_available'))
+            parsed.append((cells + [''], alert))
+        elif isinstance(row, list):
+            parsed.append((['' if value is None else str(value) for value in row], False))
+    return parsed
+
+
+class HttpFetchEngine:
+    """Fetch result pages over plain HTTP with the browser's session cookies
+
+    url_template is the results URL with {page}, {start} and {limit} placeholders (and
+    optionally {from_date}/{to_date}). Pages are fetched concurrently, at most concurrency
+    at a time, on worker threads driven by asyncio; responses are parsed as HTML or JSON
+    into the same (cells, alert) rows the browser extraction produces.
+    """
+
+    def __init__(self, url_template, cookies=(), user_agent=None, concurrency=4, page_size=50,
+                 timeout=30, retries=2, search_params=None, login_marker='placeholder="email address"'):
+        self.url_template = url_template
+        self.headers = {'Cookie': cookie_header(cookies), 'Accept': 'text/html,application/json'}
+        if user_agent:
+            self.headers['User-Agent'] = user_agent
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.timeout = timeout
+        self.retries = retries
+        self.search_params = dict(search_params or {})
+        self.login_marker = login_marker
+        self.requests_made = 0
+
+    @classmethod
+    def from_driver(cls, driver, url_template, **kwargs):
+        """Take over the cookies and user agent of a logged-in browser"""
+        return cls(
+            url_template,
+            cookies=driver.get_cookies(),
+            user_agent=driver.execute_script("return navigator.userAgent"),
+            **kwargs
+        )
+
+    def page_url(self, page):
+        return self.url_template.format(
+            page=page, start=(page - 1) * self.page_size, limit=self.page_size, **self.search_params
+        )
+
+    def _get(self, url):
+        """Blocking GET returning (content_type, body text); runs on a worker thread"""
+        request = urllib.request.Request(url, headers=self.headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            charset = response.headers.get_content_charset() or 'utf-8'
+            return response.headers.get_content_type(), response.read().decode(charset, errors='replace')
+
+    async def fetch_page(self, page, semaphore):
+        """Rows of one results page, retrying transient failures"""
+        url = self.page_url(page)
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    self.requests_made += 1
+                    content_type, body = await asyncio.to_thread(self._get, url)
+                    break
+                except urllib.error.HTTPError as e:
+                    if e.code in (401, 403):
+                        raise SessionExpired(f"Session rejected fetching page {page} (HTTP {e.code})")
+                    error = e
+                except (urllib.error.URLError, OSError) as e:
+                    error = e
+                if attempt == self.retries:
+                    raise HttpFetchError(f"Page {page} failed after {attempt + 1} attempts: {error}")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+        if content_type == 'application/json' or body.lstrip()[:1] in ('{', '['):
+            return parse_results_json(json.loads(body))
+        if self.login_marker and self.login_marker in body:
+            raise SessionExpired(f"Page {page} returned the login form")
+        return parse_results_html(body)
+
+    async def fetch_pages(self, pages):
+        """{page: rows} for pages, fetched concurrently"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self.fetch_page(page, semaphore) for page in pages))
+        return dict(zip(pages, results))
+
+    def iter_pages(self, start_page=1, last_page=1):
+        """Yield (page, rows) for start_page..last_page in order, a window at a time; stops at an empty page"""
+        page = start_page
+        while page <= last_page:
+            window = list(range(page, min(page + self.concurrency, last_page + 1)))
+            started = time.monotonic()
+            results = asyncio.run(self.fetch_pages(window))
+            logger.info(f"Fetched pages {window[0]}-{window[-1]} over HTTP in {time.monotonic() - started:.2f}s")
+            for number in window:
+                yield number, results[number]
+                if not results[number]:
+                    return
+            page = window[-1] + 1
@@ -0,0 +1,23 @@
+from datetime import timedelta
+from django.db.models import Max
+from .models import CriminalRecord
+
+
+def incremental_from_date(overlap_days=1):
+    """Start date (MM/DD/YYYY) for a "since last run" scrape, or None when nothing is stored yet
+
+    Uses the earlier of the newest filing date and the day of the newest scrape, since rows
+    without a filing date are stored with the scrape day. overlap_days re-checks the boundary
+    to pick up cases filed late on that day.
+    """
+    latest = CriminalRecord.objects.aggregate(
+        latest_filed=Max('date_filed'),
+        latest_scraped=Max('scraped_timestamp'),
+    )
+    if latest['latest_filed'] is None:
+        return None
+
+    since = latest['latest_filed']
+    if latest['latest_scraped'] is not None:
+        since = min(since, latest['latest_scraped'].date())
+    return (since - timedelta(days=overlap_days)).strftime("%m/%d/%Y")
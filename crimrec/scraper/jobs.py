@@ -0,0 +1,338 @@
+import os
+import time
+import signal
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .incremental import incremental_from_date
+from .models import ScrapeJob, ScrapeRun
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = "%m/%d/%Y"
+# Options a job may carry, and the values used when it does not
+JOB_OPTIONS = {
+    'max_pages': 1,
+    'batch_size': 100,
+    'extract_mode': 'script',
+    'engine': 'browser',
+    'http_concurrency': 4,
+    'incremental': False,
+    'resume': True,
+}
+# Failed jobs wait RETRY_BASE_SECONDS * 2 ** (attempts - 1) before their next attempt
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 60 * 60
+
+
+def default_account():
+    """The eClerks login this process scrapes with"""
+    return os.getenv('ECLERKS_EMAIL', '')
+
+
+class AccountMismatch(Exception):
+    """A job's account is not the login this process scrapes with"""
+
+
+def check_account(account):
+    """Raise AccountMismatch unless account is the ECLERKS_EMAIL login the scraper uses
+
+    The scraper logs in (and keeps its cookies) as ECLERKS_EMAIL, so running another
+    account's job would scrape under the wrong login and defeat its concurrency limit.
+    """
+    login = default_account()
+    if account != login:
+        raise AccountMismatch(f"Account '{account}' is not the configured login '{login}' (ECLERKS_EMAIL); "
+                              f"run a worker with that account's ECLERKS_EMAIL and ECLERKS_PASSWORD")
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def enqueue(from_date, to_date, account=None, priority=0, options=None, max_attempts=3):
+    """Queue a scrape of an MM/DD/YYYY date range; returns (job, created)
+
+    While a job for the same range and account is pending or running, it is returned
+    instead of queueing a duplicate, raised to the higher of the two priorities.
+    """
+    options = dict(options or {})
+    unknown = set(options) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown job options: {', '.join(sorted(unknown))}")
+    fields = {
+        'from_date': datetime.strptime(from_date, DATE_FORMAT).date(),
+        'to_date': datetime.strptime(to_date, DATE_FORMAT).date(),
+        'account': default_account() if account is None else account,
+    }
+    # The active job can finish between the failed insert and the lookup; then insert again
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                job = ScrapeJob.objects.create(priority=priority, options=options, max_attempts=max_attempts, **fields)
+            return job, True
+        except IntegrityError:
+            job = ScrapeJob.objects.filter(status__in=ScrapeJob.ACTIVE_STATUSES, **fields).first()
+            if job is None:
+                continue
+            if priority > job.priority:
+                ScrapeJob.objects.filter(pk=job.pk).update(priority=priority)
+                job.priority = priority
+            return job, False
+    raise RuntimeError(f"Could not queue {from_date} - {to_date}")
+
+
+def enqueue_incremental(account=None, overlap_days=1, default_from_date='01/01/2020', priority=0, options=None,
+                        max_attempts=3):
+    """Queue a scrape from the latest stored record to today, stopping at the first unchanged page"""
+    from_date = incremental_from_date(overlap_days) or default_from_date
+    to_date = timezone.localdate().strftime(DATE_FORMAT)
+    return enqueue(from_date, to_date, account, priority, dict(options or {}, incremental=True), max_attempts)
+
+
+def _expired(now):
+    """Running jobs whose worker stopped renewing the lease"""
+    return Q(status=ScrapeJob.RUNNING, lease_expires_at__lt=now)
+
+
+def _claimable(now):
+    """Due pending jobs, and expired running jobs with attempts left"""
+    return (Q(status=ScrapeJob.PENDING, run_after__lte=now)
+            | _expired(now) & Q(attempts__lt=F('max_attempts')))
+
+
+def fail_exhausted_leases(account, now=None):
+    """Mark failed the expired jobs that used their last attempt; returns how many
+
+    A job that kills its worker (a crashing page, say) never reaches fail_job, so
+    without this its lease would expire and be reclaimed forever.
+    """
+    now = now or timezone.now()
+    failed = ScrapeJob.objects.filter(_expired(now), account=account, attempts__gte=F('max_attempts')).update(
+        status=ScrapeJob.FAILED, lease_expires_at=None, updated_at=now,
+        last_error="Lease expired: the worker stopped during the last attempt"
+    )
+    if failed:
+        logger.error(f"Marked {failed} jobs failed after their last attempt's lease expired")
+    return failed
+
+
+def claim_job(worker_id, account=None, lease_seconds=900, account_concurrency=1):
+    """Lease the highest-priority due job for account, or return None
+
+    At most account_concurrency jobs per account hold a live lease across all workers.
+    Each claim is a single conditional UPDATE that re-checks both the job's state and the
+    account's live leases. The account's active jobs are locked first (SELECT ... FOR UPDATE,
+    a no-op on SQLite, which serializes writes anyway), so on PostgreSQL two workers cannot
+    both count the same live leases and overrun the limit.
+    """
+    account = default_account() if account is None else account
+    now = timezone.now()
+    fail_exhausted_leases(account, now)
+    live_leases = Coalesce(Subquery(
+        ScrapeJob.objects.filter(account=OuterRef('account'), status=ScrapeJob.RUNNING, lease_expires_at__gte=now)
+        .order_by().values('account').annotate(count=Count('id')).values('count')
+    ), 0)
+    candidates = ScrapeJob.objects.filter(_claimable(now), account=account).order_by('-priority', 'run_after', 'id')
+    with transaction.atomic():
+        # Id order, so concurrent claimers take the row locks in the same order
+        list(ScrapeJob.objects.select_for_update().filter(account=account, status__in=ScrapeJob.ACTIVE_STATUSES)
+             .order_by('id').values_list('id', flat=True))
+        for job_id in candidates.values_list('id', flat=True)[:10]:
+            claimed = (
+                ScrapeJob.objects.filter(_claimable(now), pk=job_id)
+                .alias(live_leases=live_leases)
+                .filter(live_leases__lt=account_concurrency)
+                .update(status=ScrapeJob.RUNNING, lease_owner=worker_id, attempts=F('attempts') + 1,
+                        lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+            )
+            if claimed:
+                job = ScrapeJob.objects.get(pk=job_id)
+                logger.info(f"Worker {worker_id} claimed job {job.pk} ({job}), attempt {job.attempts}")
+                return job
+    return None
+
+
+def renew_lease(job, worker_id, lease_seconds=900):
+    """Extend a job's lease; False when another worker has taken it over"""
+    return bool(ScrapeJob.objects.filter(pk=job.pk, status=ScrapeJob.RUNNING, lease_owner=worker_id).update(
+        lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds)
+    ))
+
+
+def complete_job(job, worker_id, run=None):
+    ScrapeJob.objects.filter(pk=job.pk, lease_owner=worker_id).update(
+        status=ScrapeJob.DONE, run=run, lease_expires_at=None, last_error='', updated_at=timezone.now()
+    )
+
+
+def fail_job(job, worker_id, error, run=None, retry=True):
+    """Schedule a retry with exponential backoff, or mark the job failed after max_attempts (or retry=False)"""
+    job.refresh_from_db(fields=['attempts', 'max_attempts'])
+    now = timezone.now()
+    if retry and job.attempts < job.max_attempts:
+        delay = retry_delay(job.attempts)
+        changes = {'status': ScrapeJob.PENDING, 'run_after': now + timedelta(seconds=delay)}
+        logger.warning(f"Job {job.pk} failed ({error}), retrying in {delay}s")
+    else:
+        changes = {'status': ScrapeJob.FAILED}
+        logger.error(f"Job {job.pk} failed after {job.attempts} attempts: {error}")
+    ScrapeJob.objects.filter(pk=job.pk, lease_owner=worker_id).update(
+        run=run, lease_expires_at=None, last_error=str(error), updated_at=now, **changes
+    )
+
+
+def run_job(job, session_pool=None, headless=True):
+    """Scrape a claimed job in this process and return its finished ScrapeRun
+
+    Raises AccountMismatch, before starting a run, for a job queued under another login.
+    """
+    from .scrapers import EClerksScraper
+
+    check_account(job.account)
+    options = dict(JOB_OPTIONS, **job.options)
+    from_date = job.from_date.strftime(DATE_FORMAT)
+    to_date = job.to_date.strftime(DATE_FORMAT)
+    run = ScrapeRun.start(from_date, to_date, dict(options, from_date=from_date, to_date=to_date, job=job.pk))
+    try:
+        scraper = EClerksScraper(
+            headless=headless,
+            batch_size=options['batch_size'],
+            extract_mode=options['extract_mode'],
+            fetch_engine=options['engine'],
+            http_concurrency=options['http_concurrency'],
+            stop_on_unchanged_page=options['incremental'],
+            session_pool=session_pool,
+            scrape_run=run,
+        )
+        success = scraper.run(from_date=from_date, to_date=to_date, max_pages=options['max_pages'],
+                              resume=options['resume'])
+    except Exception:
+        run.finish(False)
+        raise
+    run.finish(success, scraper.records_scraped, scraper.pages_scraped, scraper.writer.stats, scraper.metrics,
+               scraper.page_stats)
+    return run
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Renews a job's lease while it runs, so only a dead worker's jobs are reclaimed"""
+
+    def __init__(self, job, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.job = job
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                try:
+                    renewed = renew_lease(self.job, self.worker_id, self.lease_seconds)
+                except DatabaseError as e:
+                    # e.g. "database is locked" while the writer commits; the lease has time left
+                    logger.warning(f"Renewing the lease on job {self.job.pk} failed, retrying: {e}")
+                    continue
+                if not renewed:
+                    logger.warning(f"Lost the lease on job {self.job.pk}")
+                    return
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class ScrapeWorker:
+    """Runs queued jobs one at a time in this process, reusing one warm browser session
+
+    The first SIGTERM or SIGINT lets the current job finish and then stops; a second one
+    interrupts it (its lease then expires and another worker retries it). With
+    schedule_every (seconds), an incremental job is queued at that interval. account must
+    be the ECLERKS_EMAIL login (AccountMismatch otherwise).
+    """
+
+    def __init__(self, worker_id=None, account=None, lease_seconds=900, account_concurrency=1, poll_interval=5.0,
+                 headless=True, schedule_every=None, schedule_options=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.account = default_account() if account is None else account
+        check_account(self.account)
+        self.lease_seconds = lease_seconds
+        self.account_concurrency = account_concurrency
+        self.poll_interval = poll_interval
+        self.headless = headless
+        self.schedule_every = schedule_every
+        self.schedule_options = schedule_options or {}
+        self.stopping = threading.Event()
+        self.session_pool = None
+
+    def install_signal_handlers(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.handle_signal)
+
+    def handle_signal(self, signum, frame):
+        if self.stopping.is_set():
+            raise KeyboardInterrupt
+        logger.info(f"Worker {self.worker_id} stopping after the current job")
+        self.stopping.set()
+
+    def get_session_pool(self):
+        if self.session_pool is None:
+            from .sessions import get_session_pool
+            self.session_pool = get_session_pool(headless=self.headless)
+        return self.session_pool
+
+    def run(self, max_jobs=None, exit_when_idle=False):
+        """Process jobs until stopped; returns how many were run"""
+        processed = 0
+        next_schedule = time.monotonic()
+        logger.info(f"Worker {self.worker_id} started for account '{self.account}'")
+        while not self.stopping.is_set():
+            if self.schedule_every and time.monotonic() >= next_schedule:
+                job, created = enqueue_incremental(self.account, options=self.schedule_options)
+                logger.info(f"Scheduled incremental job {job.pk}" if created else f"Incremental job {job.pk} already queued")
+                next_schedule = time.monotonic() + self.schedule_every
+
+            job = claim_job(self.worker_id, self.account, self.lease_seconds, self.account_concurrency)
+            if job is None:
+                if exit_when_idle:
+                    break
+                self.stopping.wait(self.poll_interval)
+                continue
+
+            self.process(job)
+            processed += 1
+            if max_jobs is not None and processed >= max_jobs:
+                break
+        logger.info(f"Worker {self.worker_id} stopped after {processed} jobs")
+        return processed
+
+    def process(self, job):
+        """Run one claimed job and record its outcome; True when it succeeded"""
+        heartbeat = LeaseHeartbeat(job, self.worker_id, self.lease_seconds)
+        heartbeat.start()
+        try:
+            run = run_job(job, self.get_session_pool(), self.headless)
+        except AccountMismatch as e:
+            # Another attempt would use the same wrong login
+            fail_job(job, self.worker_id, str(e), retry=False)
+            return False
+        except Exception as e:
+            fail_job(job, self.worker_id, str(e))
+            return False
+        finally:
+            heartbeat.stop()
+
+        if run.success:
+            complete_job(job, self.worker_id, run)
+            logger.info(f"Job {job.pk} done: {run.records_scraped} records in {run.duration_seconds:.1f}s")
+            return True
+        fail_job(job, self.worker_id, "Scraper run failed", run)
+        return False
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from scraper.charges import backfill_charges
+
+
+class Command(BaseCommand):
+    help = 'Parse the charges text of stored records into Charge rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Records parsed and written per transaction',
+            default=2000
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Delete every Charge row and parse all records again (after a parser change)'
+        )
+
+    def handle(self, *args, **options):
+        records, charges = backfill_charges(batch_size=options['batch_size'], rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f"Parsed {charges} charges from {records} records"))
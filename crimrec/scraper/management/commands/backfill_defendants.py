@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from scraper.defendants import backfill_defendants
+
+
+class Command(BaseCommand):
+    help = 'Link stored records to Defendant rows by normalized name, birth date, sex and race'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Records resolved and updated per transaction',
+            default=2000
+        )
+
+    def handle(self, *args, **options):
+        linked, defendants = backfill_defendants(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Linked {linked} records; {defendants} defendants stored"))
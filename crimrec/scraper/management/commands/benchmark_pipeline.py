@@ -0,0 +1,112 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from scraper.benchmarks import compare_to_baseline, parse_scale, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Time each stage of the scrape -> parse -> persist -> export pipeline at several scales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            type=str,
+            help='Comma-separated row counts (k/m suffixes allowed)',
+            default='1k,100k,1m'
+        )
+        parser.add_argument(
+            '--rows-per-page',
+            type=int,
+            help='Rows per synthetic results page',
+            default=50
+        )
+        parser.add_argument(
+            '--captures',
+            type=str,
+            metavar='DIR',
+            help='Use result pages recorded with run_scraper --capture instead of synthetic ones'
+        )
+        parser.add_argument(
+            '--browser',
+            action='store_true',
+            help='Also time driver startup, login, navigation and extraction in Chrome against a replay server'
+        )
+        parser.add_argument(
+            '--headed',
+            action='store_true',
+            help='Show the browser during --browser stages'
+        )
+        parser.add_argument(
+            '--read-latency',
+            action='store_true',
+            help='Also time list view reads during ingest under each SQLite profile, in scratch databases'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the JSON results to this file (default: print them)'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help='JSON results of an earlier run to compare against'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            help='Fraction a stage may slow down against the baseline before it counts as a regression',
+            default=0.2
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when any stage regressed'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [parse_scale(scale) for scale in options['scales'].split(',') if scale.strip()]
+        except ValueError:
+            raise CommandError(f"Invalid --scales value: {options['scales']}")
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline {options['baseline']}: {e}")
+
+        results = run_benchmarks(
+            scales,
+            rows_per_page=options['rows_per_page'],
+            captures_dir=options['captures'],
+            browser=options['browser'],
+            headless=not options['headed'],
+            read_latency=options['read_latency'],
+        )
+
+        document = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(document)
+            self.stdout.write(self.style.SUCCESS(f"Benchmark results written to {options['output']}"))
+        else:
+            self.stdout.write(document)
+
+        if baseline is None:
+            return
+
+        regressions = 0
+        for scale, stage, before, after, change, regressed in compare_to_baseline(
+                results, baseline, options['tolerance']):
+            line = f"{scale:>8} {stage:<20} {before:10.3f}s -> {after:10.3f}s ({change:+.0%})"
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line} REGRESSION"))
+            else:
+                self.stdout.write(line)
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{regressions} stage(s) regressed beyond {options['tolerance']:.0%}")
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
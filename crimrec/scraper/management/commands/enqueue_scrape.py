@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from scraper import jobs
+
+
+class Command(BaseCommand):
+    help = 'Queue a date-range scrape for scrape_worker (safe to run from cron: duplicates are merged)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from-date',
+            type=str,
+            help='Start date for search (MM/DD/YYYY)',
+            default='01/01/2020'
+        )
+        parser.add_argument(
+            '--to-date',
+            type=str,
+            help='End date for search (MM/DD/YYYY), default today'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Queue a scrape from the latest stored record to today instead of --from-date/--to-date'
+        )
+        parser.add_argument(
+            '--overlap-days',
+            type=int,
+            help='Days before the latest stored record that --incremental re-checks',
+            default=1
+        )
+        parser.add_argument(
+            '--max-pages',
+            type=int,
+            help='Maximum number of pages to scrape',
+            default=jobs.JOB_OPTIONS['max_pages']
+        )
+        parser.add_argument(
+            '--engine',
+            choices=('browser', 'http'),
+            help='Page through results in the browser, or fetch them over HTTP after logging in',
+            default=jobs.JOB_OPTIONS['engine']
+        )
+        parser.add_argument(
+            '--priority',
+            type=int,
+            help='Higher priorities are claimed first',
+            default=0
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            help='Attempts before the job is marked failed',
+            default=3
+        )
+        parser.add_argument(
+            '--account',
+            type=str,
+            help='eClerks login the job runs under (default: ECLERKS_EMAIL)'
+        )
+
+    def handle(self, *args, **options):
+        job_options = {'max_pages': options['max_pages'], 'engine': options['engine']}
+        try:
+            if options['incremental']:
+                job, created = jobs.enqueue_incremental(
+                    options['account'], options['overlap_days'], options['from_date'],
+                    options['priority'], job_options, options['max_attempts']
+                )
+            else:
+                job, created = jobs.enqueue(
+                    options['from_date'],
+                    options['to_date'] or timezone.localdate().strftime(jobs.DATE_FORMAT),
+                    options['account'],
+                    options['priority'],
+                    job_options,
+                    options['max_attempts']
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}: {job}"))
+        else:
+            self.stdout.write(f"Job {job.pk} is already queued for {job.from_date} - {job.to_date} ({job.status})")
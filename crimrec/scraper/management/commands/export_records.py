@@ -0,0 +1,77 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from scraper.exporters import EXPORT_FORMATS, RecordExporter
+from scraper.views import filter_records
+
+
+class Command(BaseCommand):
+    help = 'Stream criminal records from the database to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='File to write; a .gz suffix enables gzip compression',
+            default='criminal_records.csv'
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            help='Output format (default: taken from the file name, else csv)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Gzip-compress the output'
+        )
+        parser.add_argument(
+            '--query',
+            type=str,
+            help='Only export records matching this search, as in the record list',
+            default=''
+        )
+        parser.add_argument(
+            '--parish',
+            type=str,
+            help='Only export records from this parish',
+            default=''
+        )
+        parser.add_argument(
+            '--charge',
+            type=str,
+            help='Only export records with this charge code, e.g. 14:67',
+            default=''
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows fetched from the database and written per chunk',
+            default=2000
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        fmt = options['format']
+        if not fmt:
+            stem = output[:-3] if output.endswith('.gz') else output
+            fmt = 'jsonl' if stem.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+        records, _ = filter_records(options['query'], options['parish'], options['charge'])
+        # The order of the default list view, which its composite index serves
+        exporter = RecordExporter(
+            records.order_by('-date_filed', '-id'), fmt, compress=compress, chunk_size=options['chunk_size']
+        )
+
+        tmp_path = f"{output}.tmp"
+        try:
+            with open(tmp_path, 'wb') as export_file:
+                for chunk in exporter:
+                    export_file.write(chunk)
+            os.replace(tmp_path, output)
+        except OSError as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise CommandError(f"Could not write {output}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {exporter.rows_written} records to {output}"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from scraper.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text index used by the record search'
+
+    def handle(self, *args, **options):
+        backend = rebuild_search_index()
+        if backend:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt full-text search index ({backend})"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                "No full-text backend available for this database; search uses LIKE scans"
+            ))
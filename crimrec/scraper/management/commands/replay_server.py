@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from scraper.replay import ReplayServer, ReplaySite
+
+
+class Command(BaseCommand):
+    help = 'Serve captured or synthetic eClerks pages locally for offline runs and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--port',
+            type=int,
+            help='Port to listen on',
+            default=8765
+        )
+        parser.add_argument(
+            '--captures',
+            type=str,
+            metavar='DIR',
+            help='Replay result pages recorded with run_scraper --capture DIR instead of synthetic ones'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            help='Number of result pages before the results run out',
+            default=10
+        )
+        parser.add_argument(
+            '--rows-per-page',
+            type=int,
+            help='Rows on each synthetic result page',
+            default=50
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            help='Seconds added to every response',
+            default=0.0
+        )
+
+    def handle(self, *args, **options):
+        try:
+            site = ReplaySite(
+                captures_dir=options['captures'],
+                pages=options['pages'],
+                rows_per_page=options['rows_per_page'],
+                latency=options['latency'],
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not load captures: {e}")
+
+        server = ReplayServer(site, port=options['port'])
+        self.stdout.write(self.style.SUCCESS(f"Replaying eClerks at {server.url}/Home"))
+        self.stdout.write(f"Scraper:  python manage.py run_scraper --base-url {server.url}/Home")
+        self.stdout.write(f"HTTP engine results URL: {server.results_url_template}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
@@ -1,12 +1,23 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from scraper.scrapers import EClerksScraper
-from scraper.models import CriminalRecord
+from scraper.metrics import RunMetrics
+from scraper.models import CriminalRecord, ScrapeRun
+from scraper.incremental import incremental_from_date
+from scraper.sharding import SHARD_PERIODS, run_sharded, split_date_range
+from scraper.sinks import FileSink
+from scraper.writers import RecordWriter
 from django.utils.timezone import now
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Options saved on each ScrapeRun, so throughput can be compared between like runs
+RUN_PARAMETERS = (
+    'from_date', 'to_date', 'max_pages', 'batch_size', 'extract_mode', 'engine', 'http_concurrency',
+    'headless', 'incremental', 'resume', 'fresh_login', 'workers', 'shard_by', 'output',
+)
+
 class Command(BaseCommand):
     help = 'Run the eClerksLA criminal records scraper'
 
@@ -26,46 +37,238 @@ class Command(BaseCommand):
         parser.add_argument(
             '--max-pages',
             type=int,
-            help='Maximum number of pages to scrape',
+            help='Maximum number of pages to scrape in this run (counted from the resumed page with --resume)',
             default=1
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Number of records buffered before each bulk database write',
+            default=100
+        )
+        parser.add_argument(
+            '--extract-mode',
+            choices=EClerksScraper.EXTRACT_MODES,
+            help='How result rows are read from the browser',
+            default='script'
+        )
+        parser.add_argument(
+            '--wait-timeout',
+            action='append',
+            default=[],
+            metavar='KIND=SECONDS',
+            help='Override a wait timeout, e.g. --wait-timeout results=60 (repeatable)'
+        )
+        parser.add_argument(
+            '--poll-frequency',
+            type=float,
+            help='Seconds between checks while waiting for the site',
+            default=0.25
+        )
+        parser.add_argument(
+            '--engine',
+            choices=EClerksScraper.FETCH_ENGINES,
+            help='Page through results in the browser, or fetch them over HTTP after logging in',
+            default='browser'
+        )
+        parser.add_argument(
+            '--http-results-url',
+            type=str,
+            help='Results URL template for --engine http (default: SCRAPER_HTTP_RESULTS_URL)'
+        )
+        parser.add_argument(
+            '--http-concurrency',
+            type=int,
+            help='Result pages fetched at once with --engine http',
+            default=4
+        )
+        parser.add_argument(
+            '--base-url',
+            type=str,
+            help='Site to scrape (default: SCRAPER_BASE_URL), e.g. a local replay_server'
+        )
+        parser.add_argument(
+            '--capture',
+            type=str,
+            metavar='DIR',
+            help='Save the HTML of the login, search and result pages to DIR for offline replay'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            metavar='PATH',
+            help='File the scraped records are streamed to, as CSV or (for .jsonl) JSON Lines; empty for none',
+            default='scraped_records.csv'
+        )
         parser.add_argument(
             '--headless',
             action='store_true',
             help='Run browser in headless mode'
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only scrape since the latest stored record and stop at the first page with nothing new'
+        )
+        parser.add_argument(
+            '--overlap-days',
+            type=int,
+            help='Days before the latest stored record that --incremental re-checks',
+            default=1
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue after the last page (or shard) completed by a previous run over the same dates'
+        )
+        parser.add_argument(
+            '--fresh-login',
+            action='store_true',
+            help='Ignore saved session cookies and log in from scratch'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Number of parallel browser sessions; above 1 the date window is sharded',
+            default=1
+        )
+        parser.add_argument(
+            '--shard-by',
+            choices=SHARD_PERIODS,
+            help='Size of each date shard when running with --workers',
+            default='month'
+        )
+        parser.add_argument(
+            '--shard-retries',
+            type=int,
+            help='How many times a failed shard is retried',
+            default=1
+        )
 
     def handle(self, *args, **options):
+        # Shard workers persist nothing, so they cannot tell a page of known records apart
+        if options['incremental'] and options['workers'] > 1:
+            raise CommandError("--incremental cannot be combined with --workers")
         self.stdout.write(self.style.SUCCESS('Starting criminal records scraper...'))
         
+        run = None
         try:
-            scraper = EClerksScraper(headless=options['headless'])
+            wait_timeouts = {}
+            for override in options['wait_timeout']:
+                kind, _, seconds = override.partition('=')
+                wait_timeouts[kind.strip()] = float(seconds)
+            
+            if options['incremental']:
+                since = incremental_from_date(options['overlap_days'])
+                if since:
+                    options['from_date'] = since
+                    self.stdout.write(f"Incremental run from {since}")
+                else:
+                    self.stdout.write(f"No stored records yet, incremental run from {options['from_date']}")
+            
+            scraper_options = {
+                'headless': options['headless'],
+                'batch_size': options['batch_size'],
+                'extract_mode': options['extract_mode'],
+                'wait_timeouts': wait_timeouts,
+                'poll_frequency': options['poll_frequency'],
+                'stop_on_unchanged_page': options['incremental'],
+                'reuse_session': not options['fresh_login'],
+                'fetch_engine': options['engine'],
+                'http_results_url': options['http_results_url'],
+                'http_concurrency': options['http_concurrency'],
+                'base_url': options['base_url'],
+                'capture_dir': options['capture'],
+            }
             
-            # Get initial record count
-            initial_count = CriminalRecord.objects.count()
+            run = ScrapeRun.start(
+                options['from_date'], options['to_date'], {name: options[name] for name in RUN_PARAMETERS}
+            )
+            
+            if options['workers'] > 1:
+                self.handle_sharded(options, scraper_options, run)
+                return
+            
+            scraper = EClerksScraper(sinks=self.output_sinks(options), scrape_run=run, **scraper_options)
             
             success = scraper.run(
                 from_date=options['from_date'],
                 to_date=options['to_date'],
-                max_pages=options['max_pages']
+                max_pages=options['max_pages'],
+                resume=options['resume']
             )
+            run.finish(success, scraper.records_scraped, scraper.pages_scraped, scraper.writer.stats, scraper.metrics,
+                       scraper.page_stats)
             
             if success:
-                # Get final record count and records scraped
-                final_count = CriminalRecord.objects.count()
-                records_added = final_count - initial_count
-                total_records_scraped = len(scraper.records)
-                
-                self.stdout.write(self.style.SUCCESS(
-                    f"Scraping completed successfully!\n"
-                    f"Records scraped: {total_records_scraped}\n"
-                    f"Records added to database: {records_added}\n"
-                    f"Total records in database: {final_count}"
-                ))
+                self.write_summary(scraper.records_scraped, scraper.writer.stats, scraper.metrics)
             else:
                 self.stdout.write(self.style.ERROR("Scraping failed. Check logs for details."))
                 
         except Exception as e:
             logger.error(f"Scraper command failed: {str(e)}")
             self.stdout.write(self.style.ERROR(f"Error: {str(e)}"))
+            if run is not None and run.finished_at is None:
+                run.finish(False)
+
+    def handle_sharded(self, options, scraper_options, run):
+        """Scrape date shards in parallel browser sessions, writing through one writer"""
+        shards = split_date_range(options['from_date'], options['to_date'], options['shard_by'])
+        self.stdout.write(f"Running {len(shards)} shards across {options['workers']} workers")
+        
+        metrics = RunMetrics()
+        writer = RecordWriter(batch_size=options['batch_size'], metrics=metrics)
+        reports = run_sharded(
+            shards,
+            dict(scraper_options, max_pages=options['max_pages']),
+            writer,
+            workers=options['workers'],
+            retries=options['shard_retries'],
+            resume=options['resume'],
+            sinks=self.output_sinks(options),
+            run=run
+        )
+        
+        for report in reports:
+            from_date, to_date = report['shard']
+            if report['skipped']:
+                self.stdout.write(f"{from_date} - {to_date}: skipped, completed by a previous run")
+                continue
+            rate = report['rows'] / report['seconds'] if report['seconds'] else 0.0
+            line = (
+                f"{from_date} - {to_date}: {report['rows']} rows, {report['pages']} pages, "
+                f"{report['seconds']:.1f}s ({rate:.1f} rows/s), attempts {report['attempts']}"
+            )
+            if report['success']:
+                self.stdout.write(line)
+            else:
+                self.stdout.write(self.style.ERROR(f"{line} FAILED: {report['error']}"))
+        
+        for report in reports:
+            metrics.merge(report.get('metrics', {}))
+        failed = [report for report in reports if not report['success']]
+        records_scraped = sum(report['rows'] for report in reports)
+        run.finish(not failed, records_scraped, sum(report['pages'] for report in reports), writer.stats, metrics,
+                   [page for report in reports for page in report.get('page_stats', [])])
+        self.write_summary(records_scraped, writer.stats, metrics)
+        if failed:
+            self.stdout.write(self.style.ERROR(f"{len(failed)} of {len(reports)} shards failed. Check logs for details."))
+
+    def output_sinks(self, options):
+        return [FileSink(options['output'])] if options['output'] else []
 
+    def write_summary(self, records_scraped, stats, metrics=None):
+        """Report the counts collected by the bulk writer, then the run's stage timings"""
+        final_count = CriminalRecord.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Scraping completed successfully!\n"
+            f"Records scraped: {records_scraped}\n"
+            f"Records inserted: {stats['inserted']}\n"
+            f"Records updated: {stats['updated']}\n"
+            f"Records unchanged: {stats['unchanged']}\n"
+            f"Total records in database: {final_count}"
+        ))
+        if metrics is not None:
+            self.stdout.write("Run metrics:")
+            for line in metrics.summary_lines():
+                self.stdout.write(line)
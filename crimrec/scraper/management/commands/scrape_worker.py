@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from scraper.jobs import AccountMismatch, ScrapeWorker
+
+
+class Command(BaseCommand):
+    help = 'Run queued scrape jobs in this process, one browser session at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--worker-id',
+            type=str,
+            help='Name recorded on leased jobs (default: host:pid)'
+        )
+        parser.add_argument(
+            '--account',
+            type=str,
+            help='eClerks login whose jobs this worker claims; must be the ECLERKS_EMAIL login (default: ECLERKS_EMAIL)'
+        )
+        parser.add_argument(
+            '--lease-seconds',
+            type=int,
+            help='How long a claimed job is held without a heartbeat before other workers may retry it',
+            default=900
+        )
+        parser.add_argument(
+            '--account-concurrency',
+            type=int,
+            help='Jobs that may run at once for the same eClerks account, across all workers',
+            default=1
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            help='Seconds between checks for new jobs while idle',
+            default=5.0
+        )
+        parser.add_argument(
+            '--schedule-every',
+            type=float,
+            metavar='MINUTES',
+            help='Also queue an incremental scrape every MINUTES (replaces cron-spawned run_scraper)'
+        )
+        parser.add_argument(
+            '--schedule-max-pages',
+            type=int,
+            help='Maximum pages for scheduled incremental scrapes',
+            default=10
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            help='Stop after running this many jobs'
+        )
+        parser.add_argument(
+            '--exit-when-idle',
+            action='store_true',
+            help='Stop once no job is due instead of waiting for more'
+        )
+        parser.add_argument(
+            '--headless',
+            action='store_true',
+            help='Run browser in headless mode'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            worker = ScrapeWorker(
+                worker_id=options['worker_id'],
+                account=options['account'],
+                lease_seconds=options['lease_seconds'],
+                account_concurrency=options['account_concurrency'],
+                poll_interval=options['poll_interval'],
+                headless=options['headless'],
+                schedule_every=options['schedule_every'] * 60 if options['schedule_every'] else None,
+                schedule_options={'max_pages': options['schedule_max_pages']},
+            )
+        except AccountMismatch as e:
+            raise CommandError(str(e))
+        worker.install_signal_handlers()
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker.worker_id} waiting for jobs (Ctrl-C to stop)"))
+        processed = worker.run(max_jobs=options['max_jobs'], exit_when_idle=options['exit_when_idle'])
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {processed} jobs"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from scraper.selector_cache import SelectorCache
+
+
+class Command(BaseCommand):
+    help = 'Show or clear the learned selector cache used by the scraper'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Forget all learned selectors and statistics'
+        )
+
+    def handle(self, *args, **options):
+        cache = SelectorCache()
+
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS(f"Cleared selector cache {cache.path}"))
+            return
+
+        if not cache.steps:
+            self.stdout.write("Selector cache is empty")
+            return
+
+        for step, entry in sorted(cache.steps.items()):
+            self.stdout.write(self.style.SUCCESS(f"{step} (preferred: {entry.get('preferred') or '-'})"))
+            for key, stats in sorted(entry.get('stats', {}).items(), key=lambda item: -item[1]['hits']):
+                self.stdout.write(f"  {stats['hits']:>6} hits {stats['misses']:>6} misses  {key}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from scraper import snapshots
+
+
+class Command(BaseCommand):
+    help = 'Write a Parquet snapshot of criminal records, partitioned by parish and filing year'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Dataset directory',
+            default='snapshots/criminal_records'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild the whole snapshot instead of appending records added since the last one'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows per Arrow record batch',
+            default=50000
+        )
+
+    def handle(self, *args, **options):
+        if snapshots.pa is None:
+            raise CommandError("pyarrow is not installed; run 'pip install pyarrow' to write snapshots")
+
+        summary = snapshots.write_snapshot(options['output'], full=options['full'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {summary['mode']}: {summary['rows']} records written to {options['output']}"
+        ))
@@ -0,0 +1,121 @@
+import time
+from contextlib import contextmanager
+
+PROMETHEUS_PREFIX = 'crimrec_scraper'
+
+
+class RunMetrics:
+    """Stage timers, counters and gauges collected during one scraper run
+
+    Timers accumulate count/total/max seconds per stage name; counters are plain
+    integers. as_dict() is JSON-serializable and merge() combines shard runs.
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.monotonic()
+
+    @contextmanager
+    def timer(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started)
+
+    def observe(self, name, seconds):
+        entry = self.timers.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        entry['count'] += 1
+        entry['total'] += seconds
+        entry['max'] = max(entry['max'], seconds)
+
+    def increment(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def pages_per_minute(self):
+        pages_timer = self.timers.get('page', {'count': 0, 'total': 0.0})
+        return 60.0 * pages_timer['count'] / pages_timer['total'] if pages_timer['total'] else 0.0
+
+    def as_dict(self):
+        return {
+            'timers': {name: dict(entry) for name, entry in self.timers.items()},
+            'counters': dict(self.counters),
+            'gauges': dict(self.gauges),
+            'elapsed': self.elapsed(),
+        }
+
+    def merge(self, data):
+        """Add the as_dict() output of another run (e.g. a shard worker) into this one"""
+        for name, entry in data.get('timers', {}).items():
+            mine = self.timers.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            mine['count'] += entry['count']
+            mine['total'] += entry['total']
+            mine['max'] = max(mine['max'], entry['max'])
+        for name, value in data.get('counters', {}).items():
+            self.increment(name, value)
+        for name, value in data.get('gauges', {}).items():
+            self.gauges[name] = self.gauges.get(name, 0) + value
+
+    def summary_lines(self):
+        """Human-readable stage timings, slowest first"""
+        lines = []
+        for name, entry in sorted(self.timers.items(), key=lambda item: -item[1]['total']):
+            lines.append(f"  {name}: {entry['count']}x, total {entry['total']:.2f}s, max {entry['max']:.2f}s")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name}: {value}")
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"  {name}: {value:.2f}")
+        if 'page' in self.timers:
+            lines.append(f"  pages per minute: {self.pages_per_minute():.1f}")
+        return lines
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(latest, status_counts, record_total=None):
+    """Prometheus text exposition (format 0.0.4) for the latest finished run and run totals
+
+    latest is a ScrapeRun or None; status_counts maps 'success'/'failure' to run counts.
+    """
+    prefix = PROMETHEUS_PREFIX
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+            lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+    metric('runs', 'gauge', 'Finished scraper runs by outcome',
+           [({'status': status}, status_counts.get(status, 0)) for status in ('success', 'failure')])
+
+    if latest is not None:
+        metric('last_run_timestamp_seconds', 'gauge', 'When the latest run finished',
+               [({}, f"{latest.finished_at.timestamp():.3f}")])
+        metric('last_run_success', 'gauge', 'Whether the latest run succeeded', [({}, int(latest.success))])
+        metric('last_run_duration_seconds', 'gauge', 'Wall time of the latest run',
+               [({}, f"{latest.duration_seconds:.3f}")])
+        metric('last_run_pages', 'gauge', 'Result pages scraped by the latest run', [({}, latest.pages)])
+        metric('last_run_records', 'gauge', 'Records handled by the latest run',
+               [({'result': result}, getattr(latest, result))
+                for result in ('records_scraped', 'inserted', 'updated', 'unchanged')])
+        timers = latest.metrics.get('timers', {})
+        metric('last_run_stage_seconds', 'gauge', 'Seconds spent per stage in the latest run',
+               [({'stage': stage}, f"{entry['total']:.3f}") for stage, entry in sorted(timers.items())])
+        metric('last_run_stage_calls', 'gauge', 'Times each stage ran in the latest run',
+               [({'stage': stage}, entry['count']) for stage, entry in sorted(timers.items())])
+
+    if record_total is not None:
+        metric('records', 'gauge', 'Criminal records stored', [({}, record_total)])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_date', models.DateField()),
+                ('to_date', models.DateField()),
+                ('last_completed_page', models.PositiveIntegerField(default=0)),
+                ('page_first_case_numbers', models.JSONField(blank=True, default=dict)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='scrapecheckpoint',
+            constraint=models.UniqueConstraint(fields=('from_date', 'to_date'), name='unique_checkpoint_date_range'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from scraper.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def remove(apps, schema_editor):
+    from scraper.search import remove_search_index
+    remove_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0002_scrapecheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, remove),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0003_record_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='criminalrecord',
+            index=models.Index(fields=['-date_filed', '-id'], name='scraper_rec_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-17 19:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0004_record_date_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('from_date', models.DateField(blank=True, null=True)),
+                ('to_date', models.DateField(blank=True, null=True)),
+                ('success', models.BooleanField(default=False)),
+                ('pages', models.PositiveIntegerField(default=0)),
+                ('records_scraped', models.PositiveIntegerField(default=0)),
+                ('inserted', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('unchanged', models.PositiveIntegerField(default=0)),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
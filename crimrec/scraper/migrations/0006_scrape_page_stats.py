@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-17 20:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0005_scraperun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraperun',
+            name='errors',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='parameters',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='rows_parsed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='seconds_per_page',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='skipped',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ScrapePage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.CharField(blank=True, max_length=21)),
+                ('page_number', models.PositiveIntegerField()),
+                ('started_at', models.DateTimeField()),
+                ('seconds', models.FloatField()),
+                ('rows_parsed', models.PositiveIntegerField(default=0)),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('inserted', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('unchanged', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('errors', models.PositiveIntegerField(default=0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scrape_pages', to='scraper.scraperun')),
+            ],
+            options={
+                'ordering': ['run', 'started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-17 20:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0006_scrape_page_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_date', models.DateField()),
+                ('to_date', models.DateField()),
+                ('account', models.CharField(blank=True, max_length=255)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('priority', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('lease_owner', models.CharField(blank=True, max_length=100)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='scraper.scraperun')),
+            ],
+            options={
+                'ordering': ['-priority', 'run_after', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='scrapejob',
+            index=models.Index(fields=['status', 'run_after'], name='scraper_job_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scrapejob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('from_date', 'to_date', 'account'), name='unique_active_scrape_job'),
+        ),
+    ]
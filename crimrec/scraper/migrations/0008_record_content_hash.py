@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0007_scrapejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='criminalrecord',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='criminalrecord',
+            name='last_changed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='criminalrecord',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
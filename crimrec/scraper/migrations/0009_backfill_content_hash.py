@@ -0,0 +1,33 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def backfill(apps, schema_editor):
+    """Hash existing records and date their last sighting and change to when they were scraped"""
+    from scraper.hashing import HASH_FIELDS, content_hash
+
+    CriminalRecord = apps.get_model('scraper', 'CriminalRecord')
+    batch = []
+    for record in CriminalRecord.objects.filter(content_hash='').only('id', 'scraped_timestamp', *HASH_FIELDS).iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        record.content_hash = content_hash({field: getattr(record, field) for field in HASH_FIELDS})
+        record.last_seen = record.last_changed = record.scraped_timestamp
+        batch.append(record)
+        if len(batch) >= BATCH_SIZE:
+            CriminalRecord.objects.bulk_update(batch, ['content_hash', 'last_seen', 'last_changed'])
+            batch = []
+    if batch:
+        CriminalRecord.objects.bulk_update(batch, ['content_hash', 'last_seen', 'last_changed'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0008_record_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
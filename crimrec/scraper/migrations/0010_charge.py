@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-17 20:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0009_backfill_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Charge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordinal', models.PositiveSmallIntegerField()),
+                ('code', models.CharField(blank=True, max_length=50)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='charge_entries', to='scraper.criminalrecord')),
+            ],
+            options={
+                'ordering': ['record', 'ordinal'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='charge',
+            index=models.Index(fields=['code', 'record'], name='scraper_charge_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='charge',
+            index=models.Index(fields=['description'], name='scraper_charge_desc_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='charge',
+            constraint=models.UniqueConstraint(fields=('record', 'ordinal'), name='unique_charge_ordinal'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-17 20:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0010_charge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Defendant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(db_index=True, max_length=255)),
+                ('birth_date', models.DateField(blank=True, null=True)),
+                ('sex', models.CharField(default='U', max_length=1)),
+                ('race', models.CharField(default='U', max_length=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['normalized_name', 'birth_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='criminalrecord',
+            name='defendant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='records', to='scraper.defendant'),
+        ),
+        migrations.AddIndex(
+            model_name='criminalrecord',
+            index=models.Index(fields=['defendant', '-date_filed'], name='scraper_rec_defendant_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0011_defendant'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scrapepage',
+            name='inserted',
+            field=models.PositiveIntegerField(default=0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scrapepage',
+            name='unchanged',
+            field=models.PositiveIntegerField(default=0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scrapepage',
+            name='updated',
+            field=models.PositiveIntegerField(default=0, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def reparse(apps, schema_editor):
+    """Re-parse the charges of records with an RS-prefixed or missing code, now codes are bare citations"""
+    from scraper.parsing import parse_charges
+
+    Charge = apps.get_model('scraper', 'Charge')
+    CriminalRecord = apps.get_model('scraper', 'CriminalRecord')
+    code_length = Charge._meta.get_field('code').max_length
+    description_length = Charge._meta.get_field('description').max_length
+    record_ids = list(
+        Charge.objects.exclude(code__regex=r'^[0-9]').order_by('record_id').values_list('record_id', flat=True).distinct()
+    )
+    for start in range(0, len(record_ids), BATCH_SIZE):
+        batch = record_ids[start:start + BATCH_SIZE]
+        charges = [
+            Charge(record_id=record_id, ordinal=ordinal, code=code[:code_length],
+                   description=description[:description_length])
+            for record_id, text in CriminalRecord.objects.filter(id__in=batch).values_list('id', 'charges')
+            for ordinal, (code, description) in enumerate(parse_charges(text), start=1)
+        ]
+        Charge.objects.filter(record_id__in=batch).delete()
+        Charge.objects.bulk_create(charges)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0012_scrape_page_null_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(reparse, migrations.RunPython.noop),
+    ]
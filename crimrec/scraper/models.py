@@ -1,5 +1,26 @@
 from django.db import models
 from django.core.validators import MinLengthValidator
+from django.utils import timezone
+from datetime import datetime
+
+class Defendant(models.Model):
+    """A person, identified by normalized name, birth date, sex and race across their cases"""
+    # defendants.defendant_key() of the identifying fields
+    key = models.CharField(max_length=32, unique=True)
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(max_length=255, db_index=True)
+    birth_date = models.DateField(null=True, blank=True)
+    sex = models.CharField(max_length=1, default='U')
+    race = models.CharField(max_length=1, default='U')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['normalized_name', 'birth_date']
+
+    def __str__(self):
+        born = f" ({self.birth_date:%m/%d/%Y})" if self.birth_date else ''
+        return f"{self.name}{born}"
+
 
 class CriminalRecord(models.Model):
     SEX_CHOICES = [
@@ -27,6 +48,11 @@ class CriminalRecord(models.Model):
     parish = models.CharField(max_length=100)
     alert_available = models.BooleanField(default=False)
     scraped_timestamp = models.DateTimeField(auto_now_add=True)
+    # hashing.content_hash() of the scraped fields, compared on re-scrape to skip unchanged rows
+    content_hash = models.CharField(max_length=32, blank=True, default='')
+    last_seen = models.DateTimeField(null=True, blank=True)
+    last_changed = models.DateTimeField(null=True, blank=True)
+    defendant = models.ForeignKey(Defendant, null=True, blank=True, on_delete=models.SET_NULL, related_name='records')
 
     class Meta:
         ordering = ['-date_filed']
@@ -34,9 +60,234 @@ class CriminalRecord(models.Model):
             models.Index(fields=['defendant_name']),
             models.Index(fields=['case_number']),
             models.Index(fields=['parish']),
+            # Keyset pagination seeks on (date_filed, id)
+            models.Index(fields=['-date_filed', '-id'], name='scraper_rec_date_id_idx'),
+            # A defendant's case history, newest first, in one range scan
+            models.Index(fields=['defendant', '-date_filed'], name='scraper_rec_defendant_idx'),
         ]
 
     def __str__(self):
         return f"{self.defendant_name} - {self.case_number}"
 
 
+class Charge(models.Model):
+    """One charge of a CriminalRecord, parsed from its charges text at ingest"""
+    record = models.ForeignKey(CriminalRecord, on_delete=models.CASCADE, related_name='charge_entries')
+    # Position within the record's charges, from 1
+    ordinal = models.PositiveSmallIntegerField()
+    # Statute citation, e.g. '14:67'; empty when the charge text has none
+    code = models.CharField(max_length=50, blank=True)
+    description = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['record', 'ordinal']
+        constraints = [
+            models.UniqueConstraint(fields=['record', 'ordinal'], name='unique_charge_ordinal'),
+        ]
+        indexes = [
+            # Code lookups and per-code record counts are answered from the index alone
+            models.Index(fields=['code', 'record'], name='scraper_charge_code_idx'),
+            models.Index(fields=['description'], name='scraper_charge_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.code} {self.description}".strip()
+
+
+
+
+class ScrapeCheckpoint(models.Model):
+    """Progress of a search over one date range, so an interrupted run can resume"""
+    from_date = models.DateField()
+    to_date = models.DateField()
+    last_completed_page = models.PositiveIntegerField(default=0)
+    # First case number seen on each completed page, keyed by page number
+    page_first_case_numbers = models.JSONField(default=dict, blank=True)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['from_date', 'to_date'], name='unique_checkpoint_date_range'),
+        ]
+
+    def __str__(self):
+        return f"{self.from_date} - {self.to_date}: page {self.last_completed_page}"
+
+    @classmethod
+    def for_search(cls, from_date, to_date):
+        """Get or create the checkpoint for an MM/DD/YYYY date range"""
+        checkpoint, _ = cls.objects.get_or_create(
+            from_date=datetime.strptime(from_date, "%m/%d/%Y").date(),
+            to_date=datetime.strptime(to_date, "%m/%d/%Y").date(),
+        )
+        return checkpoint
+
+    @property
+    def resume_page(self):
+        """Page a resumed run should start from"""
+        if self.completed:
+            return 1
+        return self.last_completed_page + 1
+
+    def record_page(self, page, first_case_number):
+        """Mark page as fully persisted"""
+        self.last_completed_page = page
+        self.page_first_case_numbers[str(page)] = first_case_number
+        self.save(update_fields=['last_completed_page', 'page_first_case_numbers', 'updated_at'])
+
+    def mark_completed(self):
+        """Mark the whole result set as scraped"""
+        self.completed = True
+        self.save(update_fields=['completed', 'updated_at'])
+
+    def reset(self):
+        """Start over from page 1"""
+        self.last_completed_page = 0
+        self.page_first_case_numbers = {}
+        self.completed = False
+        self.save()
+
+
+class ScrapeRun(models.Model):
+    """One run_scraper invocation: what it scraped and how long each stage took"""
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    from_date = models.DateField(null=True, blank=True)
+    to_date = models.DateField(null=True, blank=True)
+    # Command options the run was started with
+    parameters = models.JSONField(default=dict, blank=True)
+    success = models.BooleanField(default=False)
+    pages = models.PositiveIntegerField(default=0)
+    rows_parsed = models.PositiveIntegerField(default=0)
+    records_scraped = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    seconds_per_page = models.FloatField(null=True, blank=True)
+    # RunMetrics.as_dict(): stage timers, counters and gauges
+    metrics = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        status = 'running' if self.finished_at is None else ('ok' if self.success else 'failed')
+        return f"Run {self.started_at:%Y-%m-%d %H:%M} ({status})"
+
+    @classmethod
+    def start(cls, from_date=None, to_date=None, parameters=None):
+        """Record the start of a run over an MM/DD/YYYY date range"""
+        def parse(value):
+            return datetime.strptime(value, "%m/%d/%Y").date() if value else None
+        return cls.objects.create(from_date=parse(from_date), to_date=parse(to_date), parameters=parameters or {})
+
+    def finish(self, success, records_scraped=0, pages=0, stats=None, metrics=None, page_stats=()):
+        """Store the outcome, writer counts and RunMetrics of the run, plus one ScrapePage per page_stats dict"""
+        stats = stats or {}
+        self.finished_at = timezone.now()
+        self.success = success
+        self.records_scraped = records_scraped
+        self.pages = pages
+        self.inserted = stats.get('inserted', 0)
+        self.updated = stats.get('updated', 0)
+        self.unchanged = stats.get('unchanged', 0)
+        if metrics is not None:
+            self.metrics = metrics.as_dict()
+            self.rows_parsed = metrics.counters.get('rows_parsed', 0)
+            self.skipped = metrics.counters.get('rows_skipped', 0)
+            self.errors = metrics.counters.get('row_errors', 0)
+            page_timer = metrics.timers.get('page')
+            if page_timer and page_timer['count']:
+                self.seconds_per_page = page_timer['total'] / page_timer['count']
+        self.save()
+        self.add_pages(page_stats)
+
+    def add_pages(self, page_stats):
+        """Store one ScrapePage per page_stats dict, as pages finish during the run"""
+        ScrapePage.objects.bulk_create([ScrapePage(run=self, **page) for page in page_stats])
+
+    @property
+    def duration_seconds(self):
+        end = self.finished_at or timezone.now()
+        return (end - self.started_at).total_seconds()
+
+    @property
+    def pages_per_minute(self):
+        return 60.0 / self.seconds_per_page if self.seconds_per_page else None
+
+
+class ScrapePage(models.Model):
+    """Throughput of one result page within a ScrapeRun"""
+    run = models.ForeignKey(ScrapeRun, on_delete=models.CASCADE, related_name='scrape_pages')
+    # 'MM/DD/YYYY-MM/DD/YYYY' for pages scraped by a shard worker
+    shard = models.CharField(max_length=21, blank=True)
+    page_number = models.PositiveIntegerField()
+    started_at = models.DateTimeField()
+    seconds = models.FloatField()
+    rows_parsed = models.PositiveIntegerField(default=0)
+    records = models.PositiveIntegerField(default=0)
+    # Null for shard pages: the parent writes a shard's rows all at once, not page by page
+    inserted = models.PositiveIntegerField(default=0, null=True)
+    updated = models.PositiveIntegerField(default=0, null=True)
+    unchanged = models.PositiveIntegerField(default=0, null=True)
+    skipped = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['run', 'started_at']
+
+    def __str__(self):
+        return f"Page {self.page_number} of run {self.run_id}"
+
+
+class ScrapeJob(models.Model):
+    """A queued date-range scrape, claimed by a scrape_worker under a time-limited lease"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (PENDING, RUNNING)
+
+    from_date = models.DateField()
+    to_date = models.DateField()
+    # eClerks login the job runs under; workers only claim jobs for their own account
+    account = models.CharField(max_length=255, blank=True)
+    # run_scraper options such as max_pages, incremental and engine
+    options = models.JSONField(default=dict, blank=True)
+    priority = models.IntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    lease_owner = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    run = models.ForeignKey(ScrapeRun, null=True, blank=True, on_delete=models.SET_NULL, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_after', 'id']
+        constraints = [
+            # At most one queued or running job per date range and account
+            models.UniqueConstraint(
+                fields=['from_date', 'to_date', 'account'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_scrape_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='scraper_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.from_date} - {self.to_date} ({self.status})"
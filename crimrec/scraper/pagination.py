@@ -0,0 +1,157 @@
+import json
+import base64
+import binascii
+from datetime import date
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Default list order: newest filings first, id breaks ties so the order is total
+RECORD_ORDERING = (('date_filed', True), ('id', True))
+# Ranked search results: best bm25/ts_rank first (lower search_rank is better)
+SEARCH_ORDERING = (('search_rank', False), ('id', True))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, direction='next'):
+    """Opaque URL-safe token holding the sort key of a boundary row"""
+    payload = {'d': direction, 'v': [value.isoformat() if isinstance(value, date) else value for value in values]}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (values, direction) from encode_cursor(); raises InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values, direction = payload['v'], payload['d']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor("Malformed page cursor")
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise InvalidCursor("Malformed page cursor")
+    return values, direction
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator with cursors for its neighbours"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Seek pagination: each page filters past the previous page's last sort key
+
+    ordering is a sequence of (field, descending) pairs whose last field must be unique.
+    Every page is an indexed range scan of per_page + 1 rows, so page N costs the same
+    as page 1 (unlike OFFSET, which reads and discards all earlier rows).
+    """
+
+    def __init__(self, queryset, per_page=25, ordering=RECORD_ORDERING):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def order_by(self, reverse=False):
+        return [f"{'-' if descending != reverse else ''}{field}" for field, descending in self.ordering]
+
+    def seek_filter(self, values, reverse=False):
+        """Rows sorting strictly after values (before them when reverse)"""
+        condition = Q()
+        for position, (field, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            equal = {name: value for (name, _), value in zip(self.ordering[:position], values)}
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[position]})
+        return condition
+
+    def sort_key(self, obj):
+        return [getattr(obj, field) for field, _ in self.ordering]
+
+    def get_page(self, cursor=None):
+        """Page after (or before) the cursor; the first page for no cursor or a bad one"""
+        values, direction = None, 'next'
+        if cursor:
+            try:
+                values, direction = decode_cursor(cursor)
+            except InvalidCursor:
+                values = None
+            if values is not None and len(values) != len(self.ordering):
+                values, direction = None, 'next'
+
+        reverse = direction == 'prev'
+        queryset = self.queryset.order_by(*self.order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values, reverse))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage([])
+        # Coming from a cursor means there is at least one page on the side we came from
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else values is not None
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(self.sort_key(rows[-1]), 'next') if has_next else None,
+            previous_cursor=encode_cursor(self.sort_key(rows[0]), 'prev') if has_previous else None,
+        )
+
+
+def estimated_table_rows(model):
+    """Planner statistics row estimate (PostgreSQL) or None where the backend has none"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def estimated_count(queryset, cap=10000):
+    """(count, is_estimate) without an unbounded COUNT over a large table
+
+    Unfiltered querysets use the planner estimate where available. Otherwise at most cap
+    rows are counted and a larger result is reported as (cap, True).
+    """
+    if not queryset.query.where:
+        estimate = estimated_table_rows(queryset.model)
+        if estimate is not None and estimate > cap:
+            return estimate, True
+    count = queryset.order_by().values('pk')[:cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator that avoids exact COUNTs on large result sets"""
+
+    @cached_property
+    def count(self):
+        count, _ = estimated_count(self.object_list, cap=100000)
+        return count
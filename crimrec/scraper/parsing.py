@@ -0,0 +1,210 @@
+import re
+from html.parser import HTMLParser
+from .dates import date_parser
+
+# Result grid columns, in on-screen order
+RESULT_COLUMNS = [
+    'defendant_name',
+    'birth_date',
+    'sex',
+    'race',
+    'case_number',
+    'date_filed',
+    'charges',
+    'arrest_citation_date',
+    'parish',
+    'alert',
+]
+# Date cells, by record field and column position
+DATE_COLUMNS = {name: RESULT_COLUMNS.index(name) for name in ('birth_date', 'date_filed', 'arrest_citation_date')}
+
+# Serializes every row matched by an XPath in one WebDriver round-trip
+ROW_SNAPSHOT_SCRIPT = """
+var result = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var rows = [];
+for (var i = 0; i < result.snapshotLength; i++) {
+    var cells = result.snapshotItem(i).getElementsByTagName('td');
+    var row = {cells: [], alert: false};
+    for (var j = 0; j < cells.length; j++) {
+        row.cells.push(cells[j].innerText || '');
+    }
+    if (cells.length > 9) {
+        row.alert = cells[9].getElementsByClassName('action-alert').length > 0;
+    }
+    rows.push(row);
+}
+return JSON.stringify(rows);
+"""
+
+# Statute citation that opens each charge, e.g. "14:67", "14:98.1", "RS 40:966(A)(1)", "14:67-THEFT"
+CITATION = r'\d+(?:\.\d+)?:\d+(?:\.\d+)*(?:\([A-Za-z0-9]+\))*'
+# Revised Statutes prefixes ("RS", "LRS", "R.S.", "LA. R.S."), dropped so codes are the bare citation
+RS_PREFIX = r'(?:LA\.?\s*)?L?R\.?\s?S\.?'
+CODE_PREFIX = rf'(?:{RS_PREFIX}|[A-Z]{{1,4}}\.?)'
+STATUTE = rf'(?:{CODE_PREFIX}\s*)?{CITATION}'
+# build_record joins the charge lines with ', '; only split where a new citation starts
+CHARGE_SPLIT_RE = re.compile(rf',\s*(?={STATUTE}(?:[\s-]|$))')
+CHARGE_RE = re.compile(rf'^({STATUTE})(?:\s*-\s*|\s+|$)(.*)$', re.DOTALL)
+RS_PREFIX_RE = re.compile(rf'^{RS_PREFIX}\s*(?=\d)')
+
+BLOCK_TAGS = {'br', 'div', 'p', 'li', 'tr', 'table'}
+WHITESPACE_RE = re.compile(r'[ \t\r\f\v\xa0]+')
+
+
+def parse_date(date_str, column=None):
+    """Parse date string with multiple format support (memoized, see dates.DateParser)"""
+    return date_parser.parse(date_str, column)
+
+
+def build_record(cells, alert_available=False):
+    """Map the cell texts of one result row to a record dict"""
+    cells = [cell.strip() for cell in cells]
+    return {
+        'defendant_name': cells[0] if len(cells) > 0 else '',
+        'birth_date': parse_date(cells[1], 'birth_date') if len(cells) > 1 else None,
+        'sex': cells[2][:1] if len(cells) > 2 and cells[2] else 'U',
+        'race': cells[3][:1] if len(cells) > 3 and cells[3] else 'U',
+        'case_number': cells[4] if len(cells) > 4 else '',
+        'date_filed': parse_date(cells[5], 'date_filed') if len(cells) > 5 else None,
+        'charges': cells[6].replace('\n', ', ').strip() if len(cells) > 6 else '',
+        'arrest_citation_date': parse_date(cells[7], 'arrest_citation_date') if len(cells) > 7 else None,
+        'parish': cells[8] if len(cells) > 8 else '',
+        'alert_available': len(cells) > 9 and bool(alert_available),
+    }
+
+
+def normalize_charge_code(code):
+    """'rs  14:67' -> '14:67': upper case, single spaces, no Revised Statutes prefix"""
+    return RS_PREFIX_RE.sub('', ' '.join(code.upper().split()))
+
+
+def parse_charges(text):
+    """(code, description) for each charge in a record's charges text
+
+    Charges are separated by line breaks (older rows) or by ', ' before a statute
+    citation, so commas inside a description are kept. Charges without a citation
+    get an empty code.
+    """
+    charges = []
+    for line in (text or '').split('\n'):
+        for segment in CHARGE_SPLIT_RE.split(line):
+            segment = segment.strip(' ,')
+            if not segment:
+                continue
+            match = CHARGE_RE.match(segment)
+            code, description = match.groups() if match else ('', segment)
+            charges.append((normalize_charge_code(code), description.strip()))
+    return charges
+
+
+def _is_grid_table(attrs, containers):
+    """Whether a table is the results grid, as matched by the scraper's row selectors"""
+    classes = (attrs.get('class') or '').lower()
+    if 'grid' in classes or 'result' in classes:
+        return True
+    parent = containers[-1] if containers else None
+    if parent and parent[0] == 'div' and 'gridview' in (parent[1].get('id') or ''):
+        return True
+    return any(tag == 'div' and 'results' in (container.get('class') or '').split()
+               for tag, container in containers)
+
+
+class ResultsTableParser(HTMLParser):
+    """Collect the cell texts of the results grid's rows in an HTML document
+
+    The grid is the table the scraper's row selectors look for (inside a 'gridview' div,
+    or with a grid/result class). Rows of other tables, such as layout or pager tables,
+    are only returned when the page has no such table.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.grid_rows = []
+        self.found_grid = False
+        # Open div and table elements outside cells, innermost last, as (tag, attrs)
+        self._containers = []
+        self._in_grid = []
+        self._row = None
+        self._cell = None
+        self._cell_depth = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip_depth += 1
+            return
+
+        if self._cell is not None:
+            # Nested markup inside a cell only contributes text and the alert marker
+            if tag == 'td':
+                self._cell_depth += 1
+            if tag in BLOCK_TAGS:
+                self._cell['text'].append('\n')
+            classes = (dict(attrs).get('class') or '').split()
+            if 'action-alert' in classes and len(self._row['cells']) == 9:
+                self._row['alert'] = True
+            return
+
+        if tag == 'div':
+            self._containers.append((tag, dict(attrs)))
+        elif tag == 'table':
+            is_grid = _is_grid_table(dict(attrs), self._containers)
+            self.found_grid = self.found_grid or is_grid
+            self._in_grid.append(is_grid)
+            self._containers.append((tag, dict(attrs)))
+        elif tag == 'tr':
+            self._row = {'cells': [], 'alert': False}
+        elif tag == 'td' and self._row is not None:
+            self._cell = {'text': []}
+            self._cell_depth = 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+
+        if self._cell is not None:
+            if tag == 'td':
+                self._cell_depth -= 1
+                if self._cell_depth == 0:
+                    self._row['cells'].append(self._cell_text())
+                    self._cell = None
+                    return
+            if tag in BLOCK_TAGS:
+                self._cell['text'].append('\n')
+            return
+
+        if tag == 'tr' and self._row is not None:
+            if self._row['cells']:
+                row = (self._row['cells'], self._row['alert'])
+                self.rows.append(row)
+                if self._in_grid and self._in_grid[-1]:
+                    self.grid_rows.append(row)
+            self._row = None
+        elif tag in ('div', 'table'):
+            # Close the innermost open element of this kind, tolerating unbalanced markup
+            for index in range(len(self._containers) - 1, -1, -1):
+                if self._containers[index][0] == tag:
+                    del self._containers[index]
+                    if tag == 'table' and self._in_grid:
+                        self._in_grid.pop()
+                    break
+
+    def handle_data(self, data):
+        if self._cell is not None and not self._skip_depth:
+            self._cell['text'].append(data)
+
+    def _cell_text(self):
+        """Approximate innerText: collapse whitespace and keep line breaks"""
+        lines = ''.join(self._cell['text']).split('\n')
+        lines = [WHITESPACE_RE.sub(' ', line).strip() for line in lines]
+        return '\n'.join(line for line in lines if line)
+
+
+def parse_results_html(html):
+    """Parse a results page into (cells, alert_available) tuples, one per results grid row"""
+    parser = ResultsTableParser()
+    parser.feed(html)
+    parser.close()
+    return parser.grid_rows if parser.found_grid else parser.rows
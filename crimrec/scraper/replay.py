@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import logging
+import threading
+from html import escape
+from pathlib import Path
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+SESSION_COOKIE = 'replay_session'
+PARISHES = ['Orleans', 'Jefferson', 'Caddo', 'East Baton Rouge', 'Lafayette']
+
+
+class PageRecorder:
+    """Saves the HTML of pages visited during a real run, for offline replay
+
+    Each page is written to <name>.html and listed in manifest.json with its URL.
+    Captures contain real record data; keep them out of version control.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            self.manifest = json.loads((self.directory / MANIFEST).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def capture(self, name, html, url=''):
+        path = self.directory / f"{name}.html"
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.write_text(html, encoding='utf-8')
+        os.replace(tmp_path, path)
+        self.manifest[name] = {'file': path.name, 'url': url, 'captured_at': timezone.now().isoformat()}
+        (self.directory / MANIFEST).write_text(json.dumps(self.manifest, indent=2, sort_keys=True), encoding='utf-8')
+        logger.debug(f"Captured {name} from {url}")
+
+
+def load_captures(directory):
+    """{name: html} for every page listed in a capture directory's manifest"""
+    directory = Path(directory)
+    manifest = json.loads((directory / MANIFEST).read_text(encoding='utf-8'))
+    return {name: (directory / entry['file']).read_text(encoding='utf-8') for name, entry in manifest.items()}
+
+
+class ReplaySite:
+    """The pages a replay server returns: a stand-in for eClerks with the scraper's selectors
+
+    Login, home and search pages are synthetic (captured ones rely on the live site's
+    scripts) and reproduce the elements EClerksScraper looks for. Result pages are the
+    captured results-NNN pages, cycled up to pages, or generated rows_per_page at a time.
+    """
+
+    def __init__(self, captures_dir=None, pages=10, rows_per_page=50, latency=0.0):
+        self.captures = load_captures(captures_dir) if captures_dir else {}
+        self.captured_results = [html for name, html in sorted(self.captures.items()) if name.startswith('results')]
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.latency = latency
+
+    def login_page(self):
+        return """<html><head><title>eClerks Replay</title></head><body>
+<input type="text" placeholder="email address"><input type="password" placeholder="password">
+<button title="Login" onclick="document.cookie='%s=1; path=/'; location.href='/Home';">Login</button>
+</body></html>""" % SESSION_COOKIE
+
+    def home_page(self):
+        return """<html><head><title>eClerks Replay</title></head><body>
+<div>Hello, Replay User</div>
+<button id="criminal-search-step1" onclick="location.href='/search';">Criminal Search</button>
+</body></html>"""
+
+    def search_page(self):
+        return """<html><head><title>Criminal Search</title></head><body>
+<input type="text" id="datefield-1029-inputEl"><input type="text" id="datefield-1030-inputEl">
+<button id="submitButton" onclick="location.href='/results?page=1&from=' +
+    encodeURIComponent(document.getElementById('datefield-1029-inputEl').value) + '&to=' +
+    encodeURIComponent(document.getElementById('datefield-1030-inputEl').value);">Search</button>
+</body></html>"""
+
+    def results_page(self, page):
+        if page < 1 or page > self.pages:
+            return '<html><body><div id="gridview-1040"><table><tbody></tbody></table></div></body></html>'
+        if self.captured_results:
+            return self.captured_results[(page - 1) % len(self.captured_results)]
+        rows = ''.join(self.synthetic_row(page, index) for index in range(self.rows_per_page))
+        next_class = 'x-btn disabled' if page >= self.pages else 'x-btn'
+        return (
+            f'<html><body><div id="gridview-1040"><table><tbody>{rows}</tbody></table></div>'
+            f'<a class="{next_class}" href="/results?page={page + 1}">Next</a></body></html>'
+        )
+
+    def synthetic_row(self, page, index):
+        """One deterministic result row; case numbers are unique across pages"""
+        number = (page - 1) * self.rows_per_page + index
+        filed = date(2024, 1, 1) + timedelta(days=number % 365)
+        born = date(1960, 1, 1) + timedelta(days=number * 37 % 15000)
+        charges = ''.join(f"<div>14:{67 + offset} CHARGE {offset + 1}</div>" for offset in range(1 + number % 3))
+        alert = '<span class="action-alert"></span>' if number % 7 == 0 else ''
+        cells = [
+            escape(f"DEFENDANT{number}, TEST"), born.strftime('%m/%d/%Y'), ('Male', 'Female')[number % 2],
+            ('White', 'Black', 'Hispanic')[number % 3], f"R{number:08d}", filed.strftime('%m/%d/%Y'),
+            charges, filed.strftime('%m/%d/%Y'), PARISHES[number % len(PARISHES)], alert,
+        ]
+        return '<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>'
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    site = None
+
+    def do_GET(self):
+        if self.site.latency:
+            time.sleep(self.site.latency)
+        url = urlparse(self.path)
+        capture_name = url.path[len('/captures/'):].removesuffix('.html')
+        logged_in = f"{SESSION_COOKIE}=" in self.headers.get('Cookie', '')
+
+        if url.path in ('/', '/Home'):
+            body = self.site.home_page() if logged_in else self.site.login_page()
+        elif url.path.startswith('/captures/') and capture_name in self.site.captures:
+            # Captured pages as recorded, for checking selectors and parsers offline
+            body = self.site.captures[capture_name]
+        elif not logged_in:
+            self.send_error(403, "Not logged in")
+            return
+        elif url.path == '/search':
+            body = self.site.search_page()
+        elif url.path == '/results':
+            try:
+                page = int(parse_qs(url.query).get('page', ['1'])[0])
+            except ValueError:
+                self.send_error(400, "Bad page number")
+                return
+            body = self.site.results_page(page)
+        else:
+            self.send_error(404)
+            return
+
+        payload = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Replay {self.address_string()} {format % args}")
+
+
+class ReplayServer:
+    """Local HTTP server replaying eClerks pages; use as a context manager in benchmarks"""
+
+    def __init__(self, site, host='127.0.0.1', port=0):
+        handler = type('BoundReplayRequestHandler', (ReplayRequestHandler,), {'site': site})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def results_url_template(self):
+        """URL template for HttpFetchEngine"""
+        return f"{self.url}/results?page={{page}}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
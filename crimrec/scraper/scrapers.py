@@ -1,26 +1,80 @@
 import os
+import json
 import time
-import csv
 import logging
 from datetime import datetime
-import undetected_chromedriver as uc
+from django.utils import timezone
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from django.utils.timezone import now
-from .models import CriminalRecord
+from django.conf import settings
+from .http_engine import HttpFetchEngine, HttpFetchError
+from .metrics import RunMetrics
+from .replay import PageRecorder
+from .parsing import ROW_SNAPSHOT_SCRIPT, build_record, parse_date, parse_results_html
+from .selector_cache import SelectorCache
+from .sessions import clear_cookies, cookie_path, launch_driver, load_cookies, save_cookies
+from .waits import WaitPolicy, document_ready, element_gone, login_state, page_changed, page_idle, values_equal
+from .models import ScrapeCheckpoint
+from .writers import RecordWriter, ThreadedWriter
 
 logger = logging.getLogger(__name__)
 
 class EClerksScraper:
-    def __init__(self, headless=False):
+    # How result rows are read: 'script' serializes the grid in one execute_script call,
+    # 'source' parses page_source locally, 'element' queries each cell over WebDriver
+    EXTRACT_MODES = ('script', 'source', 'element')
+    # 'browser' pages through the grid in Chrome; 'http' logs in with Chrome, then fetches
+    # result pages directly with the session cookies
+    FETCH_ENGINES = ('browser', 'http')
+    # Page stats held before they are saved to the ScrapeRun, so memory stays flat on long runs
+    PAGE_STATS_BATCH = 50
+
+    def __init__(self, headless=False, batch_size=100, extract_mode='script', wait_timeouts=None, poll_frequency=0.25,
+                 writer=None, use_checkpoints=True, stop_on_unchanged_page=False, session_pool=None,
+                 reuse_session=True, selector_cache=None, fetch_engine='browser', http_results_url=None,
+                 http_concurrency=4, base_url=None, capture_dir=None, sinks=None, scrape_run=None):
+        if extract_mode not in self.EXTRACT_MODES:
+            raise ValueError(f"extract_mode must be one of {', '.join(self.EXTRACT_MODES)}")
+        if fetch_engine not in self.FETCH_ENGINES:
+            raise ValueError(f"fetch_engine must be one of {', '.join(self.FETCH_ENGINES)}")
+        self.fetch_engine = fetch_engine
+        self.http_results_url = http_results_url or getattr(settings, 'SCRAPER_HTTP_RESULTS_URL', '')
+        self.http_concurrency = http_concurrency
+        if fetch_engine == 'http' and not self.http_results_url:
+            raise ValueError("The http fetch engine needs a results URL (SCRAPER_HTTP_RESULTS_URL)")
         self.driver = None
+        self.session = None
+        self.session_pool = session_pool
+        self.reuse_session = reuse_session
         self.headless = headless
+        self.extract_mode = extract_mode
         self.login_email = os.getenv('ECLERKS_EMAIL')
         self.login_password = os.getenv('ECLERKS_PASSWORD')
-        self.base_url = "https://eclerksla.com/Home"
-        self.records = []
+        self.base_url = base_url or getattr(settings, 'SCRAPER_BASE_URL', "https://eclerksla.com/Home")
+        # Saves the HTML of every page visited, for offline replay
+        self.recorder = PageRecorder(capture_dir) if capture_dir else None
+        # Scraped records are streamed to the writer and these sinks page by page, never kept
+        self.sinks = list(sinks or [])
+        self.records_scraped = 0
+        self.pages_scraped = 0
+        self.exhausted = False
+        self.use_checkpoints = use_checkpoints
+        self.stop_on_unchanged_page = stop_on_unchanged_page
+        # Set once a page held new or changed records, arming the unchanged-page stop
+        self.seen_new_records = False
+        # Stage timers and counters for the run summary and ScrapeRun history
+        self.metrics = RunMetrics()
+        # One dict of ScrapePage fields per result page stored and not yet saved to scrape_run
+        self.scrape_run = scrape_run
+        self.page_stats = []
+        if writer is None:
+            writer = RecordWriter(batch_size=batch_size, metrics=self.metrics)
+            if getattr(settings, 'SCRAPER_WRITER_THREAD', False):
+                writer = ThreadedWriter(writer)
+        self.writer = writer
+        self.waits = WaitPolicy(timeouts=wait_timeouts, poll_frequency=poll_frequency)
+        self.selector_cache = selector_cache if selector_cache is not None else SelectorCache()
         
         # Validate credentials
         if not self.login_email or not self.login_password:
@@ -29,95 +83,89 @@ class EClerksScraper:
         self.setup_driver()
 
     def setup_driver(self):
-        """Setup Chrome driver with improved stability options"""
+        """Start a browser, or check out a warm one when a session pool is configured"""
         try:
-            options = uc.ChromeOptions()
-            
-            # Basic options
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--start-maximized")
-            
-            # Anti-detection options
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--disable-features=VizDisplayCompositor")
-            options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            
-            # Stability options
-            options.add_argument("--disable-extensions")
-            options.add_argument("--disable-plugins")
-            options.add_argument("--disable-images")
-            options.add_argument("--disable-web-security")
-            options.add_argument("--allow-running-insecure-content")
-            
-            # Network and timeout options
-            options.add_argument("--disable-background-timer-throttling")
-            options.add_argument("--disable-renderer-backgrounding")
-            options.add_argument("--disable-backgrounding-occluded-windows")
-            options.add_argument("--disable-background-networking")
-            options.add_argument("--disable-ipc-flooding-protection")
-            
-            # Memory and performance
-            options.add_argument("--memory-pressure-off")
-            options.add_argument("--max_old_space_size=4096")
-            
-            if self.headless:
-                options.add_argument("--headless=new")
-            
-            # Initialize driver with retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    self.driver = uc.Chrome(options=options, version_main=None)
-                    self.driver.implicitly_wait(10)
-                    self.driver.set_page_load_timeout(60)  # Increased timeout
-                    self.driver.set_script_timeout(30)  # Add script timeout
-                    logger.info(f"ChromeDriver initialized successfully (attempt {attempt + 1})")
-                    break
-                except Exception as e:
-                    logger.warning(f"ChromeDriver initialization attempt {attempt + 1} failed: {str(e)}")
-                    if attempt == max_retries - 1:
-                        raise
-                    time.sleep(2)
+            with self.metrics.timer('setup_driver'):
+                if self.session_pool is not None:
+                    self.session = self.session_pool.checkout()
+                    self.driver = self.session.driver
+                else:
+                    self.driver = launch_driver(self.headless)
+            self.waits.driver = self.driver
                     
         except Exception as e:
             logger.error(f"Failed to initialize WebDriver: {str(e)}")
             raise
 
+    def restore_session(self):
+        """Reuse an existing login (pooled browser or saved cookies) instead of logging in again"""
+        if not self.reuse_session:
+            return False
+        try:
+            self.driver.get(self.base_url)
+            state = self.waits.settle('login_state', login_state)
+            if state == 'logged_in':
+                logger.info("Browser session is still logged in")
+                return True
+            
+            if load_cookies(self.driver, cookie_path(self.login_email)):
+                self.driver.refresh()
+                if self.waits.settle('login_state_with_cookies', login_state) == 'logged_in':
+                    logger.info("Logged in with saved session cookies")
+                    return True
+                logger.info("Saved session cookies have expired")
+                clear_cookies(self.login_email)
+        except Exception as e:
+            logger.warning(f"Could not restore previous session: {e}")
+        return False
+
     def login(self):
         """Login to eClerks with improved error handling"""
+        if self.restore_session():
+            if self.session is not None:
+                self.session.logged_in = True
+            return True
+            
         try:
             logger.info("Attempting to login...")
             self.driver.get(self.base_url)
-            time.sleep(3)
             
             # Wait for email field
-            email_field = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, '//*[@placeholder="email address"]'))
+            email_field = self.waits.until(
+                'login_email_field',
+                EC.element_to_be_clickable((By.XPATH, '//*[@placeholder="email address"]')),
+                kind='page'
             )
+            self._capture('login')
             email_field.clear()
             email_field.send_keys(self.login_email)
             
             # Find and fill password field
-            password_field = WebDriverWait(self.driver, 10).until(
+            password_field = self.waits.until(
+                'login_password_field',
                 EC.element_to_be_clickable((By.XPATH, '//*[@placeholder="password"]'))
             )
             password_field.clear()
             password_field.send_keys(self.login_password)
             
             # Click login button
-            login_button = WebDriverWait(self.driver, 10).until(
+            login_button = self.waits.until(
+                'login_button',
                 EC.element_to_be_clickable((By.XPATH, '//*[@title="Login"]'))
             )
             login_button.click()
             
             # Wait for successful login
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Hello')]"))
+            self.waits.until(
+                'login_greeting',
+                EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Hello')]")),
+                kind='page'
             )
             logger.info("Login successful")
+            self._capture('home')
+            if self.session is not None:
+                self.session.logged_in = True
+            save_cookies(self.driver, cookie_path(self.login_email))
             return True
             
         except TimeoutException:
@@ -132,7 +180,7 @@ class EClerksScraper:
         try:
             logger.info("Navigating to search page...")
             self.driver.get(self.base_url)
-            time.sleep(5)  # Give page more time to load
+            self.waits.settle('home_page_ready', page_idle)
             
             # Try multiple strategies to find the criminal search button
             search_button_selectors = [
@@ -143,16 +191,11 @@ class EClerksScraper:
                 (By.XPATH, "//button[contains(@class, 'criminal') or contains(@onclick, 'criminal')]"),
             ]
             
-            search_button = None
-            for selector_type, selector_value in search_button_selectors:
-                try:
-                    search_button = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((selector_type, selector_value))
-                    )
-                    logger.info(f"Found criminal search button using: {selector_value}")
-                    break
-                except TimeoutException:
-                    continue
+            selector, search_button = self._first_match(
+                'criminal_search_button', search_button_selectors, EC.element_to_be_clickable
+            )
+            if search_button:
+                logger.info(f"Found criminal search button using: {selector[1]}")
             
             if not search_button:
                 logger.error("Could not find criminal search button")
@@ -160,21 +203,24 @@ class EClerksScraper:
                 
             # Click the search button
             search_button.click()
-            time.sleep(5)
+            self.waits.settle('criminal_search_ready', page_idle)
             
             # Handle EULA if present
             try:
-                scrollable_div = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "statewide-portal-eula-body"))
+                eula_locator = (By.CLASS_NAME, "statewide-portal-eula-body")
+                scrollable_div = self.waits.until(
+                    'eula_visible',
+                    EC.presence_of_element_located(eula_locator),
+                    kind='eula'
                 )
                 self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scrollable_div)
-                time.sleep(2)
                 
-                accept_button = WebDriverWait(self.driver, 10).until(
+                accept_button = self.waits.until(
+                    'eula_accept_button',
                     EC.element_to_be_clickable((By.ID, "fetch-criminal-search"))
                 )
                 accept_button.click()
-                time.sleep(5)
+                self.waits.settle('eula_closed', element_gone(eula_locator), kind='eula')
                 logger.info("Accepted EULA")
             except TimeoutException:
                 logger.info("EULA not found, proceeding...")
@@ -183,18 +229,15 @@ class EClerksScraper:
             if len(self.driver.window_handles) > 1:
                 logger.info(f"Found {len(self.driver.window_handles)} windows, switching to latest")
                 self.driver.switch_to.window(self.driver.window_handles[-1])
-                time.sleep(3)
                 
             # Wait for the search page to fully load
-            try:
-                WebDriverWait(self.driver, 20).until(
-                    lambda driver: driver.execute_script("return document.readyState") == "complete"
-                )
+            if self.waits.settle('search_page_ready', document_ready):
                 logger.info("Page loading completed")
-            except TimeoutException:
+            else:
                 logger.warning("Page may not have fully loaded, but continuing...")
                 
             logger.info("Successfully navigated to search page")
+            self._capture('search')
             return True
             
         except Exception as e:
@@ -207,7 +250,7 @@ class EClerksScraper:
             logger.info(f"Setting date range: {from_date} to {to_date}")
             
             # Wait for page to fully load
-            time.sleep(3)
+            self.waits.settle('date_form_ready', page_idle)
             
             # Try multiple strategies to find date fields
             date_field_strategies = [
@@ -253,38 +296,34 @@ class EClerksScraper:
             start_date = None
             end_date = None
             
-            # Try each strategy
-            for strategy_num, strategy in enumerate(date_field_strategies, 1):
-                logger.info(f"Trying date field strategy {strategy_num}...")
+            # Try each strategy, starting with the one that worked last time
+            strategy_keys = [f"strategy-{num}" for num in range(1, len(date_field_strategies) + 1)]
+            for strategy_key in self.selector_cache.ordered('date_field_strategy', strategy_keys):
+                strategy = date_field_strategies[strategy_keys.index(strategy_key)]
+                logger.info(f"Trying date field {strategy_key}...")
                 
                 # Try to find start date field
-                for selector_type, selector_value in strategy['start_selectors']:
-                    try:
-                        start_date = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((selector_type, selector_value))
-                        )
-                        logger.info(f"Found start date field using: {selector_value}")
-                        break
-                    except TimeoutException:
-                        continue
+                selector, start_date = self._first_match(
+                    'start_date_field', strategy['start_selectors'], EC.presence_of_element_located
+                )
+                if start_date:
+                    logger.info(f"Found start date field using: {selector[1]}")
                 
                 # Try to find end date field
-                for selector_type, selector_value in strategy['end_selectors']:
-                    try:
-                        end_date = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((selector_type, selector_value))
-                        )
-                        logger.info(f"Found end date field using: {selector_value}")
-                        break
-                    except TimeoutException:
-                        continue
+                selector, end_date = self._first_match(
+                    'end_date_field', strategy['end_selectors'], EC.presence_of_element_located
+                )
+                if end_date:
+                    logger.info(f"Found end date field using: {selector[1]}")
                 
                 # If we found both fields, break out of strategy loop
                 if start_date and end_date:
-                    logger.info(f"Successfully found both date fields using strategy {strategy_num}")
+                    self.selector_cache.record_hit('date_field_strategy', strategy_key)
+                    logger.info(f"Successfully found both date fields using {strategy_key}")
                     break
                 else:
                     # Reset for next strategy
+                    self.selector_cache.record_miss('date_field_strategy', strategy_key)
                     start_date = None
                     end_date = None
             
@@ -332,8 +371,12 @@ class EClerksScraper:
                     logger.error(f"Selenium method also failed: {selenium_error}")
                     return False
             
-            # Give the page time to process the date changes
-            time.sleep(2)
+            # Wait until the page has taken the new values
+            self.waits.settle(
+                'date_values_applied',
+                values_equal([start_date, end_date], [from_date_fmt, to_date_fmt]),
+                kind='element'
+            )
             
             # Verify the dates were set
             try:
@@ -423,16 +466,11 @@ class EClerksScraper:
                 (By.XPATH, "//*[contains(@onclick, 'search') or contains(@onclick, 'submit')]"),
             ]
             
-            search_button = None
-            for selector_type, selector_value in search_button_selectors:
-                try:
-                    search_button = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((selector_type, selector_value))
-                    )
-                    logger.info(f"Found search button using: {selector_value}")
-                    break
-                except TimeoutException:
-                    continue
+            selector, search_button = self._first_match(
+                'search_submit_button', search_button_selectors, EC.element_to_be_clickable
+            )
+            if search_button:
+                logger.info(f"Found search button using: {selector[1]}")
             
             if not search_button:
                 logger.error("Could not find search button")
@@ -443,24 +481,19 @@ class EClerksScraper:
             logger.info("Search button clicked")
             
             # Wait for results with multiple strategies
-            results_found = False
             result_selectors = [
-                "//div[contains(@id, 'gridview')]/table",
-                "//table[contains(@class, 'grid') or contains(@class, 'result')]",
-                "//div[contains(@class, 'results')]//table",
-                "//table//tbody/tr[td]",  # Any table with data rows
+                (By.XPATH, "//div[contains(@id, 'gridview')]/table"),
+                (By.XPATH, "//table[contains(@class, 'grid') or contains(@class, 'result')]"),
+                (By.XPATH, "//div[contains(@class, 'results')]//table"),
+                (By.XPATH, "//table//tbody/tr[td]"),  # Any table with data rows
             ]
             
-            for selector in result_selectors:
-                try:
-                    WebDriverWait(self.driver, 45).until(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
-                    logger.info(f"Found results table using: {selector}")
-                    results_found = True
-                    break
-                except TimeoutException:
-                    continue
+            selector, results_table = self._first_match(
+                'search_results', result_selectors, EC.presence_of_element_located, kind='results'
+            )
+            results_found = results_table is not None
+            if results_found:
+                logger.info(f"Found results table using: {selector[1]}")
             
             if not results_found:
                 logger.error("No results table found after search")
@@ -475,7 +508,7 @@ class EClerksScraper:
             
             # Scroll to load all content
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
+            self.waits.settle('results_loaded', page_idle)
             
             logger.info("Search executed successfully")
             return True
@@ -487,128 +520,375 @@ class EClerksScraper:
             logger.error(f"Search execution failed: {str(e)}")
             return False
 
-    def scrape_records(self, max_pages=1):
-        """Scrape records with improved error handling"""
+    def scrape_records(self, max_pages=1, start_page=1, checkpoint=None):
+        """Scrape records with improved error handling
+        
+        With start_page > 1 the already-scraped pages are skipped without being parsed;
+        max_pages counts the pages scraped from there. Progress is recorded on checkpoint
+        after each page has been persisted.
+        """
         try:
             logger.info(f"Starting to scrape records (max {max_pages} pages)")
             current_page = 1
+            if start_page > 1:
+                current_page = self._skip_to_page(start_page, checkpoint)
+            last_page = current_page + max_pages - 1
             
-            while current_page <= max_pages:
+            while current_page <= last_page:
                 logger.info(f"Scraping page {current_page}")
+                page_start = self._page_start()
                 
                 # Try multiple strategies to find table rows
-                rows = None
-                row_selectors = [
-                    "//div[contains(@id, 'gridview')]/table/tbody/tr",
-                    "//table[contains(@class, 'grid')]/tbody/tr",
-                    "//table[contains(@class, 'result')]/tbody/tr",
-                    "//div[contains(@class, 'results')]//table/tbody/tr",
-                    "//table//tbody/tr[td]",  # Any table with data rows
-                    "//table/tr[td]",  # Direct table rows
-                ]
-                
-                for selector in row_selectors:
-                    try:
-                        rows = WebDriverWait(self.driver, 15).until(
-                            EC.presence_of_all_elements_located((By.XPATH, selector))
-                        )
-                        logger.info(f"Found {len(rows)} rows using selector: {selector}")
-                        break
-                    except TimeoutException:
-                        continue
+                selector, rows = self._find_rows()
                 
                 if not rows:
                     logger.error("Could not find any table rows")
                     self._debug_results_structure()
                     return False
+                self._capture(f"results-{current_page:03d}")
                 
-                page_records = 0
-                for row_index, row in enumerate(rows):
-                    try:
-                        cols = row.find_elements(By.TAG_NAME, "td")
-                        logger.debug(f"Row {row_index + 1}: Found {len(cols)} columns")
-                        
-                        if len(cols) < 5:  # Minimum required columns (name, case_number, date, charges, parish)
-                            logger.debug(f"Row {row_index + 1}: Skipping - insufficient columns")
-                            continue
-                            
-                        # Debug: Print first few column values
-                        col_values = []
-                        for i, col in enumerate(cols[:10]):  # First 10 columns
-                            try:
-                                value = col.text.strip()[:50]  # First 50 chars
-                                col_values.append(f"col{i}: '{value}'")
-                            except:
-                                col_values.append(f"col{i}: <error>")
-                        logger.debug(f"Row {row_index + 1} values: {', '.join(col_values)}")
-                        
-                        # Extract record data with flexible mapping
-                        record = {
-                            'defendant_name': cols[0].text.strip() if len(cols) > 0 else '',
-                            'birth_date': self.parse_date(cols[1].text.strip()) if len(cols) > 1 else None,
-                            'sex': cols[2].text.strip()[:1] if len(cols) > 2 and cols[2].text.strip() else 'U',
-                            'race': cols[3].text.strip()[:1] if len(cols) > 3 and cols[3].text.strip() else 'U',
-                            'case_number': cols[4].text.strip() if len(cols) > 4 else '',
-                            'date_filed': self.parse_date(cols[5].text.strip()) if len(cols) > 5 else None,
-                            'charges': cols[6].get_attribute("innerText").replace('\n', ', ').strip() if len(cols) > 6 else '',
-                            'arrest_citation_date': self.parse_date(cols[7].text.strip()) if len(cols) > 7 else None,
-                            'parish': cols[8].text.strip() if len(cols) > 8 else '',
-                            'alert_available': len(cols) > 9 and bool(cols[9].find_elements(By.CLASS_NAME, 'action-alert'))
-                        }
-                        
-                        # Skip if no case number or defendant name
-                        if not record['case_number'] or not record['defendant_name']:
-                            logger.debug(f"Row {row_index + 1}: Skipping - missing case number or name")
-                            continue
-                        
-                        # Set default date if missing
-                        if not record['date_filed']:
-                            record['date_filed'] = datetime.now().date()
-                            
-                        # Save to database
-                        CriminalRecord.objects.update_or_create(
-                            case_number=record['case_number'],
-                            defaults=record
-                        )
-                        
-                        self.records.append(record)
-                        page_records += 1
-                        logger.info(f"Saved record: {record['case_number']} - {record['defendant_name']}")
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing row {row_index + 1}: {str(e)}")
-                        continue
+                with self.metrics.timer('extract'):
+                    extracted = self._extract_rows(selector, rows)
+                page_records, page_unchanged, first_case_number = self._store_rows(extracted)
                 
+                # Persist the page in one transaction
+                page_unchanged += self.writer.flush()['unchanged']
+                self._flush_sinks()
+                self.pages_scraped += 1
+                if checkpoint is not None:
+                    # Queued behind the page's rows, so it is only saved once they are
+                    self.writer.call(checkpoint.record_page, current_page, first_case_number)
+                self._page_done(current_page, page_start)
                 logger.info(f"Scraped {page_records} records from page {current_page}")
                 
+                # Incremental runs stop once a whole page is already stored as-is
+                if self._stop_after_page(page_records, page_unchanged):
+                    logger.info(f"Page {current_page} contains only known, unchanged records, stopping")
+                    break
+                
                 # Try to navigate to next page
-                if current_page < max_pages:
-                    try:
-                        next_btn = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Next')] | //button[contains(., 'Next')]"))
-                        )
-                        
-                        if "disabled" in next_btn.get_attribute("class"):
-                            logger.info("Next button is disabled, no more pages")
-                            break
-                            
-                        next_btn.click()
-                        time.sleep(3)
-                        current_page += 1
-                        
-                    except TimeoutException:
-                        logger.info("No next button found, ending pagination")
-                        break
-                else:
+                if current_page >= last_page:
+                    break
+                if not self._next_page(selector, rows):
+                    self.exhausted = True
                     break
+                current_page += 1
                     
-            logger.info(f"Scraping completed. Total records: {len(self.records)}")
+            if self.exhausted and checkpoint is not None:
+                self.writer.call(checkpoint.mark_completed)
+            logger.info(f"Scraping completed. Total records: {self.records_scraped}")
             return True
             
         except Exception as e:
             logger.error(f"Scraping failed: {str(e)}")
             return False
-    
+        finally:
+            # Keep whatever was parsed before a failure
+            try:
+                self.writer.flush()
+                self._flush_sinks()
+            except Exception as e:
+                logger.error(f"Failed to flush buffered records: {str(e)}")
+
+    def scrape_records_http(self, max_pages=1, start_page=1, checkpoint=None, from_date='', to_date=''):
+        """Fetch result pages over HTTP with the browser's session, several at a time
+        
+        Pages are stored in order, so checkpoints and the unchanged-page stop behave as in
+        scrape_records; start_page is requested directly instead of clicked through.
+        """
+        try:
+            engine = HttpFetchEngine.from_driver(
+                self.driver,
+                self.http_results_url,
+                concurrency=self.http_concurrency,
+                search_params={'from_date': from_date, 'to_date': to_date},
+            )
+            logger.info(f"Fetching up to {max_pages} pages over HTTP ({self.http_concurrency} concurrent)")
+            current_page = start_page - 1
+            # Pages arrive a window at a time, so a page's time includes waiting on its fetch
+            page_start = self._page_start()
+            for current_page, rows in engine.iter_pages(start_page, start_page + max_pages - 1):
+                if not rows:
+                    self.exhausted = True
+                    break
+                
+                page_records, page_unchanged, first_case_number = self._store_rows(rows)
+                page_unchanged += self.writer.flush()['unchanged']
+                self._flush_sinks()
+                self.pages_scraped += 1
+                if checkpoint is not None:
+                    self.writer.call(checkpoint.record_page, current_page, first_case_number)
+                self._page_done(current_page, page_start)
+                page_start = self._page_start()
+                logger.info(f"Scraped {page_records} records from page {current_page}")
+                
+                if self._stop_after_page(page_records, page_unchanged):
+                    logger.info(f"Page {current_page} contains only known, unchanged records, stopping")
+                    break
+                
+            if self.exhausted and checkpoint is not None:
+                self.writer.call(checkpoint.mark_completed)
+            self.metrics.increment('http_requests', engine.requests_made)
+            logger.info(f"HTTP scraping completed. Total records: {self.records_scraped}, requests: {engine.requests_made}")
+            return True
+            
+        except (HttpFetchError, ValueError) as e:
+            logger.error(f"HTTP scraping failed: {str(e)}")
+            return False
+        finally:
+            try:
+                self.writer.flush()
+                self._flush_sinks()
+            except Exception as e:
+                logger.error(f"Failed to flush buffered records: {str(e)}")
+
+    def _capture(self, name):
+        """Record the current page when running in capture mode"""
+        if self.recorder is None:
+            return
+        try:
+            self.recorder.capture(name, self.driver.page_source, self.driver.current_url)
+        except Exception as e:
+            logger.warning(f"Could not capture page '{name}': {e}")
+
+    def _store_rows(self, extracted):
+        """Build records from (cells, alert) rows and queue them for the writer and sinks
+        
+        Returns (records queued, records the writer found unchanged, first case number).
+        """
+        page_records = 0
+        page_unchanged = 0
+        first_case_number = None
+        self.metrics.increment('rows_parsed', len(extracted))
+        for row_index, (cells, alert_available) in enumerate(extracted):
+            try:
+                logger.debug(f"Row {row_index + 1}: Found {len(cells)} columns")
+                
+                if len(cells) < 5:  # Minimum required columns (name, case_number, date, charges, parish)
+                    logger.debug(f"Row {row_index + 1}: Skipping - insufficient columns")
+                    self.metrics.increment('rows_skipped')
+                    continue
+                
+                # Debug: Print first few column values
+                col_values = [f"col{i}: '{value.strip()[:50]}'" for i, value in enumerate(cells[:10])]
+                logger.debug(f"Row {row_index + 1} values: {', '.join(col_values)}")
+                
+                # Extract record data with flexible mapping
+                record = build_record(cells, alert_available)
+                
+                # Skip if no case number or defendant name
+                if not record['case_number'] or not record['defendant_name']:
+                    logger.debug(f"Row {row_index + 1}: Skipping - missing case number or name")
+                    self.metrics.increment('rows_skipped')
+                    continue
+                
+                # Set default date if missing
+                if not record['date_filed']:
+                    record['date_filed'] = datetime.now().date()
+                
+                # Queue for the bulk writer
+                try:
+                    batch_stats = self.writer.add(record)
+                except Exception as e:
+                    # Not a row error: the row stays buffered and the next write retries it
+                    logger.warning(f"Writing a batch failed at row {row_index + 1}, retrying with the next write: {e}")
+                    self.metrics.increment('write_retries')
+                    batch_stats = None
+                if batch_stats:
+                    page_unchanged += batch_stats['unchanged']
+                
+                for sink in self.sinks:
+                    sink.add(record)
+                self.records_scraped += 1
+                page_records += 1
+                first_case_number = first_case_number or record['case_number']
+                logger.debug(f"Queued record: {record['case_number']} - {record['defendant_name']}")
+            
+            except Exception as e:
+                logger.error(f"Error processing row {row_index + 1}: {str(e)}")
+                self.metrics.increment('row_errors')
+                continue
+        self.metrics.increment('records_queued', page_records)
+        return page_records, page_unchanged, first_case_number
+
+    def _stop_after_page(self, page_records, page_unchanged):
+        """Whether an incremental run has reached records it already stored
+        
+        The incremental window starts on the overlap day, so known, unchanged pages also
+        come first when results are sorted oldest first. Only a page of known records that
+        follows a page with new or changed ones ends the run.
+        """
+        if not self.stop_on_unchanged_page or not page_records:
+            return False
+        if page_unchanged < page_records:
+            self.seen_new_records = True
+            return False
+        return self.seen_new_records
+
+    def _page_start(self):
+        """Snapshot taken before a page is processed, for _page_done"""
+        return time.monotonic(), timezone.now(), dict(self.metrics.counters), dict(self.writer.stats)
+
+    def _page_done(self, page_number, page_start):
+        """Time a stored page and record its row counts for the ScrapeRun history"""
+        started, started_at, counters_before, stats_before = page_start
+        seconds = time.monotonic() - started
+        self.metrics.observe('page', seconds)
+        counters = self.metrics.counters
+        stats = self.writer.stats
+        self.page_stats.append({
+            'page_number': page_number,
+            'started_at': started_at,
+            'seconds': seconds,
+            'rows_parsed': counters.get('rows_parsed', 0) - counters_before.get('rows_parsed', 0),
+            'records': counters.get('records_queued', 0) - counters_before.get('records_queued', 0),
+            'skipped': counters.get('rows_skipped', 0) - counters_before.get('rows_skipped', 0),
+            'errors': counters.get('row_errors', 0) - counters_before.get('row_errors', 0),
+            'inserted': stats['inserted'] - stats_before['inserted'],
+            'updated': stats['updated'] - stats_before['updated'],
+            'unchanged': stats['unchanged'] - stats_before['unchanged'],
+        })
+        if len(self.page_stats) >= self.PAGE_STATS_BATCH:
+            self.save_page_stats()
+
+    def save_page_stats(self):
+        """Queue the pending page stats as ScrapePage rows of scrape_run; kept for the caller without one"""
+        if self.scrape_run is not None and self.page_stats:
+            self.writer.call(self.scrape_run.add_pages, self.page_stats)
+            self.page_stats = []
+
+    def _find_rows(self):
+        """Return (selector, rows) for the first row selector that matches, or (None, None)"""
+        row_selectors = [
+            "//div[contains(@id, 'gridview')]/table/tbody/tr",
+            "//table[contains(@class, 'grid')]/tbody/tr",
+            "//table[contains(@class, 'result')]/tbody/tr",
+            "//div[contains(@class, 'results')]//table/tbody/tr",
+            "//table//tbody/tr[td]",  # Any table with data rows
+            "//table/tr[td]",  # Direct table rows
+        ]
+        
+        selector, rows = self._first_match(
+            'result_rows',
+            row_selectors,
+            lambda selector: EC.presence_of_all_elements_located((By.XPATH, selector)),
+            kind='rows'
+        )
+        if rows:
+            logger.info(f"Found {len(rows)} rows using selector: {selector}")
+        return selector, rows
+
+    def _first_match(self, step, selectors, condition, kind='element'):
+        """Wait for the first selector that satisfies condition, trying the cached winner first
+        
+        Returns (selector, result), or (None, None) when no selector matched.
+        """
+        for selector in self.selector_cache.ordered(step, selectors):
+            try:
+                result = self.waits.until(step, condition(selector), kind=kind)
+            except TimeoutException:
+                self.selector_cache.record_miss(step, selector)
+                continue
+            self.selector_cache.record_hit(step, selector)
+            return selector, result
+        return None, None
+
+    def _next_page(self, selector, rows):
+        """Click Next and wait for the grid to change; False when there are no more pages"""
+        try:
+            next_btn = self.waits.until(
+                'next_page_button',
+                EC.element_to_be_clickable((By.XPATH, "//a[contains(., 'Next')] | //button[contains(., 'Next')]")),
+                kind='next_page'
+            )
+        except TimeoutException:
+            logger.info("No next button found, ending pagination")
+            return False
+        
+        if "disabled" in (next_btn.get_attribute("class") or ""):
+            logger.info("Next button is disabled, no more pages")
+            return False
+            
+        next_btn.click()
+        # Move on as soon as the grid has been replaced
+        self.waits.settle(
+            'page_change',
+            page_changed(rows[0], (By.XPATH, selector), len(rows)),
+            kind='page_change'
+        )
+        self.waits.settle('page_ready', page_idle)
+        return True
+
+    def _skip_to_page(self, target_page, checkpoint=None):
+        """Advance the grid to target_page without parsing, returning the page actually reached
+        
+        The last completed page is checked against the first case number stored in the
+        checkpoint; if the results have shifted the search is re-run from page 1.
+        """
+        logger.info(f"Resuming: skipping ahead to page {target_page}")
+        try:
+            page = 1
+            selector, rows = self._find_rows()
+            while rows and page < target_page - 1:
+                if not self._next_page(selector, rows):
+                    raise ValueError(f"results end at page {page}")
+                page += 1
+                selector, rows = self._find_rows()
+            if not rows:
+                raise ValueError("result rows not found")
+            
+            expected = checkpoint.page_first_case_numbers.get(str(page)) if checkpoint else None
+            if expected:
+                actual = next((
+                    build_record(cells, alert)['case_number']
+                    for cells, alert in self._extract_rows(selector, rows) if len(cells) >= 5
+                ), None)
+                if actual != expected:
+                    raise ValueError(f"page {page} starts with {actual}, checkpoint expected {expected}")
+            
+            if target_page > 1 and not self._next_page(selector, rows):
+                raise ValueError(f"no pages after page {page}")
+            return target_page
+            
+        except ValueError as e:
+            logger.warning(f"Cannot resume at page {target_page} ({e}), starting from page 1")
+            if checkpoint is not None:
+                checkpoint.reset()
+            if not self.execute_search():
+                raise Exception("Search execution failed while restarting")
+            return 1
+
+    def _extract_rows(self, selector, rows):
+        """Return (cells, alert_available) for each result row using the configured extract mode"""
+        if self.extract_mode == 'script':
+            try:
+                snapshot = json.loads(self.driver.execute_script(ROW_SNAPSHOT_SCRIPT, selector))
+                return [(row['cells'], row['alert']) for row in snapshot]
+            except (WebDriverException, TypeError, ValueError, KeyError) as e:
+                logger.warning(f"Row snapshot script failed, falling back to per-element extraction: {e}")
+        elif self.extract_mode == 'source':
+            try:
+                return parse_results_html(self.driver.page_source)
+            except (WebDriverException, TypeError) as e:
+                logger.warning(f"Page source parsing failed, falling back to per-element extraction: {e}")
+                
+        return self._extract_rows_per_element(rows)
+
+    def _extract_rows_per_element(self, rows):
+        """Read each row cell by cell over WebDriver (slow, but tolerant of odd markup)"""
+        extracted = []
+        for row_index, row in enumerate(rows):
+            try:
+                cols = row.find_elements(By.TAG_NAME, "td")
+                cells = [col.text for col in cols]
+                if len(cols) > 6:
+                    cells[6] = cols[6].get_attribute("innerText") or ''
+                alert_available = len(cols) > 9 and bool(cols[9].find_elements(By.CLASS_NAME, 'action-alert'))
+                extracted.append((cells, alert_available))
+            except Exception as e:
+                logger.error(f"Error reading row {row_index + 1}: {str(e)}")
+        return extracted
+
     def _debug_results_structure(self):
         """Debug helper to understand results table structure"""
         try:
@@ -648,61 +928,77 @@ class EClerksScraper:
         except Exception as e:
             logger.error(f"Debug results structure failed: {e}")
 
-    def export_to_csv(self, filename="scraped_records.csv"):
-        """Export scraped records to CSV"""
-        try:
-            if not self.records:
-                logger.warning("No records to export")
-                return
-                
-            keys = ['defendant_name', 'birth_date', 'sex', 'race', 'case_number', 'date_filed', 'charges', 'arrest_citation_date', 'parish', 'alert_available']
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=keys)
-                writer.writeheader()
-                writer.writerows(self.records)
-            logger.info(f"Exported {len(self.records)} records to {filename}")
-            
-        except Exception as e:
-            logger.error(f"Failed to export CSV: {str(e)}")
+    def _flush_sinks(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close_sinks(self):
+        """Close the writer and every sink, logging rather than raising so each one gets closed"""
+        for sink in [self.writer] + self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error(f"Failed to close {type(sink).__name__}: {str(e)}")
 
     @staticmethod
     def parse_date(date_str):
         """Parse date string with multiple format support"""
-        if not date_str or date_str.strip() == "":
-            return None
-            
-        date_str = date_str.strip()
-        for fmt in ("%m/%d/%Y", "%Y-%m-%d", "%m-%d-%Y", "%d/%m/%Y"):
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
-        return None
+        return parse_date(date_str)
 
-    def run(self, from_date="01/01/2020", to_date="01/07/2025", max_pages=1):
-        """Main scraper execution method"""
+    def run(self, from_date="01/01/2020", to_date="01/07/2025", max_pages=1, resume=False):
+        """Main scraper execution method
+        
+        With resume=True scraping continues after the last page completed by a previous
+        run over the same date range.
+        """
         try:
             logger.info("Starting scraper execution...")
             
-            if not self.login():
+            with self.metrics.timer('login'):
+                logged_in = self.login()
+            if not logged_in:
                 raise Exception("Login failed")
                 
-            if not self.navigate_to_search_page():
+            with self.metrics.timer('navigate_to_search_page'):
+                navigated = self.navigate_to_search_page()
+            if not navigated:
                 raise Exception("Search page navigation failed")
                 
             # Try to set date range, but continue even if it fails
-            date_range_success = self.set_date_range(from_date, to_date)
+            with self.metrics.timer('set_date_range'):
+                date_range_success = self.set_date_range(from_date, to_date)
             if not date_range_success:
                 logger.warning("Date range setting failed, but continuing with search anyway")
                 logger.info("The search may return all available records or use default date range")
                 
-            if not self.execute_search():
+            with self.metrics.timer('execute_search'):
+                searched = self.execute_search()
+            if not searched:
                 raise Exception("Search execution failed")
                 
-            if not self.scrape_records(max_pages):
+            # Checkpoints are only meaningful when the results match the requested range
+            checkpoint = None
+            start_page = 1
+            if self.use_checkpoints and date_range_success:
+                checkpoint = ScrapeCheckpoint.for_search(from_date, to_date)
+                if resume and not checkpoint.completed:
+                    start_page = checkpoint.resume_page
+                    logger.info(f"Resuming from page {start_page} (last completed page {checkpoint.last_completed_page})")
+                else:
+                    # A finished search is scraped again from page 1, and is no longer completed
+                    # until this run reaches the end, so a crash now resumes from this run's pages
+                    checkpoint.reset()
+                
+            if self.fetch_engine == 'http':
+                scraped = self.scrape_records_http(
+                    max_pages, start_page=start_page, checkpoint=checkpoint, from_date=from_date, to_date=to_date
+                )
+            else:
+                scraped = self.scrape_records(max_pages, start_page=start_page, checkpoint=checkpoint)
+            if not scraped:
                 raise Exception("Scraping failed")
                 
-            self.export_to_csv()
+            self.log_wait_summary()
             
             if date_range_success:
                 logger.info("Scraper run completed successfully.")
@@ -715,10 +1011,32 @@ class EClerksScraper:
             logger.error(f"Scraper run error: {str(e)}")
             return False
         finally:
+            self.metrics.set_gauge('wait_seconds', self.waits.total_seconds())
+            self.close_sinks()
             self.quit()
 
+    def log_wait_summary(self):
+        """Log how long each named wait took so timeouts can be tuned"""
+        for name, entry in sorted(self.waits.summary().items(), key=lambda item: -item[1]['total']):
+            logger.info(
+                f"Wait '{name}': {entry['count']}x, total {entry['total']:.2f}s, "
+                f"max {entry['max']:.2f}s, timeouts {entry['timeouts']}"
+            )
+        logger.info(f"Total time waiting: {self.waits.total_seconds():.2f}s")
+
     def quit(self):
-        """Safely quit the browser"""
+        """Safely quit the browser, or hand a pooled one back to its pool"""
+        self.selector_cache.save()
+        
+        if self.session is not None:
+            if self.session.logged_in:
+                save_cookies(self.driver, cookie_path(self.login_email))
+            self.session_pool.checkin(self.session)
+            logger.info("Browser session returned to pool")
+            self.session = None
+            self.driver = None
+            return
+            
         if self.driver:
             try:
                 self.driver.quit()
@@ -0,0 +1,183 @@
+import re
+import logging
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+RECORD_TABLE = 'scraper_criminalrecord'
+FTS_TABLE = 'scraper_criminalrecord_fts'
+SEARCH_COLUMNS = ('defendant_name', 'case_number', 'charges')
+
+# SQLite: external-content FTS5 table over the searchable columns, kept in sync by triggers.
+# Triggers fire for ORM saves, bulk_create and upserts alike. Django rebuilds SQLite tables
+# for some schema changes, which drops triggers, so ensure_search_index() recreates them
+# after every migrate.
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {RECORD_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, defendant_name, case_number, charges)
+            VALUES (new.id, new.defendant_name, new.case_number, new.charges);
+        END""",
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {RECORD_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, defendant_name, case_number, charges)
+            VALUES ('delete', old.id, old.defendant_name, old.case_number, old.charges);
+        END""",
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF defendant_name, case_number, charges
+        ON {RECORD_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, defendant_name, case_number, charges)
+            VALUES ('delete', old.id, old.defendant_name, old.case_number, old.charges);
+            INSERT INTO {FTS_TABLE}(rowid, defendant_name, case_number, charges)
+            VALUES (new.id, new.defendant_name, new.case_number, new.charges);
+        END""",
+}
+
+# PostgreSQL: expression GIN index; queries must repeat the exact expression to use it
+POSTGRES_INDEX = 'scraper_criminalrecord_search_gin'
+POSTGRES_VECTOR = (
+    "to_tsvector('simple', coalesce(defendant_name, '') || ' ' || "
+    "coalesce(case_number, '') || ' ' || coalesce(charges, ''))"
+)
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def sqlite_has_fts5(schema_connection):
+    with schema_connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        options = {row[0] for row in cursor.fetchall()}
+    return 'ENABLE_FTS5' in options
+
+
+def install_search_index(schema_connection):
+    """Create the full-text index for the current backend (no-op where unsupported)"""
+    vendor = schema_connection.vendor
+    with schema_connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            if not sqlite_has_fts5(schema_connection):
+                logger.warning("SQLite was built without FTS5; record search falls back to LIKE scans")
+                return False
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{', '.join(SEARCH_COLUMNS)}, content='{RECORD_TABLE}', content_rowid='id', "
+                f"tokenize='unicode61')"
+            )
+            for sql in SQLITE_TRIGGERS.values():
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            return True
+        if vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON {RECORD_TABLE} USING GIN (({POSTGRES_VECTOR}))"
+            )
+            return True
+    return False
+
+
+def remove_search_index(schema_connection):
+    """Drop whatever install_search_index created"""
+    with schema_connection.cursor() as cursor:
+        if schema_connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif schema_connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+
+
+def ensure_search_index(schema_connection=None):
+    """Recreate missing SQLite sync triggers (rebuilding the index if any were missing)"""
+    schema_connection = schema_connection or connection
+    if schema_connection.vendor != 'sqlite' or not search_backend(schema_connection):
+        return False
+    with schema_connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [RECORD_TABLE]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+    if set(SQLITE_TRIGGERS) <= existing:
+        return False
+    logger.info("Full-text sync triggers were missing, reinstalling and rebuilding the index")
+    return install_search_index(schema_connection)
+
+
+def search_backend(schema_connection=None):
+    """'sqlite-fts5', 'postgresql' or None when only LIKE search is available"""
+    schema_connection = schema_connection or connection
+    if schema_connection.vendor == 'postgresql':
+        return 'postgresql'
+    if schema_connection.vendor == 'sqlite':
+        with schema_connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            if cursor.fetchone():
+                return 'sqlite-fts5'
+    return None
+
+
+def search_terms(query):
+    return TERM_RE.findall(query or '')
+
+
+def fts5_match_expression(query):
+    """Each whitespace-separated word becomes a quoted prefix phrase, all required"""
+    words = [word for word in (query or '').split() if search_terms(word)]
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def tsquery_expression(query):
+    return ' & '.join(f"{term}:*" for term in search_terms(query))
+
+
+def search_records(queryset, query):
+    """Filter queryset to records matching query, best matches first
+
+    Prefix matching applies to every word, so "joh smi" finds "SMITH, JOHN". Results carry a
+    search_rank value (lower is better) used for ordering. Falls back to icontains filters
+    when no full-text index is installed.
+    """
+    backend = search_backend()
+    if backend == 'sqlite-fts5':
+        expression = fts5_match_expression(query)
+        if not expression:
+            return queryset
+        # extra() is used to join the FTS5 table directly; bm25() only works inside that join.
+        # The rank is an annotation (not an extra select) so keyset cursors can filter on it.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {RECORD_TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[expression],
+        ).annotate(
+            search_rank=RawSQL(f'bm25({FTS_TABLE})', (), output_field=FloatField())
+        ).order_by('search_rank', '-id')
+
+    if backend == 'postgresql':
+        expression = tsquery_expression(query)
+        if not expression:
+            return queryset
+        return queryset.extra(
+            where=[f"{POSTGRES_VECTOR} @@ to_tsquery('simple', %s)"],
+            params=[expression],
+        ).annotate(
+            search_rank=RawSQL(
+                f"-ts_rank({POSTGRES_VECTOR}, to_tsquery('simple', %s))", (expression,), output_field=FloatField()
+            )
+        ).order_by('search_rank', '-id')
+
+    return queryset.filter(
+        Q(defendant_name__icontains=query) |
+        Q(case_number__icontains=query) |
+        Q(charges__icontains=query)
+    )
+
+
+def rebuild_search_index(schema_connection=None):
+    """Recreate the index from scratch; returns the backend used or None"""
+    schema_connection = schema_connection or connection
+    if schema_connection.vendor == 'sqlite':
+        remove_search_index(schema_connection)
+    if install_search_index(schema_connection):
+        return search_backend(schema_connection)
+    return None
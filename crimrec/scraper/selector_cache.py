@@ -0,0 +1,96 @@
+import os
+import json
+import logging
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def selector_key(selector):
+    """Stable string for a selector: an XPath string or a (By, value) locator"""
+    if isinstance(selector, str):
+        return selector
+    by, value = selector
+    return f"{by}={value}"
+
+
+class SelectorCache:
+    """Remembers which selector matched for each navigation step and tries it first next time
+
+    Stats are kept per step and selector as hit/miss counts. The file is rewritten as a whole
+    on save, so parallel workers saving at the same moment may drop a few counts.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or getattr(
+            settings, 'SCRAPER_SELECTOR_CACHE', Path(settings.BASE_DIR) / '.scraper_sessions' / 'selector_cache.json'
+        ))
+        self.steps = self._load()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable selector cache {self.path}: {e}")
+            return {}
+
+    def ordered(self, step, selectors):
+        """Selectors for step with the last successful one first, then by hit count"""
+        entry = self.steps.get(step, {})
+        preferred = entry.get('preferred')
+        stats = entry.get('stats', {})
+
+        def rank(indexed):
+            index, selector = indexed
+            key = selector_key(selector)
+            return (key != preferred, -stats.get(key, {}).get('hits', 0), index)
+
+        return [selector for _, selector in sorted(enumerate(selectors), key=rank)]
+
+    def record_hit(self, step, selector):
+        key = selector_key(selector)
+        entry = self._entry(step, key)
+        entry['stats'][key]['hits'] += 1
+        entry['preferred'] = key
+        self.dirty = True
+
+    def record_miss(self, step, selector):
+        key = selector_key(selector)
+        entry = self._entry(step, key)
+        entry['stats'][key]['misses'] += 1
+        if entry.get('preferred') == key:
+            # Stop preferring a selector the site no longer matches
+            entry['preferred'] = None
+        self.dirty = True
+
+    def _entry(self, step, key):
+        entry = self.steps.setdefault(step, {'preferred': None, 'stats': {}})
+        entry['stats'].setdefault(key, {'hits': 0, 'misses': 0})
+        return entry
+
+    def stats(self):
+        """{step: {selector: {'hits': n, 'misses': n}}}"""
+        return {step: entry.get('stats', {}) for step, entry in self.steps.items()}
+
+    def save(self):
+        """Write the cache if anything changed"""
+        if not self.dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = Path(f"{self.path}.tmp")
+            tmp_path.write_text(json.dumps(self.steps, indent=2, sort_keys=True), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logger.warning(f"Could not save selector cache: {e}")
+
+    def clear(self):
+        self.steps = {}
+        self.dirty = True
+        self.save()
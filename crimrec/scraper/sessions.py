@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import atexit
+import hashlib
+import logging
+import threading
+from pathlib import Path
+import undetected_chromedriver as uc
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Profiles locked by a process that is no longer running are reclaimed after this long
+STALE_PROFILE_LOCK_SECONDS = 12 * 60 * 60
+
+
+def session_dir():
+    """Directory holding saved cookies and Chrome profiles"""
+    path = Path(getattr(settings, 'SCRAPER_SESSION_DIR', Path(settings.BASE_DIR) / '.scraper_sessions'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def chrome_options(headless=False, profile_dir=None):
+    """Chrome options with improved stability settings (a fresh object per launch, uc refuses reuse)"""
+    options = uc.ChromeOptions()
+
+    # Basic options
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--start-maximized")
+
+    # Anti-detection options
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-features=VizDisplayCompositor")
+    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+    # Stability options
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-plugins")
+    options.add_argument("--disable-images")
+    options.add_argument("--disable-web-security")
+    options.add_argument("--allow-running-insecure-content")
+
+    # Network and timeout options
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-ipc-flooding-protection")
+
+    # Memory and performance
+    options.add_argument("--memory-pressure-off")
+    options.add_argument("--max_old_space_size=4096")
+
+    if headless:
+        options.add_argument("--headless=new")
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    return options
+
+
+def launch_driver(headless=False, profile_dir=None, max_retries=3):
+    """Start undetected Chrome, retrying failed launches"""
+    for attempt in range(max_retries):
+        try:
+            driver = uc.Chrome(options=chrome_options(headless, profile_dir), version_main=None)
+            # WaitPolicy does all waiting; an implicit wait would stall every find_elements that
+            # matches nothing (element_gone, row counts) for its full duration
+            driver.implicitly_wait(0)
+            driver.set_page_load_timeout(60)  # Increased timeout
+            driver.set_script_timeout(30)  # Add script timeout
+            logger.info(f"ChromeDriver initialized successfully (attempt {attempt + 1})")
+            return driver
+        except Exception as e:
+            logger.warning(f"ChromeDriver initialization attempt {attempt + 1} failed: {str(e)}")
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(2)
+
+
+def cookie_path(email):
+    """Cookie file for an account (the address is hashed, not stored in the file name)"""
+    digest = hashlib.sha1(email.lower().encode('utf-8')).hexdigest()[:16]
+    return session_dir() / f"cookies-{digest}.json"
+
+
+def save_cookies(driver, path):
+    """Persist the browser's cookies for the current site"""
+    try:
+        cookies = driver.get_cookies()
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.write_text(json.dumps(cookies), encoding='utf-8')
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {len(cookies)} session cookies")
+        return True
+    except Exception as e:
+        logger.warning(f"Could not save session cookies: {e}")
+        return False
+
+
+def load_cookies(driver, path):
+    """Add saved cookies to the browser; the driver must already be on the cookies' domain"""
+    try:
+        cookies = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return False
+
+    now = time.time()
+    loaded = 0
+    for cookie in cookies:
+        if cookie.get('expiry') and cookie['expiry'] < now:
+            continue
+        # Chrome rejects sameSite values it does not know
+        if cookie.get('sameSite') not in ('Strict', 'Lax', 'None'):
+            cookie.pop('sameSite', None)
+        try:
+            driver.add_cookie(cookie)
+            loaded += 1
+        except Exception as e:
+            logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+    return loaded > 0
+
+
+def clear_cookies(email):
+    """Forget the saved cookies for an account"""
+    try:
+        cookie_path(email).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _pid_running(pid):
+    if os.name == 'nt':
+        # os.kill(pid, 0) terminates the process on Windows; rely on lock age instead
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def claim_profile_dir(max_profiles=8):
+    """Lock and return an unused Chrome profile directory, or None if all are taken
+
+    Locks are files next to the profiles so parallel processes never share a profile.
+    """
+    root = session_dir() / 'profiles'
+    root.mkdir(exist_ok=True)
+    for slot in range(max_profiles):
+        profile = root / f"profile-{slot}"
+        lock = root / f"profile-{slot}.lock"
+        for _ in range(2):
+            try:
+                fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    pid = int(lock.read_text() or 0)
+                    age = time.time() - lock.stat().st_mtime
+                except (OSError, ValueError):
+                    break
+                if _pid_running(pid) and age < STALE_PROFILE_LOCK_SECONDS:
+                    break
+                logger.info(f"Reclaiming stale profile lock {lock.name}")
+                lock.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, 'w') as lock_file:
+                lock_file.write(str(os.getpid()))
+            profile.mkdir(exist_ok=True)
+            return profile
+    return None
+
+
+def release_profile_dir(profile_dir):
+    """Unlock a profile claimed with claim_profile_dir"""
+    if profile_dir:
+        Path(f"{profile_dir}.lock").unlink(missing_ok=True)
+
+
+class BrowserSession:
+    """A Chrome driver with its profile directory and login state"""
+
+    def __init__(self, driver, profile_dir=None):
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.logged_in = False
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+    def is_alive(self):
+        """Health check: the browser still answers script calls"""
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def reset(self):
+        """Close windows left open by the previous scrape so the next one starts clean"""
+        try:
+            handles = self.driver.window_handles
+            for handle in handles[1:]:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(handles[0])
+        except Exception as e:
+            logger.debug(f"Could not reset browser windows: {e}")
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+        finally:
+            release_profile_dir(self.profile_dir)
+
+
+class SessionPool:
+    """Keeps warm, logged-in browser sessions that scrapers check out and return"""
+
+    def __init__(self, max_size=1, headless=False, max_uses=50, max_age=4 * 60 * 60):
+        self.max_size = max_size
+        self.headless = headless
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.idle = []
+        self.busy = set()
+        self.condition = threading.Condition()
+
+    def checkout(self, timeout=None):
+        """Return a healthy session, starting a new browser if the pool has room"""
+        with self.condition:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                while self.idle:
+                    session = self.idle.pop()
+                    if self._usable(session):
+                        session.uses += 1
+                        self.busy.add(session)
+                        logger.info("Reusing pooled browser session")
+                        return session
+                    logger.info("Recycling unhealthy or expired browser session")
+                    session.close()
+                if len(self.busy) < self.max_size:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No browser session available")
+                self.condition.wait(remaining)
+            # Reserve the slot before launching outside the lock
+            placeholder = object()
+            self.busy.add(placeholder)
+
+        profile_dir = claim_profile_dir()
+        try:
+            session = BrowserSession(launch_driver(self.headless, profile_dir), profile_dir)
+        except Exception:
+            release_profile_dir(profile_dir)
+            with self.condition:
+                self.busy.discard(placeholder)
+                self.condition.notify()
+            raise
+        session.uses = 1
+        with self.condition:
+            self.busy.discard(placeholder)
+            self.busy.add(session)
+        return session
+
+    def checkin(self, session):
+        """Return a session; dead ones are closed instead of kept"""
+        with self.condition:
+            self.busy.discard(session)
+            if self.max_size and self._usable(session):
+                session.reset()
+                self.idle.append(session)
+            else:
+                session.close()
+            self.condition.notify()
+
+    def close_all(self):
+        """Quit every idle session (busy ones are closed when checked in)"""
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.max_size = 0
+        for session in idle:
+            session.close()
+
+    def _usable(self, session):
+        if session.uses >= self.max_uses:
+            return False
+        if time.monotonic() - session.created_at > self.max_age:
+            return False
+        return session.is_alive()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool(headless=False, max_size=1):
+    """Process-wide pool, so repeated scrapes in one process reuse warm browsers"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool(max_size=max_size, headless=headless)
+            atexit.register(_pool.close_all)
+        return _pool
@@ -0,0 +1,206 @@
+import os
+import time
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Keep this module free of model imports at load time: with the "spawn" start
+# method (Windows, macOS) worker processes import it before Django is set up.
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = "%m/%d/%Y"
+SHARD_PERIODS = ('week', 'month')
+
+
+def split_date_range(from_date, to_date, period='month'):
+    """Split an MM/DD/YYYY window into consecutive (from, to) sub-ranges by week or month"""
+    if period not in SHARD_PERIODS:
+        raise ValueError(f"period must be one of {', '.join(SHARD_PERIODS)}")
+
+    start = datetime.strptime(from_date, DATE_FORMAT).date()
+    end = datetime.strptime(to_date, DATE_FORMAT).date()
+    if start > end:
+        raise ValueError("from_date must not be after to_date")
+
+    shards = []
+    while start <= end:
+        if period == 'week':
+            shard_end = start + timedelta(days=6)
+        else:
+            next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            shard_end = next_month - timedelta(days=1)
+        shard_end = min(shard_end, end)
+        shards.append((start.strftime(DATE_FORMAT), shard_end.strftime(DATE_FORMAT)))
+        start = shard_end + timedelta(days=1)
+    return shards
+
+
+class NullWriter:
+    """Writer that persists nothing; shard workers spool their rows for the parent"""
+
+    def __init__(self):
+        self.stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    def add(self, record):
+        return None
+
+    def call(self, function, *args):
+        return function(*args)
+
+    def flush(self):
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    def close(self):
+        return self.flush()
+
+
+def run_shard(shard, scraper_options):
+    """Scrape one date shard in its own browser session (runs in a worker process)
+
+    Rows are streamed to a JSON Lines spool file as each page is parsed, so neither the
+    worker nor the result sent back to the parent holds the shard's records; the parent
+    reads the spool and deletes it.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crimrec.settings')
+    import django
+    django.setup()
+    from .scrapers import EClerksScraper
+    from .sessions import get_session_pool
+    from .sinks import FileSink
+
+    from_date, to_date = shard
+    options = dict(scraper_options)
+    max_pages = options.pop('max_pages', 1)
+
+    started = time.monotonic()
+    # Page checkpoints are kept by the parent, once the shard's rows are actually persisted
+    # Worker processes are reused across shards, so keep their logged-in browser warm
+    session_pool = get_session_pool(headless=options.get('headless', False))
+    fd, spool_path = tempfile.mkstemp(prefix='crimrec-shard-', suffix='.jsonl')
+    os.close(fd)
+    try:
+        scraper = EClerksScraper(writer=NullWriter(), use_checkpoints=False, session_pool=session_pool,
+                                 sinks=[FileSink(spool_path, 'jsonl')], **options)
+        success = scraper.run(from_date=from_date, to_date=to_date, max_pages=max_pages)
+    except Exception:
+        _discard_spool(spool_path)
+        raise
+    return {
+        'shard': shard,
+        'success': success,
+        'spool': spool_path,
+        'rows': scraper.records_scraped,
+        'pages': scraper.pages_scraped,
+        'exhausted': scraper.exhausted,
+        'seconds': time.monotonic() - started,
+        'metrics': scraper.metrics.as_dict(),
+        # The NullWriter wrote nothing, so there are no per-page writer counts to report
+        'page_stats': [dict(page, shard=f"{from_date}-{to_date}", inserted=None, updated=None, unchanged=None)
+                       for page in scraper.page_stats],
+    }
+
+
+def _discard_spool(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def run_sharded(shards, scraper_options, writer, workers=2, retries=1, resume=False,
+                executor_class=ProcessPoolExecutor, sinks=(), run=None):
+    """Run shards in a process pool, retrying failures, and merge all rows through one writer
+
+    Each finished shard's spool is streamed into the writer and any extra sinks (closed
+    once all shards are done). With resume=True, shards whose checkpoint is already
+    completed are skipped. A shard whose rows cannot be merged is reported failed and its
+    spool file is kept (its path is in the report's 'spool'). With a ScrapeRun, each shard's page stats are saved to it as the
+    shard finishes instead of being kept in its report.
+    Returns one report dict per shard with its attempts, rows, pages, timing and RunMetrics data.
+    """
+    from django.db import connections
+    from .models import ScrapeCheckpoint
+    from .sinks import read_jsonl
+
+    checkpoints = {shard: ScrapeCheckpoint.for_search(*shard) for shard in shards}
+
+    # Forked workers must not inherit the parent's open database connections
+    if issubclass(executor_class, ProcessPoolExecutor):
+        connections.close_all()
+
+    reports = {shard: {'shard': shard, 'attempts': 0, 'success': False, 'skipped': False, 'rows': 0,
+                       'pages': 0, 'seconds': 0.0, 'error': '', 'metrics': {}, 'page_stats': []} for shard in shards}
+
+    to_run = []
+    for shard in shards:
+        if resume and checkpoints[shard].completed:
+            reports[shard].update(success=True, skipped=True)
+            logger.info(f"Shard {shard[0]}-{shard[1]} already completed, skipping")
+        else:
+            to_run.append(shard)
+
+    try:
+        with executor_class(max_workers=workers) as executor:
+            def submit(shard):
+                reports[shard]['attempts'] += 1
+                return executor.submit(run_shard, shard, scraper_options)
+
+            pending = {submit(shard): shard for shard in to_run}
+            while pending:
+                for future in as_completed(list(pending)):
+                    shard = pending.pop(future)
+                    report = reports[shard]
+                    try:
+                        result = future.result()
+                        report['seconds'] += result['seconds']
+                        if not result['success']:
+                            _discard_spool(result['spool'])
+                            raise RuntimeError("scraper run failed")
+                    except Exception as e:
+                        report['error'] = str(e)
+                        if report['attempts'] <= retries:
+                            logger.warning(f"Shard {shard[0]}-{shard[1]} failed ({e}), retrying")
+                            pending[submit(shard)] = shard
+                        else:
+                            logger.error(f"Shard {shard[0]}-{shard[1]} failed after {report['attempts']} attempts: {e}")
+                        continue
+
+                    # Single writer: only the parent process touches the database
+                    try:
+                        for record in read_jsonl(result['spool']):
+                            writer.add(record)
+                            for sink in sinks:
+                                sink.add(record)
+                        writer.flush()
+                        for sink in sinks:
+                            sink.flush()
+                    except Exception as e:
+                        # The scrape itself succeeded: keep its spool to merge again, and go on
+                        # with the other shards without this one's unwritten rows
+                        writer.discard()
+                        report.update(success=False, spool=result['spool'],
+                                      error=f"Merging {result['spool']} failed: {e}")
+                        logger.error(f"Shard {shard[0]}-{shard[1]} could not be merged, spool kept at "
+                                     f"{result['spool']}: {e}")
+                        continue
+                    _discard_spool(result['spool'])
+
+                    checkpoint = checkpoints[shard]
+                    checkpoint.last_completed_page = result['pages']
+                    checkpoint.completed = result['exhausted']
+                    checkpoint.save()
+
+                    page_stats = result.get('page_stats', [])
+                    if run is not None:
+                        run.add_pages(page_stats)
+                        page_stats = []
+                    report.update(success=True, error='', rows=result['rows'], pages=result['pages'],
+                                  metrics=result.get('metrics', {}), page_stats=page_stats)
+                    logger.info(f"Shard {shard[0]}-{shard[1]} finished: {report['rows']} rows in {result['seconds']:.1f}s")
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    return [reports[shard] for shard in shards]
@@ -0,0 +1,70 @@
+import csv
+import json
+import logging
+from datetime import date
+from .exporters import EXPORT_FIELDS, EXPORT_FORMATS, _json_default
+
+logger = logging.getLogger(__name__)
+
+# Record fields that are dates, decoded again when a JSON Lines spool is read back
+DATE_FIELDS = ('birth_date', 'date_filed', 'arrest_citation_date')
+
+
+class FileSink:
+    """Write scraped records to a CSV or JSON Lines file as they are parsed
+
+    Like RecordWriter, a sink takes records with add(), is flushed after each page and
+    closed when the run ends, so nothing is kept in memory between pages. The file is
+    only created once the first record arrives.
+    """
+
+    def __init__(self, path, fmt=None):
+        fmt = fmt or ('jsonl' if str(path).endswith('.jsonl') else 'csv')
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        self.path = path
+        self.fmt = fmt
+        self.file = None
+        self.csv_writer = None
+        self.rows_written = 0
+
+    def _open(self):
+        self.file = open(self.path, 'w', newline='', encoding='utf-8')
+        if self.fmt == 'csv':
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+            self.csv_writer.writeheader()
+
+    def add(self, record):
+        if self.file is None:
+            self._open()
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(record)
+        else:
+            self.file.write(json.dumps({field: record.get(field) for field in EXPORT_FIELDS}, default=_json_default))
+            self.file.write('\n')
+        self.rows_written += 1
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        self.csv_writer = None
+        logger.info(f"Exported {self.rows_written} records to {self.path}")
+
+
+def read_jsonl(path):
+    """Yield the records of a JSON Lines file written by FileSink, with dates decoded"""
+    with open(path, encoding='utf-8') as spool:
+        for line in spool:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            for field in DATE_FIELDS:
+                if record.get(field):
+                    record[field] = date.fromisoformat(record[field])
+            yield record
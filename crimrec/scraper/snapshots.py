@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import logging
+from pathlib import Path
+from django.utils import timezone
+from .exporters import EXPORT_FIELDS
+from .models import CriminalRecord
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # optional: only needed for analytics snapshots
+    pa = ds = None
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_snapshot_state.json'
+SNAPSHOT_FIELDS = ['id'] + EXPORT_FIELDS + ['scraped_timestamp']
+PARTITION_FIELDS = ['parish', 'filing_year']
+# Low-cardinality columns stored as dictionary indexes instead of repeated strings
+DICTIONARY_FIELDS = {'sex', 'race', 'parish'}
+
+
+def snapshot_schema():
+    category = pa.dictionary(pa.int16(), pa.string())
+    return pa.schema([
+        ('id', pa.int64()),
+        ('defendant_name', pa.string()),
+        ('birth_date', pa.date32()),
+        ('sex', category),
+        ('race', category),
+        ('case_number', pa.string()),
+        ('date_filed', pa.date32()),
+        ('charges', pa.string()),
+        ('arrest_citation_date', pa.date32()),
+        ('parish', category),
+        ('alert_available', pa.bool_()),
+        ('scraped_timestamp', pa.timestamp('us', tz='UTC')),
+        ('filing_year', pa.int16()),
+    ])
+
+
+def record_batches(queryset, schema, chunk_size=50000):
+    """Yield Arrow record batches of up to chunk_size rows without loading the queryset"""
+    columns = {name: [] for name in SNAPSHOT_FIELDS}
+    rows = queryset.values_list(*SNAPSHOT_FIELDS).iterator(chunk_size=chunk_size)
+    for row in rows:
+        for name, value in zip(SNAPSHOT_FIELDS, row):
+            columns[name].append(value)
+        if len(columns['id']) >= chunk_size:
+            yield _to_batch(columns, schema)
+            columns = {name: [] for name in SNAPSHOT_FIELDS}
+    if columns['id']:
+        yield _to_batch(columns, schema)
+
+
+def _to_batch(columns, schema):
+    arrays = []
+    for field in schema:
+        if field.name == 'filing_year':
+            values = [filed.year for filed in columns['date_filed']]
+        else:
+            values = columns[field.name]
+        if field.name in DICTIONARY_FIELDS:
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode().cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def read_state(output_dir):
+    try:
+        return json.loads((Path(output_dir) / STATE_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_snapshot(output_dir, full=False, chunk_size=50000):
+    """Write (or append to) a Parquet dataset partitioned by parish and filing year
+
+    Appends cover records inserted since the previous snapshot (ids above its high-water
+    mark); rows updated in place by later scrapes are only picked up by a full snapshot.
+    Returns a summary dict with mode, rows and last_id.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for snapshots (pip install pyarrow)")
+
+    output_dir = Path(output_dir)
+    state = {} if full else read_state(output_dir)
+    mode = 'append' if state else 'full'
+    last_id = state.get('last_id', 0)
+
+    queryset = CriminalRecord.objects.filter(id__gt=last_id).order_by('id')
+    schema = snapshot_schema()
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    # A full snapshot is built beside the old one and swapped in, so readers never see half
+    target = output_dir if mode == 'append' else output_dir.with_name(f"{output_dir.name}.tmp-{stamp}")
+
+    partitioning = ds.partitioning(pa.schema([schema.field(name) for name in PARTITION_FIELDS]), flavor='hive')
+    summary = {'rows': 0, 'last_id': last_id}
+    # Batches are read here and written one at a time: pyarrow consumes iterators on its own
+    # threads, which must not touch Django's per-thread database connections
+    for number, batch in enumerate(record_batches(queryset, schema, chunk_size)):
+        ds.write_dataset(
+            pa.Table.from_batches([batch]),
+            target,
+            format='parquet',
+            partitioning=partitioning,
+            # Unique file names per run and batch let appends add files next to earlier ones
+            basename_template=f"part-{stamp}-{number}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        summary['rows'] += batch.num_rows
+        summary['last_id'] = batch.column(0)[-1].as_py()
+
+    target.mkdir(parents=True, exist_ok=True)
+    state = {'last_id': summary['last_id'], 'snapshot_at': timezone.now().isoformat()}
+    (target / STATE_FILE).write_text(json.dumps(state), encoding='utf-8')
+
+    if mode == 'full':
+        # Move the old snapshot aside rather than deleting it first: the live directory is
+        # only missing between two renames, and a crash leaves the old one to restore
+        previous = output_dir.with_name(f"{output_dir.name}.old-{stamp}")
+        if output_dir.exists():
+            os.replace(output_dir, previous)
+        try:
+            os.replace(target, output_dir)
+        except OSError:
+            if previous.exists():
+                os.replace(previous, output_dir)
+            raise
+        if previous.exists():
+            shutil.rmtree(previous)
+    logger.info(f"Snapshot ({mode}) wrote {summary['rows']} rows to {output_dir}")
+    return {'mode': mode, **summary}
@@ -1,10 +1,87 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import cache, caches
 from django.core.management import call_command
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.utils import timezone
 from django.core.management.base import CommandError
-from unittest.mock import patch, MagicMock
+from unittest.mock import call, patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+import sqlite3
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import unittest
+import importlib
+import gzip
+import csv
+from datetime import date, datetime
+import json
 import os
-from .models import CriminalRecord
+from .models import Charge, CriminalRecord, Defendant, ScrapeCheckpoint, ScrapeJob, ScrapePage, ScrapeRun
 from .scrapers import EClerksScraper
+from .parsing import build_record, parse_charges, parse_results_html
+from .dates import DATE_FORMATS, DateParser
+from .sharding import run_shard, run_sharded, split_date_range
+from .waits import WaitPolicy, element_gone, page_changed
+from .writers import RecordWriter, ThreadedWriter
+from .incremental import incremental_from_date
+from .sessions import SessionPool, claim_profile_dir, launch_driver, load_cookies, save_cookies
+from .selector_cache import SelectorCache
+from .search import search_backend, search_records
+from .exporters import RecordExporter
+from .sinks import FileSink, read_jsonl
+from . import snapshots
+from .http_engine import HttpFetchEngine, SessionExpired
+from .replay import PageRecorder, ReplayServer, ReplaySite, load_captures
+from .benchmarks import (benchmark_browser, benchmark_pipeline, benchmark_read_latency, compare_to_baseline,
+                         parse_scale, scratch_database)
+from .sqlite import apply_pragmas, configure_connection, profile_pragmas
+from .facets import PARISH_COUNTS_KEY, parish_counts, record_count
+from .metrics import RunMetrics
+from .throughput import slowdown
+from . import jobs
+from .defendants import defendant_key, normalize_name
+from .pagination import KeysetPaginator, SEARCH_ORDERING, decode_cursor, estimated_count
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+
+# Tests must never read or update the facets cached for the real database, whichever
+# runner (manage.py test, pytest, an IDE) loads this module
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+test_cache_settings = override_settings(CACHES=TEST_CACHES)
+
+
+def setUpModule():
+    test_cache_settings.enable()
+
+
+def tearDownModule():
+    test_cache_settings.disable()
+
+
+def make_record(case_number, **overrides):
+    """Build a scraped record dict with sensible defaults"""
+    record = {
+        'defendant_name': "John Doe",
+        'birth_date': date(1990, 5, 1),
+        'sex': 'M',
+        'race': 'W',
+        'case_number': case_number,
+        'date_filed': date(2023, 1, 15),
+        'charges': "Test charge",
+        'arrest_citation_date': None,
+        'parish': "Orleans",
+        'alert_available': False,
+    }
+    record.update(overrides)
+    return record
 
 
 class CriminalRecordModelTest(TestCase):
@@ -53,7 +130,7 @@ class EClerksScraperTest(TestCase):
     @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
     def test_scraper_initialization_with_credentials(self):
         """Test scraper initializes with proper credentials"""
-        with patch('scraper.scrapers.uc.Chrome') as mock_chrome:
+        with patch('scraper.sessions.uc.Chrome') as mock_chrome:
             mock_chrome.return_value = MagicMock()
             scraper = EClerksScraper(headless=True)
             self.assertEqual(scraper.login_email, 'test@test.com')
@@ -78,6 +155,1392 @@ class EClerksScraperTest(TestCase):
         self.assertIsNone(EClerksScraper.parse_date(""))
         self.assertIsNone(EClerksScraper.parse_date("invalid"))
 
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_page_stats_count_rows_per_page(self):
+        """Test each stored page records its parsed, queued, skipped and written rows"""
+        with patch('scraper.sessions.uc.Chrome'):
+            scraper = EClerksScraper(headless=True, use_checkpoints=False)
+        rows = parse_results_html(RESULTS_HTML) + [(['too', 'short'], False)]
+        
+        page_start = scraper._page_start()
+        scraper._store_rows(rows)
+        scraper.writer.flush()
+        scraper._page_done(1, page_start)
+        
+        page = scraper.page_stats[0]
+        self.assertEqual(page['page_number'], 1)
+        self.assertEqual((page['rows_parsed'], page['records'], page['skipped'], page['errors']), (3, 2, 1, 0))
+        self.assertEqual((page['inserted'], page['updated'], page['unchanged']), (2, 0, 0))
+        self.assertEqual(scraper.metrics.timers['page']['count'], 1)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_page_stats_are_saved_to_the_run_in_batches(self):
+        """Test page stats are stored on the ScrapeRun during the run, holding at most a batch"""
+        run = ScrapeRun.start('01/01/2024', '01/31/2024')
+        with patch('scraper.sessions.uc.Chrome'):
+            scraper = EClerksScraper(headless=True, use_checkpoints=False, scrape_run=run)
+        scraper.PAGE_STATS_BATCH = 2
+        for page_number in range(1, 6):
+            scraper._page_done(page_number, scraper._page_start())
+            self.assertLess(len(scraper.page_stats), 2)
+        self.assertEqual(ScrapePage.objects.filter(run=run).count(), 4)
+
+        run.finish(True, pages=5, page_stats=scraper.page_stats)
+        self.assertEqual(list(run.scrape_pages.order_by('page_number').values_list('page_number', flat=True)),
+                         [1, 2, 3, 4, 5])
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_page_stats_are_saved_through_the_writer(self):
+        """Test page stats go to the ScrapeRun through the writer rather than directly"""
+        run = ScrapeRun.start('01/01/2024', '01/31/2024')
+        writer = MagicMock(stats={'inserted': 0, 'updated': 0, 'unchanged': 0})
+        with patch('scraper.sessions.uc.Chrome'):
+            scraper = EClerksScraper(headless=True, use_checkpoints=False, scrape_run=run, writer=writer)
+        scraper.PAGE_STATS_BATCH = 1
+        scraper._page_done(1, scraper._page_start())
+        
+        function, pages = writer.call.call_args.args
+        self.assertEqual(function, run.add_pages)
+        self.assertEqual([page['page_number'] for page in pages], [1])
+        self.assertFalse(ScrapePage.objects.filter(run=run).exists())
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_failed_write_is_not_a_row_error(self):
+        """Test a row whose batch failed to write is still queued, not counted as a row error"""
+        with patch('scraper.sessions.uc.Chrome'):
+            scraper = EClerksScraper(headless=True, use_checkpoints=False, batch_size=1)
+        with patch.object(scraper.writer, '_write', side_effect=RuntimeError("database is locked")):
+            page_records, _, _ = scraper._store_rows(parse_results_html(RESULTS_HTML))
+        
+        self.assertEqual(page_records, 2)
+        self.assertNotIn('row_errors', scraper.metrics.counters)
+        self.assertEqual(scraper.metrics.counters['write_retries'], 2)
+        self.assertEqual(len(scraper.writer.buffer), 2)
+        self.assertEqual(scraper.writer.flush()['inserted'], 2)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_records_stream_to_sinks(self):
+        """Test stored rows go to every sink as they are parsed and are not kept on the scraper"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'records.jsonl')
+            with patch('scraper.sessions.uc.Chrome'):
+                scraper = EClerksScraper(headless=True, use_checkpoints=False, sinks=[FileSink(path)])
+            scraper._store_rows(parse_results_html(RESULTS_HTML))
+            scraper._store_rows(parse_results_html(RESULTS_HTML))
+            scraper.close_sinks()
+
+            self.assertEqual(scraper.records_scraped, 4)
+            self.assertFalse(hasattr(scraper, 'records'))
+            records = list(read_jsonl(path))
+        self.assertEqual([record['case_number'] for record in records], ["2023-00001", "2023-00002"] * 2)
+        self.assertEqual(records[0]['date_filed'], date(2023, 1, 15))
+
+    def test_file_sink_writes_nothing_without_records(self):
+        """Test an empty run leaves no export file behind"""
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = FileSink(os.path.join(tmp, 'records.csv'))
+            sink.flush()
+            sink.close()
+            self.assertFalse(os.path.exists(sink.path))
+        with self.assertRaises(ValueError):
+            FileSink('records.csv', 'xml')
+
+
+class DateParserTest(TestCase):
+    @staticmethod
+    def strptime_date(value):
+        """The original parser: each format in turn"""
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(value.strip(), fmt).date()
+            except ValueError:
+                continue
+        return None
+
+    def test_matches_strptime_formats(self):
+        """Test the fast path and format locking give exactly what trying every format gives"""
+        samples = [
+            "01/15/2023", "1/5/2023", "02/03/2023", "25/12/2023", "02/30/2023", "13/13/2023",
+            "2023-01-15", "01-15-2023", "2023-02-30", " 07/04/1999 ", "01/15/23", "invalid",
+        ]
+        parser = DateParser()
+        for column in ('date_filed', 'birth_date'):
+            for value in samples + samples:
+                self.assertEqual(parser.parse(value, column), self.strptime_date(value), value)
+        self.assertIsNone(parser.parse(""))
+        self.assertIsNone(parser.parse(None))
+
+    def test_cache_is_bounded_and_formats_lock_per_column(self):
+        """Test repeats are served from the LRU and a column remembers its format"""
+        parser = DateParser(cache_size=2)
+        parser.parse("2023-01-15", 'date_filed')
+        parser.parse("2023-01-15", 'date_filed')
+        self.assertEqual((parser.hits, parser.misses), (1, 1))
+        self.assertEqual(parser.column_formats, {'date_filed': "%Y-%m-%d"})
+
+        parser.parse("01-16-2023", 'date_filed')
+        parser.parse("01/17/2023", 'date_filed')
+        self.assertEqual(list(parser.cache), ["01-16-2023", "01/17/2023"])
+        self.assertEqual(parser.column_formats, {'date_filed': "%m-%d-%Y"})
+
+
+RESULTS_HTML = """
+<html><body>
+<div id="gridview-1040"><table><tbody>
+<tr>
+  <td>DOE, JOHN</td><td>05/01/1990</td><td>Male</td><td>White</td><td>2023-00001</td>
+  <td>01/15/2023</td><td><div>14:67 THEFT</div><div>14:34 BATTERY</div></td><td>01/10/2023</td>
+  <td>Orleans</td><td><span class="action-alert"></span></td>
+</tr>
+<tr>
+  <td>ROE, JANE</td><td></td><td></td><td>Black</td><td>2023-00002</td>
+  <td>02/01/2023</td><td>14:95 WEAPON</td><td></td><td>Caddo</td><td></td>
+</tr>
+</tbody></table></div>
+<script>var ignored = "<td>not a cell</td>";</script>
+</body></html>
+"""
+
+
+class ResultsParsingTest(TestCase):
+    def test_parse_results_html_matches_record_shape(self):
+        """Test page source parsing yields the same record dicts as the browser path"""
+        rows = parse_results_html(RESULTS_HTML)
+        self.assertEqual(len(rows), 2)
+
+        first = build_record(*rows[0])
+        self.assertEqual(first['defendant_name'], "DOE, JOHN")
+        self.assertEqual(first['birth_date'], date(1990, 5, 1))
+        self.assertEqual(first['sex'], 'M')
+        self.assertEqual(first['charges'], "14:67 THEFT, 14:34 BATTERY")
+        self.assertEqual(first['parish'], "Orleans")
+        self.assertTrue(first['alert_available'])
+
+        second = build_record(*rows[1])
+        self.assertEqual(second['sex'], 'U')
+        self.assertIsNone(second['birth_date'])
+        self.assertFalse(second['alert_available'])
+
+    def test_only_results_grid_rows_are_parsed(self):
+        """Test layout and pager tables next to the grid never become records"""
+        layout = """
+<table class="layout"><tr><td>Menu</td><td>Home</td><td>Search</td><td>Help</td><td>Logout</td></tr></table>
+<table class="pager"><tbody><tr><td>1</td><td>2</td><td>3</td><td>4</td><td>Next</td></tr></tbody></table>
+"""
+        html = RESULTS_HTML.replace("<body>", "<body>" + layout).replace("</body>", layout + "</body>")
+        self.assertEqual(parse_results_html(html), parse_results_html(RESULTS_HTML))
+        self.assertEqual([cells[4] for cells, _ in parse_results_html(html)], ["2023-00001", "2023-00002"])
+        # Without a recognisable grid every table row is still returned
+        self.assertEqual(len(parse_results_html(layout)), 2)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_scrape_records_uses_single_snapshot_call(self):
+        """Test script extraction reads a whole page with one execute_script call"""
+        snapshot = [
+            {'cells': ["DOE, JOHN", "05/01/1990", "M", "W", "2023-00001", "01/15/2023",
+                       "14:67 THEFT", "", "Orleans", ""], 'alert': False},
+        ]
+        with patch('scraper.sessions.uc.Chrome') as mock_chrome, \
+                patch('scraper.waits.WebDriverWait') as mock_wait:
+            driver = MagicMock()
+            driver.execute_script.return_value = json.dumps(snapshot)
+            mock_chrome.return_value = driver
+            row = MagicMock()
+            mock_wait.return_value.until.return_value = [row]
+
+            scraper = EClerksScraper(headless=True)
+            self.assertTrue(scraper.scrape_records(max_pages=1))
+
+        driver.execute_script.assert_called_once()
+        row.find_elements.assert_not_called()
+        self.assertEqual(CriminalRecord.objects.get(case_number="2023-00001").parish, "Orleans")
+
+
+class RecordedResultsHandler(BaseHTTPRequestHandler):
+    """Stand-in results endpoint serving RESULTS_HTML with per-page case numbers"""
+    pages = 2
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if 'session=abc' not in self.headers.get('Cookie', ''):
+                self.send_error(403)
+                return
+            url = urlparse(self.path)
+            page = int(parse_qs(url.query)['page'][0])
+            threading.Event().wait(0.05)
+            if url.path == '/json':
+                rows = [{'defendant_name': "JSON, ROW", 'case_number': f"2023-J{page:04d}", 'date_filed': "03/01/2023",
+                         'parish': "Caddo", 'alert': True}] if page <= cls.pages else []
+                body, content_type = json.dumps({'data': rows}), 'application/json'
+            elif page <= cls.pages:
+                body = RESULTS_HTML.replace("2023-0000", f"2023-{page}000")
+                content_type = 'text/html'
+            else:
+                body, content_type = "<html><body><table></table></body></html>", 'text/html'
+            self.send_response(200)
+            self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(body.encode('utf-8'))
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpFetchEngineTest(TestCase):
+    def setUp(self):
+        RecordedResultsHandler.pages = 2
+        RecordedResultsHandler.max_in_flight = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RecordedResultsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/results?page={{page}}&start={{start}}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pages_fetched_concurrently_in_order(self):
+        """Test pages come back in order, in parallel, stopping at the first empty page"""
+        RecordedResultsHandler.pages = 5
+        engine = HttpFetchEngine(self.url, cookies=[{'name': 'session', 'value': 'abc'}], concurrency=3)
+        pages = list(engine.iter_pages(1, 10))
+        self.assertEqual([page for page, _ in pages], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(build_record(*pages[1][1][0])['case_number'], "2023-20001")
+        self.assertEqual(pages[-1][1], [])
+        self.assertEqual(RecordedResultsHandler.max_in_flight, 3)
+
+    def test_json_rows_share_record_shape(self):
+        """Test JSON results map onto the same record dicts as HTML"""
+        url = self.url.replace('/results', '/json')
+        engine = HttpFetchEngine(url, cookies=[{'name': 'session', 'value': 'abc'}])
+        (page, rows), = list(engine.iter_pages(1, 1))
+        record = build_record(*rows[0])
+        self.assertEqual((record['case_number'], record['parish'], record['date_filed']),
+                         ("2023-J0001", "Caddo", date(2023, 3, 1)))
+        self.assertTrue(record['alert_available'])
+
+    def test_rejected_session(self):
+        """Test a 403 is reported as an expired session instead of retried"""
+        engine = HttpFetchEngine(self.url, cookies=[{'name': 'session', 'value': 'stale'}])
+        with self.assertRaises(SessionExpired):
+            list(engine.iter_pages(1, 1))
+        self.assertEqual(engine.requests_made, 1)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_scraper_http_engine_takes_over_browser_cookies(self):
+        """Test the scraper stores pages fetched with the browser's cookies"""
+        with patch('scraper.sessions.uc.Chrome') as mock_chrome:
+            driver = MagicMock()
+            driver.get_cookies.return_value = [{'name': 'session', 'value': 'abc'}]
+            driver.execute_script.return_value = "Mozilla/5.0 test"
+            mock_chrome.return_value = driver
+            scraper = EClerksScraper(headless=True, fetch_engine='http', http_results_url=self.url)
+            self.assertTrue(scraper.scrape_records_http(max_pages=5))
+
+        self.assertTrue(scraper.exhausted)
+        self.assertEqual(scraper.pages_scraped, 2)
+        self.assertEqual(CriminalRecord.objects.filter(case_number__startswith="2023-").count(), 4)
+
+
+class ReplayServerTest(TestCase):
+    def fetch(self, server, path, cookie=True):
+        request = urllib.request.Request(f"{server.url}{path}", headers={'Cookie': 'replay_session=1'} if cookie else {})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.read().decode('utf-8')
+
+    def test_synthetic_pages_match_scraper_selectors(self):
+        """Test the stand-in site gates on login and serves parseable result pages"""
+        with ReplayServer(ReplaySite(pages=3, rows_per_page=4)) as server:
+            self.assertIn('placeholder="email address"', self.fetch(server, '/Home', cookie=False))
+            self.assertIn('criminal-search-step1', self.fetch(server, '/Home'))
+            self.assertIn('datefield-1029-inputEl', self.fetch(server, '/search'))
+            rows = parse_results_html(self.fetch(server, '/results?page=2'))
+            self.assertEqual(parse_results_html(self.fetch(server, '/results?page=4')), [])
+            with self.assertRaises(urllib.error.HTTPError):
+                self.fetch(server, '/results?page=1', cookie=False)
+
+        self.assertEqual(len(rows), 4)
+        record = build_record(*rows[0])
+        self.assertEqual(record['case_number'], "R00000004")
+        self.assertTrue(record['defendant_name'] and record['date_filed'] and record['parish'])
+
+    def test_latency_and_http_engine_end_to_end(self):
+        """Test the HTTP engine reads every replayed row with the configured latency applied"""
+        with ReplayServer(ReplaySite(pages=4, rows_per_page=5, latency=0.05)) as server:
+            engine = HttpFetchEngine(server.results_url_template, cookies=[{'name': 'replay_session', 'value': '1'}],
+                                     concurrency=4)
+            started = time.monotonic()
+            pages = list(engine.iter_pages(1, 10))
+            elapsed = time.monotonic() - started
+        self.assertEqual(sum(len(rows) for _, rows in pages), 20)
+        self.assertGreaterEqual(elapsed, 0.1)
+
+    def test_capture_and_replay_results(self):
+        """Test captured result pages are recorded with a manifest and replayed in a cycle"""
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder = PageRecorder(tmp)
+            recorder.capture('login', "<html>login</html>", "https://eclerksla.com/Home")
+            recorder.capture('results-001', RESULTS_HTML, "https://eclerksla.com/Search")
+            self.assertEqual(set(load_captures(tmp)), {'login', 'results-001'})
+
+            with ReplayServer(ReplaySite(captures_dir=tmp, pages=2)) as server:
+                self.assertEqual(parse_results_html(self.fetch(server, '/results?page=2')), parse_results_html(RESULTS_HTML))
+                self.assertEqual(self.fetch(server, '/captures/login.html', cookie=False), "<html>login</html>")
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_scraper_capture_mode(self):
+        """Test a scrape in capture mode saves each results page"""
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch('scraper.sessions.uc.Chrome') as mock_chrome, \
+                patch('scraper.waits.WebDriverWait') as mock_wait:
+            driver = MagicMock()
+            driver.page_source = RESULTS_HTML
+            driver.current_url = "https://eclerksla.com/Search"
+            mock_chrome.return_value = driver
+            mock_wait.return_value.until.return_value = [MagicMock()]
+
+            scraper = EClerksScraper(headless=True, extract_mode='source', capture_dir=tmp)
+            self.assertTrue(scraper.scrape_records(max_pages=1))
+            self.assertEqual(load_captures(tmp), {'results-001': RESULTS_HTML})
+
+
+class BenchmarkTest(TestCase):
+    def test_pipeline_stages_leave_no_rows(self):
+        """Test every pipeline stage is timed in a scratch database, leaving the real one and its facets alone"""
+        CriminalRecord.objects.create(**make_record('2023-00001', parish='Orleans'))
+        parish_counts()
+        counts = cache.get(PARISH_COUNTS_KEY)
+        charge_count = Charge.objects.count()
+        report = benchmark_pipeline(120, rows_per_page=50)
+        self.assertEqual(set(report), {'row_extraction', 'build_record', 'parse_date', 'persist', 'export'})
+        self.assertEqual(report['persist']['rows'], 120)
+        self.assertGreater(report['export']['bytes'], 0)
+        # Parsing is timed on values build_record has not already cached
+        self.assertGreater(report['parse_date']['cache_misses'], 0)
+        self.assertEqual(list(CriminalRecord.objects.values_list('case_number', flat=True)), ['2023-00001'])
+        self.assertEqual(Charge.objects.count(), charge_count)
+        self.assertEqual(cache.get(PARISH_COUNTS_KEY), counts)
+
+    def test_scratch_database_needs_sqlite(self):
+        """Test the scratch database is refused on backends that cannot be pointed at a file"""
+        with patch.object(connections['default'], 'vendor', 'postgresql'):
+            with self.assertRaises(CommandError):
+                with scratch_database():
+                    pass
+
+    @patch('scraper.scrapers.EClerksScraper')
+    def test_browser_benchmark_uses_a_scratch_selector_cache(self, mock_scraper_class):
+        """Test the browser benchmark never records selector hits in the real selector cache"""
+        mock_scraper_class.return_value.records_scraped = 3
+        benchmark_browser(pages=1)
+        selector_cache = mock_scraper_class.call_args.kwargs['selector_cache']
+        self.assertNotEqual(str(selector_cache.path), settings.SCRAPER_SELECTOR_CACHE)
+        self.assertTrue(str(selector_cache.path).startswith(tempfile.gettempdir()))
+
+    def test_recorded_pages_are_cycled_to_scale(self):
+        """Test captured result pages can be benchmarked beyond the rows they hold"""
+        with tempfile.TemporaryDirectory() as tmp:
+            PageRecorder(tmp).capture('results-001', RESULTS_HTML)
+            report = benchmark_pipeline(5, captures_dir=tmp)
+        self.assertEqual(report['persist']['rows'], 5)
+
+    def test_read_latency_per_sqlite_profile(self):
+        """Test reads are timed during ingest for each profile, in scratch databases only"""
+        record_count = CriminalRecord.objects.count()
+        report = benchmark_read_latency(rows=300, batch_size=50, readers=1)
+        self.assertEqual(set(report), {'default', 'production'})
+        for profile in report.values():
+            self.assertEqual(set(profile), {'reads', 'locked', 'median_ms', 'p95_ms', 'max_ms', 'ingest_seconds'})
+            self.assertEqual(profile['locked'], 0)
+        self.assertEqual(CriminalRecord.objects.count(), record_count)
+
+    def test_baseline_comparison(self):
+        """Test stages slower than the tolerance are flagged"""
+        self.assertEqual([parse_scale(value) for value in ("1k", "100K", "1m", "250")], [1000, 100000, 1000000, 250])
+        baseline = {'scales': {'1000': {'persist': {'seconds': 1.0}, 'export': {'seconds': 1.0}}}}
+        results = {'scales': {'1000': {'persist': {'seconds': 1.5}, 'export': {'seconds': 1.1}, 'parse_date': {'seconds': 1.0}}}}
+        rows = compare_to_baseline(results, baseline, tolerance=0.2)
+        self.assertEqual([(stage, regressed) for _, stage, _, _, _, regressed in rows],
+                         [('persist', True), ('export', False)])
+
+    def test_benchmark_command_fails_on_regression(self):
+        """Test the command writes JSON and can fail against a faster baseline"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            call_command('benchmark_pipeline', scales='100', output=output, stdout=StringIO())
+            with open(output, encoding='utf-8') as results_file:
+                results = json.load(results_file)
+            self.assertIn('persist', results['scales']['100'])
+
+            for stage in results['scales']['100'].values():
+                stage['seconds'] = 1e-9
+            baseline = os.path.join(tmp, 'baseline.json')
+            with open(baseline, 'w', encoding='utf-8') as baseline_file:
+                json.dump(results, baseline_file)
+            with self.assertRaises(CommandError):
+                call_command('benchmark_pipeline', scales='100', baseline=baseline, fail_on_regression=True,
+                             stdout=StringIO())
+
+
+class WaitPolicyTest(TestCase):
+    def test_element_gone_does_not_block_on_implicit_wait(self):
+        """Test a closed dialog is detected at once on a driver from launch_driver"""
+        class FakeDriver:
+            """find_elements blocks for the implicit wait when nothing matches, like WebDriver"""
+            implicit_wait = 10
+
+            def implicitly_wait(self, seconds):
+                self.implicit_wait = seconds
+
+            def set_page_load_timeout(self, seconds):
+                pass
+
+            def set_script_timeout(self, seconds):
+                pass
+
+            def find_elements(self, by, value):
+                time.sleep(self.implicit_wait)
+                return []
+
+        with patch('scraper.sessions.uc.Chrome', return_value=FakeDriver()):
+            driver = launch_driver(headless=True)
+        policy = WaitPolicy(poll_frequency=0.01)
+        policy.driver = driver
+
+        started = time.monotonic()
+        self.assertTrue(policy.until('eula_closed', element_gone(('xpath', "//div[@id='eula']")), kind='eula'))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_until_records_elapsed_time(self):
+        """Test satisfied and timed-out waits are both recorded"""
+        policy = WaitPolicy(timeouts={'element': 0.05}, poll_frequency=0.01)
+        policy.driver = MagicMock()
+
+        self.assertEqual(policy.until('ready', lambda driver: 'done'), 'done')
+        with self.assertRaises(TimeoutException):
+            policy.until('never', lambda driver: False)
+        self.assertFalse(policy.settle('never', lambda driver: False, kind='element'))
+
+        summary = policy.summary()
+        self.assertEqual(summary['ready']['count'], 1)
+        self.assertEqual(summary['ready']['timeouts'], 0)
+        self.assertEqual(summary['never']['count'], 2)
+        self.assertEqual(summary['never']['timeouts'], 2)
+        self.assertGreaterEqual(summary['never']['max'], 0.05)
+        # One aggregate per wait name, however many waits ran
+        self.assertEqual(len(policy.timings), 2)
+        self.assertAlmostEqual(policy.total_seconds(), summary['ready']['total'] + summary['never']['total'])
+
+    def test_page_changed_detects_stale_row_or_new_count(self):
+        """Test pagination wait fires on a stale first row or a different row count"""
+        driver = MagicMock()
+        old_row = MagicMock()
+        driver.find_elements.return_value = [MagicMock()] * 25
+        condition = page_changed(old_row, ('xpath', '//tr'), 25)
+        self.assertFalse(condition(driver))
+
+        driver.find_elements.return_value = [MagicMock()] * 7
+        self.assertTrue(condition(driver))
+
+        old_row.is_enabled.side_effect = StaleElementReferenceException()
+        driver.find_elements.return_value = [MagicMock()] * 25
+        self.assertTrue(condition(driver))
+
+
+class ScrapeCheckpointTest(TestCase):
+    def test_record_page_and_resume_page(self):
+        """Test checkpoints track completed pages per date range"""
+        checkpoint = ScrapeCheckpoint.for_search("01/01/2024", "01/31/2024")
+        self.assertEqual(checkpoint.resume_page, 1)
+
+        checkpoint.record_page(1, "2024-00001")
+        checkpoint.record_page(2, "2024-00026")
+        checkpoint = ScrapeCheckpoint.for_search("01/01/2024", "01/31/2024")
+        self.assertEqual(checkpoint.resume_page, 3)
+        self.assertEqual(checkpoint.page_first_case_numbers, {'1': "2024-00001", '2': "2024-00026"})
+
+        checkpoint.mark_completed()
+        self.assertEqual(checkpoint.resume_page, 1)
+        self.assertEqual(ScrapeCheckpoint.objects.count(), 1)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_scrape_records_skips_to_start_page(self):
+        """Test resumed scraping pages past completed pages without parsing them"""
+        checkpoint = ScrapeCheckpoint.for_search("01/01/2024", "01/31/2024")
+        checkpoint.record_page(1, "2024-00001")
+        checkpoint.record_page(2, "2024-00026")
+
+        with patch('scraper.sessions.uc.Chrome') as mock_chrome:
+            mock_chrome.return_value = MagicMock()
+            scraper = EClerksScraper(headless=True)
+        pages = [[make_record("2024-00001")], [make_record("2024-00026")], [make_record("2024-00051")]]
+        state = {'page': 0}
+
+        def extract_rows(selector, rows):
+            record = pages[state['page']][0]
+            return [(["DOE, JOHN", "", "M", "W", record['case_number'], "01/15/2024",
+                      "", "", "Orleans"], False)]
+
+        def next_page(selector, rows):
+            if state['page'] == len(pages) - 1:
+                return False
+            state['page'] += 1
+            return True
+
+        with patch.object(scraper, '_find_rows', return_value=("//tr", [MagicMock()])), \
+                patch.object(scraper, '_extract_rows', side_effect=extract_rows), \
+                patch.object(scraper, '_next_page', side_effect=next_page):
+            self.assertTrue(scraper.scrape_records(max_pages=5, start_page=3, checkpoint=checkpoint))
+
+        self.assertEqual(list(CriminalRecord.objects.values_list('case_number', flat=True)), ["2024-00051"])
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.last_completed_page, 3)
+        self.assertTrue(checkpoint.completed)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_max_pages_counts_pages_scraped_after_resuming(self):
+        """Test a resumed run with max_pages=1 still scrapes the next page"""
+        checkpoint = ScrapeCheckpoint.for_search("01/01/2024", "01/31/2024")
+        checkpoint.record_page(1, "2024-00001")
+        with patch('scraper.sessions.uc.Chrome'):
+            scraper = EClerksScraper(headless=True)
+        state = {'page': 1}
+
+        def extract_rows(selector, rows):
+            case_number = "2024-00001" if state['page'] == 1 else "2024-00026"
+            return [(["DOE, JOHN", "", "M", "W", case_number, "01/15/2024", "", "", "Orleans"], False)]
+
+        def next_page(selector, rows):
+            state['page'] += 1
+            return True
+
+        with patch.object(scraper, '_find_rows', return_value=("//tr", [MagicMock()])), \
+                patch.object(scraper, '_extract_rows', side_effect=extract_rows), \
+                patch.object(scraper, '_next_page', side_effect=next_page):
+            self.assertTrue(scraper.scrape_records(max_pages=1, start_page=2, checkpoint=checkpoint))
+        self.assertEqual(scraper.pages_scraped, 1)
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.last_completed_page, 2)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_resume_after_completed_search_starts_over(self):
+        """Test resuming a completed search re-scrapes from page 1 and clears completed"""
+        checkpoint = ScrapeCheckpoint.for_search("01/01/2024", "01/31/2024")
+        checkpoint.record_page(4, "2024-00076")
+        checkpoint.mark_completed()
+        with patch('scraper.sessions.uc.Chrome'):
+            scraper = EClerksScraper(headless=True)
+        with patch.object(scraper, 'login', return_value=True), \
+                patch.object(scraper, 'navigate_to_search_page', return_value=True), \
+                patch.object(scraper, 'set_date_range', return_value=True), \
+                patch.object(scraper, 'execute_search', return_value=True), \
+                patch.object(scraper, 'scrape_records', return_value=True) as scrape_records:
+            self.assertTrue(scraper.run("01/01/2024", "01/31/2024", max_pages=2, resume=True))
+        self.assertEqual(scrape_records.call_args.kwargs['start_page'], 1)
+        checkpoint.refresh_from_db()
+        self.assertEqual((checkpoint.completed, checkpoint.last_completed_page), (False, 0))
+
+
+class IncrementalScrapeTest(TestCase):
+    def test_incremental_from_date_uses_latest_record(self):
+        """Test the incremental window starts just before the newest stored record"""
+        self.assertIsNone(incremental_from_date())
+        writer = RecordWriter()
+        writer.add(make_record("2023-00001", date_filed=date(2023, 1, 15)))
+        writer.add(make_record("2023-00002", date_filed=date(2023, 3, 2)))
+        writer.flush()
+        self.assertEqual(incremental_from_date(overlap_days=1), "03/01/2023")
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def scrape_pages(self, pages):
+        """Scrape result pages given as lists of case numbers with an incremental scraper"""
+        with patch('scraper.sessions.uc.Chrome') as mock_chrome:
+            mock_chrome.return_value = MagicMock()
+            scraper = EClerksScraper(headless=True, stop_on_unchanged_page=True)
+        state = {'page': 0}
+
+        def extract_rows(selector, rows):
+            return [(["John Doe", "05/01/1990", "M", "W", case_number, "01/15/2023", "Test charge", "", "Orleans"],
+                     False) for case_number in pages[state['page']]]
+
+        def next_page(selector, rows):
+            state['page'] += 1
+            return state['page'] < len(pages)
+
+        with patch.object(scraper, '_find_rows', return_value=("//tr", [MagicMock()])), \
+                patch.object(scraper, '_extract_rows', side_effect=extract_rows), \
+                patch.object(scraper, '_next_page', side_effect=next_page):
+            self.assertTrue(scraper.scrape_records(max_pages=10))
+        return scraper
+
+    def test_stops_after_page_of_unchanged_records(self):
+        """Test pagination ends at the first page of known records after a page with new ones"""
+        writer = RecordWriter()
+        for case_number in ("2023-00001", "2023-00002"):
+            writer.add(make_record(case_number))
+        writer.flush()
+
+        scraper = self.scrape_pages([["2023-00009"], ["2023-00001"], ["2023-00002"]])
+        self.assertEqual(scraper.pages_scraped, 2)
+
+    def test_known_first_pages_do_not_stop_the_run(self):
+        """Test overlap-day pages that come first (oldest-first results) are scraped through"""
+        writer = RecordWriter()
+        for case_number in ("2023-00001", "2023-00002"):
+            writer.add(make_record(case_number))
+        writer.flush()
+
+        scraper = self.scrape_pages([["2023-00001"], ["2023-00002"], ["2023-00009"]])
+        self.assertEqual(scraper.pages_scraped, 3)
+        self.assertTrue(CriminalRecord.objects.filter(case_number="2023-00009").exists())
+
+
+class SessionPoolTest(TestCase):
+    def setUp(self):
+        self.session_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(SCRAPER_SESSION_DIR=self.session_dir.name)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.session_dir.cleanup()
+
+    def test_checkout_reuses_healthy_session_and_recycles_dead_one(self):
+        """Test returned browsers are reused until a health check fails"""
+        with patch('scraper.sessions.launch_driver', side_effect=lambda *args: MagicMock()) as mock_launch:
+            pool = SessionPool(max_size=1)
+            session = pool.checkout()
+            session.driver.execute_script.return_value = 1
+            session.logged_in = True
+            pool.checkin(session)
+
+            self.assertIs(pool.checkout(), session)
+            self.assertEqual(mock_launch.call_count, 1)
+
+            session.driver.execute_script.side_effect = Exception("chrome not reachable")
+            pool.checkin(session)
+            replacement = pool.checkout()
+
+        self.assertIsNot(replacement, session)
+        self.assertEqual(mock_launch.call_count, 2)
+        session.driver.quit.assert_called_once()
+
+    def test_profile_dirs_are_not_shared(self):
+        """Test each claimed Chrome profile directory is locked until released"""
+        first = claim_profile_dir(max_profiles=2)
+        second = claim_profile_dir(max_profiles=2)
+        self.assertNotEqual(first, second)
+        self.assertIsNone(claim_profile_dir(max_profiles=2))
+
+    def test_cookies_round_trip(self):
+        """Test saved session cookies are added back to a new browser"""
+        path = os.path.join(self.session_dir.name, 'cookies.json')
+        driver = MagicMock()
+        driver.get_cookies.return_value = [
+            {'name': 'ASP.NET_SessionId', 'value': 'abc', 'sameSite': 'Lax'},
+            {'name': 'expired', 'value': 'x', 'expiry': 1},
+        ]
+        self.assertTrue(save_cookies(driver, path))
+
+        new_driver = MagicMock()
+        self.assertTrue(load_cookies(new_driver, path))
+        new_driver.add_cookie.assert_called_once_with({'name': 'ASP.NET_SessionId', 'value': 'abc', 'sameSite': 'Lax'})
+
+
+class SelectorCacheTest(TestCase):
+    def test_learned_selector_is_tried_first_and_persisted(self):
+        """Test the selector that matched last is moved to the front after a reload"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, 'selectors.json')
+            selectors = [('id', 'submitButton'), ('xpath', "//button[contains(text(), 'Search')]"), "//input"]
+            cache = SelectorCache(path)
+            self.assertEqual(cache.ordered('search', selectors), selectors)
+
+            cache.record_miss('search', selectors[0])
+            cache.record_hit('search', selectors[2])
+            cache.save()
+
+            reloaded = SelectorCache(path)
+            self.assertEqual(reloaded.ordered('search', selectors)[0], "//input")
+            self.assertEqual(reloaded.stats()['search']['id=submitButton'], {'hits': 0, 'misses': 1})
+
+            # A preferred selector that stops matching loses its place
+            reloaded.record_miss('search', "//input")
+            self.assertIsNone(reloaded.steps['search']['preferred'])
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'test@test.com', 'ECLERKS_PASSWORD': 'password'})
+    def test_first_match_skips_waits_for_known_misses(self):
+        """Test a cached winner is found without waiting on earlier selectors"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = SelectorCache(os.path.join(cache_dir, 'selectors.json'))
+            cache.record_hit('result_rows', "//table/tr[td]")
+            with patch('scraper.sessions.uc.Chrome') as mock_chrome:
+                mock_chrome.return_value = MagicMock()
+                scraper = EClerksScraper(headless=True, selector_cache=cache)
+
+            with patch.object(scraper.waits, 'until', return_value=[MagicMock()]) as mock_until:
+                selector, rows = scraper._find_rows()
+
+        self.assertEqual(selector, "//table/tr[td]")
+        self.assertEqual(mock_until.call_count, 1)
+
+
+class RecordSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        writer = RecordWriter()
+        writer.add(make_record("2023-00001", defendant_name="SMITH, JOHN", charges="14:67 THEFT"))
+        writer.add(make_record("2023-00002", defendant_name="JOHNSON, MARY", charges="14:34 BATTERY"))
+        writer.add(make_record("2023-00003", defendant_name="DOE, JANE", charges="14:67 THEFT, 14:67 THEFT"))
+        writer.flush()
+
+    def test_prefix_search_on_names(self):
+        """Test every word is prefix-matched against the full-text index"""
+        self.assertEqual(search_backend(), 'sqlite-fts5')
+        names = set(search_records(CriminalRecord.objects.all(), "joh").values_list('defendant_name', flat=True))
+        self.assertEqual(names, {"SMITH, JOHN", "JOHNSON, MARY"})
+        self.assertEqual(
+            list(search_records(CriminalRecord.objects.all(), "smi joh").values_list('case_number', flat=True)),
+            ["2023-00001"]
+        )
+
+    def test_results_are_ranked(self):
+        """Test records matching the term more strongly come first"""
+        results = list(search_records(CriminalRecord.objects.all(), "theft"))
+        self.assertEqual([record.case_number for record in results], ["2023-00003", "2023-00001"])
+        self.assertLess(results[0].search_rank, results[1].search_rank)
+
+    def test_index_follows_bulk_upserts(self):
+        """Test bulk writer updates are reflected in the index without a rebuild"""
+        writer = RecordWriter()
+        writer.add(make_record("2023-00002", defendant_name="JOHNSON, MARY", charges="14:95 WEAPON"))
+        writer.flush()
+        records = CriminalRecord.objects.all()
+        self.assertFalse(search_records(records, "battery").exists())
+        self.assertTrue(search_records(records, "weapon").exists())
+
+    def test_record_list_view_uses_search(self):
+        """Test the list view filters by the ranked search"""
+        response = self.client.get('/', {'q': 'battery'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([record.case_number for record in response.context['page_obj']], ["2023-00002"])
+
+    def test_rebuild_search_index_command(self):
+        """Test the index can be rebuilt from the records table"""
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn("sqlite-fts5", out.getvalue())
+        self.assertEqual(search_records(CriminalRecord.objects.all(), "doe").count(), 1)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        writer = RecordWriter()
+        # Several records share a filing date so the id tie-breaker matters
+        for number in range(1, 8):
+            writer.add(make_record(f"2023-{number:05d}", date_filed=date(2023, 1, 1 + number // 3),
+                                   charges=f"14:67 THEFT {'THEFT ' * number}"))
+        writer.flush()
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append([record.case_number for record in page])
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_pages_follow_date_then_id_order(self):
+        """Test walking the cursors visits every record once in (-date_filed, -id) order"""
+        pages, _ = self.walk(KeysetPaginator(CriminalRecord.objects.all(), per_page=3))
+        expected = list(CriminalRecord.objects.order_by('-date_filed', '-id').values_list('case_number', flat=True))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_cursor_returns_earlier_page(self):
+        """Test the previous cursor of page 2 yields page 1 and page 1 has no previous"""
+        paginator = KeysetPaginator(CriminalRecord.objects.all(), per_page=3)
+        first = paginator.get_page()
+        self.assertFalse(first.has_previous())
+        second = paginator.get_page(first.next_cursor)
+        self.assertTrue(second.has_previous())
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual([r.case_number for r in back], [r.case_number for r in first])
+        self.assertTrue(back.has_next())
+
+    def test_seek_query_has_no_offset(self):
+        """Test deep pages filter on the sort key instead of using OFFSET"""
+        paginator = KeysetPaginator(CriminalRecord.objects.all(), per_page=3)
+        cursor = paginator.get_page().next_cursor
+        values, direction = decode_cursor(cursor)
+        self.assertEqual(direction, 'next')
+        queryset = CriminalRecord.objects.filter(paginator.seek_filter(values)).order_by(*paginator.order_by())[:4]
+        self.assertNotIn('OFFSET', str(queryset.query).upper())
+
+    def test_ranked_search_pages(self):
+        """Test cursors work on search_rank ordering"""
+        records = search_records(CriminalRecord.objects.all(), "theft")
+        pages, _ = self.walk(KeysetPaginator(records, per_page=2, ordering=SEARCH_ORDERING))
+        self.assertEqual(sum(pages, []), list(records.values_list('case_number', flat=True)))
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        """Test a tampered cursor is treated as no cursor"""
+        paginator = KeysetPaginator(CriminalRecord.objects.all(), per_page=3)
+        self.assertEqual(len(paginator.get_page("not-a-cursor")), 3)
+        self.assertFalse(paginator.get_page("not-a-cursor").has_previous())
+
+    def test_estimated_count_caps(self):
+        """Test counts beyond the cap are reported as estimates"""
+        self.assertEqual(estimated_count(CriminalRecord.objects.all()), (7, False))
+        self.assertEqual(estimated_count(CriminalRecord.objects.all(), cap=5), (5, True))
+
+    def test_record_list_view_cursor(self):
+        """Test the list view follows the next cursor"""
+        first = self.client.get('/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.context['total_records'], 7)
+        self.assertFalse(first.context['page_obj'].has_next())
+        records = [make_record(f"2024-{number:05d}", date_filed=date(2024, 1, 1)) for number in range(30)]
+        CriminalRecord.objects.bulk_create(CriminalRecord(**record) for record in records)
+        first = self.client.get('/')
+        second = self.client.get('/', {'cursor': first.context['page_obj'].next_cursor})
+        self.assertEqual(len(second.context['page_obj']), 12)
+        self.assertContains(first, f"?cursor={first.context['page_obj'].next_cursor}")
+
+
+class FacetCacheTest(TestCase):
+    def setUp(self):
+        # Test transactions roll back the table but not the cache
+        cache.clear()
+        writer = RecordWriter()
+        writer.add(make_record("2023-00001", parish="Orleans"))
+        writer.add(make_record("2023-00002", parish="Orleans", charges="14:34 BATTERY"))
+        writer.add(make_record("2023-00003", parish="Jefferson"))
+        writer.flush()
+
+    def test_tests_use_a_private_cache(self):
+        """Test the suite never touches the shared file cache of the real database"""
+        self.assertEqual(type(caches['default']).__name__, 'LocMemCache')
+
+    def test_counts_are_cached(self):
+        """Test facets are computed once and then served without queries"""
+        self.assertEqual(parish_counts(), [("Jefferson", 1), ("Orleans", 2)])
+        with self.assertNumQueries(0):
+            self.assertEqual(parish_counts(), [("Jefferson", 1), ("Orleans", 2)])
+            self.assertEqual(record_count(None, parish="orleans"), (2, False))
+
+    def test_writer_updates_cached_counts_incrementally(self):
+        """Test inserts and parish changes adjust the cached facet in place"""
+        parish_counts()
+        writer = RecordWriter()
+        writer.add(make_record("2023-00004", parish="Caddo"))
+        writer.add(make_record("2023-00003", parish="Orleans"))
+        writer.flush()
+        with self.assertNumQueries(0):
+            self.assertEqual(parish_counts(), [("Caddo", 1), ("Orleans", 3)])
+
+    def test_search_counts_expire_on_write(self):
+        """Test cached search counts are recomputed after the next write"""
+        records = search_records(CriminalRecord.objects.all(), "battery")
+        self.assertEqual(record_count(records, "battery"), (1, False))
+        writer = RecordWriter()
+        writer.add(make_record("2023-00005", charges="14:34 BATTERY"))
+        writer.flush()
+        self.assertEqual(record_count(records, "battery"), (2, False))
+
+    def test_single_saves_invalidate(self):
+        """Test ORM saves outside the writer drop the cached facets"""
+        parish_counts()
+        CriminalRecord.objects.filter(case_number="2023-00001").first().delete()
+        self.assertEqual(parish_counts(), [("Jefferson", 1), ("Orleans", 1)])
+
+    def test_list_view_shows_parish_counts(self):
+        """Test the dropdown lists counts and a repeat page load skips the aggregates"""
+        response = self.client.get('/')
+        self.assertContains(response, "Orleans (2)")
+        self.assertEqual(response.context['total_records'], 3)
+        with self.assertNumQueries(1):
+            self.client.get('/')
+
+
+class RecordExportTest(TestCase):
+    def setUp(self):
+        writer = RecordWriter()
+        writer.add(make_record("2023-00001", defendant_name="SMITH, JOHN", parish="Orleans"))
+        writer.add(make_record("2023-00002", defendant_name="DOE, JANE", parish="Caddo", charges="A, \"B\"\nC"))
+        writer.add(make_record("2023-00003", parish="Orleans", date_filed=date(2023, 2, 1)))
+        writer.flush()
+
+    def test_csv_round_trip_in_chunks(self):
+        """Test CSV output parses back with one chunk per chunk_size rows"""
+        exporter = RecordExporter(CriminalRecord.objects.order_by('case_number'), 'csv', chunk_size=2)
+        chunks = list(exporter)
+        self.assertEqual(len(chunks), 2)
+        rows = list(csv.DictReader(StringIO(b''.join(chunks).decode('utf-8'))))
+        self.assertEqual([row['case_number'] for row in rows], ["2023-00001", "2023-00002", "2023-00003"])
+        self.assertEqual(rows[1]['charges'], 'A, "B"\nC')
+        self.assertEqual(exporter.rows_written, 3)
+
+    def test_gzip_jsonl(self):
+        """Test gzip-compressed JSON Lines decompress to one object per record"""
+        exporter = RecordExporter(CriminalRecord.objects.order_by('case_number'), 'jsonl', compress=True)
+        lines = gzip.decompress(b''.join(exporter)).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['date_filed'], "2023-01-15")
+
+    def test_export_view_honours_filters(self):
+        """Test the streaming view applies the list filters"""
+        response = self.client.get('/export/', {'parish': 'orleans', 'format': 'jsonl'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('criminal_records.jsonl', response['Content-Disposition'])
+        cases = [json.loads(line)['case_number'] for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(cases, ["2023-00003", "2023-00001"])
+        self.assertEqual(self.client.get('/export/', {'format': 'xml'}).status_code, 400)
+
+    def test_export_records_command(self):
+        """Test the command infers gzip and format from the file name"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'records.jsonl.gz')
+            out = StringIO()
+            call_command('export_records', output=path, parish='Caddo', stdout=out)
+            with gzip.open(path, 'rt', encoding='utf-8') as export_file:
+                self.assertEqual(json.loads(export_file.readline())['defendant_name'], "DOE, JANE")
+            self.assertIn("Exported 1 records", out.getvalue())
+
+    def test_export_records_command_filters_by_charge(self):
+        """Test --charge applies the record list's charge filter"""
+        CriminalRecord.objects.create(**make_record("2023-00004", charges="RS 14:67 THEFT"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'records.csv')
+            out = StringIO()
+            call_command('export_records', output=path, charge='14:67', stdout=out)
+            with open(path, newline='') as export_file:
+                self.assertEqual([row['case_number'] for row in csv.DictReader(export_file)], ["2023-00004"])
+            self.assertIn("Exported 1 records", out.getvalue())
+
+
+@unittest.skipUnless(snapshots.pa, "pyarrow is not installed")
+class SnapshotTest(TestCase):
+    def setUp(self):
+        writer = RecordWriter()
+        writer.add(make_record("2023-00001", parish="Orleans"))
+        writer.add(make_record("2023-00002", parish="Caddo", sex='F'))
+        writer.add(make_record("2024-00003", parish="Orleans", date_filed=date(2024, 3, 1)))
+        writer.flush()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, 'records')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        dataset = snapshots.ds.dataset(self.output, format='parquet', partitioning='hive')
+        return dataset.to_table().sort_by('id')
+
+    def test_partitioned_dictionary_snapshot(self):
+        """Test the snapshot is partitioned by parish/year with dictionary-encoded categories"""
+        summary = snapshots.write_snapshot(self.output)
+        self.assertEqual((summary['mode'], summary['rows']), ('full', 3))
+        self.assertTrue(os.path.isdir(os.path.join(self.output, 'parish=Orleans', 'filing_year=2024')))
+        table = self.read()
+        self.assertEqual(table.column('case_number').to_pylist(), ["2023-00001", "2023-00002", "2024-00003"])
+        self.assertEqual(str(table.schema.field('sex').type), 'dictionary<values=string, indices=int16, ordered=0>')
+
+    def test_incremental_append(self):
+        """Test a second snapshot only appends records added since the first"""
+        snapshots.write_snapshot(self.output)
+        writer = RecordWriter()
+        writer.add(make_record("2024-00004", parish="Caddo"))
+        writer.flush()
+        summary = snapshots.write_snapshot(self.output)
+        self.assertEqual((summary['mode'], summary['rows']), ('append', 1))
+        self.assertEqual(self.read().num_rows, 4)
+        self.assertEqual(snapshots.write_snapshot(self.output)['rows'], 0)
+        # --full rebuilds from scratch without duplicating rows
+        self.assertEqual(snapshots.write_snapshot(self.output, full=True)['rows'], 4)
+        self.assertEqual(self.read().num_rows, 4)
+
+    def test_failed_full_swap_keeps_old_snapshot(self):
+        """Test a full rebuild that cannot be moved into place leaves the previous snapshot live"""
+        snapshots.write_snapshot(self.output)
+        replace = os.replace
+
+        def failing_replace(source, destination):
+            if '.tmp-' in str(source):
+                raise OSError("disk full")
+            return replace(source, destination)
+
+        with patch('scraper.snapshots.os.replace', side_effect=failing_replace):
+            with self.assertRaises(OSError):
+                snapshots.write_snapshot(self.output, full=True)
+        self.assertEqual(self.read().num_rows, 3)
+        self.assertEqual(snapshots.read_state(self.output)['last_id'], CriminalRecord.objects.order_by('id').last().id)
+        self.assertEqual([name for name in os.listdir(self.tmp.name) if '.old-' in name], [])
+
+    def test_snapshot_command(self):
+        """Test the management command reports what it wrote"""
+        out = StringIO()
+        call_command('snapshot_records', output=self.output, stdout=out)
+        self.assertIn("Snapshot full: 3 records", out.getvalue())
+
+
+class RecordWriterTest(TestCase):
+    def test_flush_reports_inserted_updated_unchanged(self):
+        """Test bulk writer classifies rows against existing case numbers"""
+        writer = RecordWriter(batch_size=10)
+        writer.add(make_record("2023-00001"))
+        writer.add(make_record("2023-00002"))
+        self.assertEqual(writer.flush(), {'inserted': 2, 'updated': 0, 'unchanged': 0})
+
+        writer.add(make_record("2023-00001"))
+        writer.add(make_record("2023-00002", charges="Amended charge"))
+        writer.add(make_record("2023-00003"))
+        self.assertEqual(writer.flush(), {'inserted': 1, 'updated': 1, 'unchanged': 1})
+
+        self.assertEqual(writer.stats, {'inserted': 3, 'updated': 1, 'unchanged': 1})
+        self.assertEqual(CriminalRecord.objects.count(), 3)
+        self.assertEqual(
+            CriminalRecord.objects.get(case_number="2023-00002").charges,
+            "Amended charge"
+        )
+
+    def test_unchanged_hash_only_bumps_last_seen(self):
+        """Test re-scraped rows are compared by content hash and not rewritten"""
+        writer = RecordWriter(batch_size=10)
+        writer.add(make_record("2023-00001"))
+        writer.flush()
+        first = CriminalRecord.objects.get(case_number="2023-00001")
+        self.assertEqual(len(first.content_hash), 32)
+        self.assertEqual(first.last_seen, first.last_changed)
+        
+        # Whitespace differences normalize away
+        writer.add(make_record("2023-00001", defendant_name="  John   Doe "))
+        self.assertEqual(writer.flush(), {'inserted': 0, 'updated': 0, 'unchanged': 1})
+        again = CriminalRecord.objects.get(case_number="2023-00001")
+        self.assertEqual((again.defendant_name, again.last_changed), (first.defendant_name, first.last_changed))
+        self.assertGreater(again.last_seen, first.last_seen)
+        
+        writer.add(make_record("2023-00001", charges="Amended charge"))
+        self.assertEqual(writer.flush()['updated'], 1)
+        changed = CriminalRecord.objects.get(case_number="2023-00001")
+        self.assertNotEqual(changed.content_hash, first.content_hash)
+        self.assertGreater(changed.last_changed, first.last_changed)
+
+    def test_backfill_migration_hashes_existing_rows(self):
+        """Test the backfill gives pre-hash rows the hash the writer computes"""
+        from django.apps import apps
+        backfill = importlib.import_module('scraper.migrations.0009_backfill_content_hash').backfill
+        record = CriminalRecord.objects.create(**make_record("2023-00001"))
+        backfill(apps, None)
+        record.refresh_from_db()
+        self.assertEqual(record.last_seen, record.scraped_timestamp)
+        
+        writer = RecordWriter(batch_size=10)
+        writer.add(make_record("2023-00001"))
+        self.assertEqual(writer.flush()['unchanged'], 1)
+
+    def test_failed_flush_keeps_the_batch(self):
+        """Test a batch whose transaction fails is still buffered for the next flush"""
+        writer = RecordWriter(batch_size=10)
+        writer.add(make_record("2023-00001"))
+        with patch.object(CriminalRecord.objects, 'bulk_create', side_effect=RuntimeError("database is locked")):
+            with self.assertRaises(RuntimeError):
+                writer.flush()
+        self.assertEqual(list(writer.buffer), ["2023-00001"])
+        self.assertEqual(writer.flush()['inserted'], 1)
+        self.assertEqual(writer.buffer, {})
+
+    def test_batch_that_keeps_failing_is_written_row_by_row(self):
+        """Test a batch failing max_attempts times is written per row and the bad rows set aside"""
+        metrics = RunMetrics()
+        writer = RecordWriter(batch_size=10, metrics=metrics, max_attempts=2)
+        write = writer._write
+
+        def failing_write(records):
+            if any(record['case_number'] == "2023-00002" for record in records):
+                raise RuntimeError("value too long")
+            return write(records)
+
+        writer._write = failing_write
+        for number in range(1, 4):
+            writer.add(make_record(f"2023-0000{number}"))
+        with self.assertRaises(RuntimeError):
+            writer.flush()
+        self.assertEqual(len(writer.buffer), 3)
+
+        self.assertEqual(writer.flush(), {'inserted': 2, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(writer.buffer, {})
+        self.assertEqual(list(writer.rejected), ["2023-00002"])
+        self.assertEqual(metrics.counters['rows_rejected'], 1)
+        self.assertEqual(sorted(CriminalRecord.objects.values_list('case_number', flat=True)),
+                         ["2023-00001", "2023-00003"])
+
+        # The next batch gets its own attempts
+        writer.add(make_record("2023-00002"))
+        with self.assertRaises(RuntimeError):
+            writer.flush()
+
+    def test_add_flushes_when_batch_is_full(self):
+        """Test the buffer is written automatically at batch_size"""
+        writer = RecordWriter(batch_size=2)
+        self.assertIsNone(writer.add(make_record("2023-00001")))
+        writer.add(make_record("2023-00002"))
+        self.assertEqual(writer.buffer, {})
+        self.assertEqual(CriminalRecord.objects.count(), 2)
+
+
+class ThreadedWriterTest(TransactionTestCase):
+    def test_rows_are_written_on_the_writer_thread(self):
+        """Test queued rows are written by one background thread and flush reports every batch"""
+        threads = set()
+        writer = RecordWriter(batch_size=2)
+        flush = writer.flush
+
+        def recording_flush():
+            threads.add(threading.current_thread().name)
+            return flush()
+
+        writer.flush = recording_flush
+        threaded = ThreadedWriter(writer)
+        for number in range(3):
+            self.assertIsNone(threaded.add(make_record(f"2023-0000{number}")))
+        self.assertEqual(threaded.flush(), {'inserted': 3, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(threaded.stats['inserted'], 3)
+        self.assertEqual(CriminalRecord.objects.count(), 3)
+
+        threaded.add(make_record("2023-00000"))
+        self.assertEqual(threaded.close()['unchanged'], 1)
+        self.assertIsNone(threaded.thread)
+        self.assertEqual(threads, {'record-writer'})
+
+    def test_errors_are_raised_by_flush(self):
+        """Test a flush that fails is raised by flush() and the writer keeps going"""
+        writer = MagicMock()
+        writer.add.return_value = None
+        writer.flush.side_effect = [RuntimeError("database is locked"), {'inserted': 2, 'updated': 0, 'unchanged': 0}]
+        threaded = ThreadedWriter(writer)
+        threaded.add(make_record("2023-00001"))
+        with self.assertRaises(RuntimeError):
+            threaded.flush()
+        threaded.add(make_record("2023-00002"))
+        self.assertEqual(threaded.close(), {'inserted': 2, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(writer.add.call_count, 2)
+
+    def test_failed_batch_is_retried_not_dropped(self):
+        """Test rows queued after a failed batch are still written, with the failed batch"""
+        writer = RecordWriter(batch_size=1)
+        flush = writer.flush
+        failures = [RuntimeError("database is locked")]
+
+        def flaky_flush():
+            if failures:
+                raise failures.pop()
+            return flush()
+
+        writer.flush = flaky_flush
+        threaded = ThreadedWriter(writer)
+        threaded.add(make_record("2023-00001"))
+        threaded.add(make_record("2023-00002"))
+        self.assertEqual(threaded.close()['inserted'], 2)
+        self.assertEqual(CriminalRecord.objects.count(), 2)
+
+    def test_calls_run_on_the_writer_thread_after_queued_rows(self):
+        """Test call() runs on the writer thread once the rows queued before it are written"""
+        seen = []
+
+        def record_page():
+            seen.append((threading.current_thread().name, CriminalRecord.objects.count()))
+
+        threaded = ThreadedWriter(RecordWriter(batch_size=1))
+        threaded.add(make_record("2023-00001"))
+        self.assertIsNone(threaded.call(record_page))
+        threaded.close()
+        self.assertEqual(seen, [('record-writer', 1)])
+
+    def test_call_errors_are_raised_by_the_next_flush(self):
+        """Test a failed call() is reported by the following flush only"""
+        threaded = ThreadedWriter(RecordWriter())
+        threaded.call(MagicMock(side_effect=RuntimeError("database is locked")))
+        with self.assertRaises(RuntimeError):
+            threaded.flush()
+        self.assertEqual(threaded.close(), {'inserted': 0, 'updated': 0, 'unchanged': 0})
+
+
+class SqliteProfileTest(TestCase):
+    def test_production_profile_pragmas(self):
+        """Test the production profile turns on WAL for new connections"""
+        self.assertEqual(profile_pragmas('default'), {})
+        self.assertEqual(profile_pragmas('production')['journal_mode'], 'WAL')
+        with self.assertRaises(ImproperlyConfigured):
+            profile_pragmas('fast')
+
+        connection = MagicMock(vendor='sqlite')
+        with override_settings(SQLITE_PROFILE='default'):
+            configure_connection(None, connection)
+        connection.cursor.assert_not_called()
+        with override_settings(SQLITE_PROFILE='production'):
+            configure_connection(None, connection)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        self.assertIn(call("PRAGMA synchronous = NORMAL"), cursor.execute.call_args_list)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = sqlite3.connect(os.path.join(tmp, 'profile.sqlite3'))
+            apply_pragmas(db, profile_pragmas('production'))
+            self.assertEqual(db.execute("PRAGMA journal_mode").fetchone(), ('wal',))
+            db.close()
+
+
+class ShardingTest(TestCase):
+    def test_split_date_range_by_month_and_week(self):
+        """Test date windows are split into contiguous calendar shards"""
+        self.assertEqual(
+            split_date_range("01/15/2024", "03/10/2024", 'month'),
+            [("01/15/2024", "01/31/2024"), ("02/01/2024", "02/29/2024"), ("03/01/2024", "03/10/2024")]
+        )
+        self.assertEqual(
+            split_date_range("01/01/2024", "01/10/2024", 'week'),
+            [("01/01/2024", "01/07/2024"), ("01/08/2024", "01/10/2024")]
+        )
+        with self.assertRaises(ValueError):
+            split_date_range("02/01/2024", "01/01/2024")
+
+    def test_run_sharded_retries_and_merges_through_one_writer(self):
+        """Test failed shards are retried and all spooled rows land through the parent writer"""
+        shards = [("01/01/2024", "01/31/2024"), ("02/01/2024", "02/29/2024")]
+        calls = []
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        spools = []
+
+        def fake_run_shard(shard, scraper_options):
+            calls.append(shard)
+            if shard == shards[1] and calls.count(shard) == 1:
+                raise RuntimeError("Chrome crashed")
+            spool = FileSink(os.path.join(tmp.name, f"shard-{len(calls)}.jsonl"))
+            spool.add(make_record(f"2024-{shard[0][:2]}-0001"))
+            spool.close()
+            spools.append(spool.path)
+            return {
+                'shard': shard,
+                'success': True,
+                'spool': spool.path,
+                'rows': 1,
+                'pages': 1,
+                'exhausted': True,
+                'seconds': 2.0,
+            }
+
+        writer = RecordWriter()
+        output = FileSink(os.path.join(tmp.name, 'all.csv'))
+        with patch('scraper.sharding.run_shard', side_effect=fake_run_shard):
+            reports = run_sharded(shards, {'max_pages': 1}, writer, workers=2, retries=1,
+                                  executor_class=ThreadPoolExecutor, sinks=[output])
+
+        self.assertTrue(all(report['success'] for report in reports))
+        self.assertEqual([report['attempts'] for report in reports], [1, 2])
+        self.assertEqual([report['rows'] for report in reports], [1, 1])
+        self.assertEqual(writer.stats['inserted'], 2)
+        self.assertEqual(CriminalRecord.objects.count(), 2)
+        self.assertEqual(CriminalRecord.objects.get(case_number="2024-01-0001").birth_date, date(1990, 5, 1))
+        # Spools are consumed and removed; the output sink saw every row and was closed
+        self.assertFalse(any(os.path.exists(path) for path in spools))
+        with open(output.path, newline='') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 2)
+
+        # Completed shards are skipped on resume
+        with patch('scraper.sharding.run_shard', side_effect=fake_run_shard) as mock_run_shard:
+            reports = run_sharded(shards, {'max_pages': 1}, writer, resume=True,
+                                  executor_class=ThreadPoolExecutor)
+        mock_run_shard.assert_not_called()
+        self.assertTrue(all(report['skipped'] for report in reports))
+
+    def test_merge_failure_fails_only_that_shard(self):
+        """Test a shard whose spool cannot be written is reported failed, keeps its spool, and the rest merge"""
+        shards = [("01/01/2024", "01/31/2024"), ("02/01/2024", "02/29/2024")]
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        def fake_run_shard(shard, scraper_options):
+            spool = FileSink(os.path.join(tmp.name, f"shard-{shard[0][:2]}.jsonl"))
+            spool.add(make_record(f"2024-{shard[0][:2]}-0001"))
+            spool.close()
+            return {'shard': shard, 'success': True, 'spool': spool.path, 'rows': 1, 'pages': 1,
+                    'exhausted': True, 'seconds': 1.0}
+
+        writer = RecordWriter()
+        flush = writer.flush
+        failures = [RuntimeError("database is locked")]
+
+        def flaky_flush():
+            if failures:
+                raise failures.pop()
+            return flush()
+
+        writer.flush = flaky_flush
+        with patch('scraper.sharding.run_shard', side_effect=fake_run_shard):
+            reports = run_sharded(shards, {'max_pages': 1}, writer, workers=1, executor_class=ThreadPoolExecutor)
+
+        failed, merged = reports if not reports[0]['success'] else reports[::-1]
+        self.assertFalse(failed['success'])
+        self.assertIn("database is locked", failed['error'])
+        self.assertTrue(os.path.exists(failed['spool']))
+        self.assertTrue(merged['success'])
+        self.assertEqual(CriminalRecord.objects.count(), 1)
+        self.assertFalse(ScrapeCheckpoint.for_search(*failed['shard']).completed)
+
+    def test_run_sharded_saves_pages_as_shards_finish(self):
+        """Test each finished shard's page stats go to the ScrapeRun rather than its report"""
+        shards = [("01/01/2024", "01/31/2024"), ("02/01/2024", "02/29/2024")]
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        def fake_run_shard(shard, scraper_options):
+            spool = FileSink(os.path.join(tmp.name, f"shard-{shard[0][:2]}.jsonl"))
+            spool.add(make_record(f"2024-{shard[0][:2]}-0001"))
+            spool.close()
+            return {'shard': shard, 'success': True, 'spool': spool.path, 'rows': 1, 'pages': 1, 'exhausted': True,
+                    'seconds': 1.0, 'page_stats': [{
+                        'page_number': 1, 'started_at': timezone.now(), 'seconds': 1.0, 'rows_parsed': 0,
+                        'records': 0, 'skipped': 0, 'errors': 0, 'inserted': None, 'updated': None,
+                        'unchanged': None, 'shard': f"{shard[0]}-{shard[1]}",
+                    }]}
+
+        run = ScrapeRun.start(shards[0][0], shards[1][1])
+        with patch('scraper.sharding.run_shard', side_effect=fake_run_shard):
+            reports = run_sharded(shards, {'max_pages': 1}, RecordWriter(), executor_class=ThreadPoolExecutor, run=run)
+        self.assertEqual([report['page_stats'] for report in reports], [[], []])
+        self.assertEqual(sorted(run.scrape_pages.values_list('shard', flat=True)),
+                         ["01/01/2024-01/31/2024", "02/01/2024-02/29/2024"])
+
+    @patch('scraper.sessions.get_session_pool')
+    @patch('scraper.scrapers.EClerksScraper')
+    def test_shard_pages_have_no_writer_counts(self, mock_scraper_class, mock_session_pool):
+        """Test shard page stats leave the writer counts empty, since the shard writes nothing"""
+        scraper = mock_scraper_class.return_value
+        scraper.run.return_value = True
+        scraper.metrics = RunMetrics()
+        scraper.page_stats = [{'page_number': 1, 'started_at': timezone.now(), 'seconds': 1.0, 'rows_parsed': 2,
+                               'records': 2, 'skipped': 0, 'errors': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}]
+        result = run_shard(("01/01/2024", "01/31/2024"), {'max_pages': 1})
+        os.remove(result['spool'])
+
+        page = result['page_stats'][0]
+        self.assertEqual(page['shard'], "01/01/2024-01/31/2024")
+        self.assertEqual(page['records'], 2)
+        self.assertEqual((page['inserted'], page['updated'], page['unchanged']), (None, None, None))
+
 
 class RunScraperCommandTest(TestCase):
     @patch('scraper.management.commands.run_scraper.EClerksScraper')
@@ -85,13 +1548,37 @@ class RunScraperCommandTest(TestCase):
         """Test successful scraper command execution"""
         mock_scraper = MagicMock()
         mock_scraper.run.return_value = True
-        mock_scraper.records = []
+        mock_scraper.records_scraped = 4
+        mock_scraper.writer.stats = {'inserted': 3, 'updated': 1, 'unchanged': 2}
+        mock_scraper.pages_scraped = 2
+        mock_scraper.metrics = RunMetrics()
+        mock_scraper.metrics.observe('login', 1.5)
+        mock_scraper.metrics.observe('page', 4.0)
+        mock_scraper.metrics.increment('rows_parsed', 7)
+        mock_scraper.page_stats = [
+            {'page_number': 1, 'started_at': timezone.now(), 'seconds': 4.0, 'rows_parsed': 7, 'inserted': 3},
+        ]
         mock_scraper_class.return_value = mock_scraper
         
         # Should not raise an exception
-        call_command('run_scraper', '--max-pages=1')
+        out = StringIO()
+        call_command('run_scraper', '--max-pages=1', '--from-date=01/01/2024', '--output=out.jsonl', stdout=out)
         
         mock_scraper.run.assert_called_once()
+        sink, = mock_scraper_class.call_args.kwargs['sinks']
+        self.assertEqual((sink.path, sink.fmt), ('out.jsonl', 'jsonl'))
+        self.assertIn("Records inserted: 3", out.getvalue())
+        self.assertIn("Records updated: 1", out.getvalue())
+        self.assertIn("login: 1x, total 1.50s", out.getvalue())
+        
+        run = ScrapeRun.objects.get()
+        self.assertTrue(run.success)
+        self.assertEqual(run.from_date, date(2024, 1, 1))
+        self.assertEqual((run.records_scraped, run.pages, run.inserted, run.updated, run.unchanged), (4, 2, 3, 1, 2))
+        self.assertEqual(run.metrics['timers']['login']['total'], 1.5)
+        self.assertEqual(run.parameters['max_pages'], 1)
+        self.assertEqual((run.rows_parsed, run.seconds_per_page), (7, 4.0))
+        self.assertEqual(list(run.scrape_pages.values_list('page_number', 'rows_parsed')), [(1, 7)])
 
     @patch('scraper.management.commands.run_scraper.EClerksScraper')
     def test_run_scraper_command_failure(self, mock_scraper_class):
@@ -102,3 +1589,394 @@ class RunScraperCommandTest(TestCase):
         
         # Should not raise an exception but handle it gracefully
         call_command('run_scraper', '--max-pages=1')
+        
+        run = ScrapeRun.objects.get()
+        self.assertFalse(run.success)
+        self.assertIsNotNone(run.finished_at)
+
+    def test_incremental_is_not_sharded(self):
+        """Test --incremental with --workers is rejected before anything runs"""
+        with self.assertRaises(CommandError):
+            call_command('run_scraper', '--incremental', '--workers=2', stdout=StringIO())
+        self.assertFalse(ScrapeRun.objects.exists())
+
+
+class RunMetricsTest(TestCase):
+    def test_timers_counters_and_merge(self):
+        """Test timers and counters accumulate, and shard metrics merge into one"""
+        metrics = RunMetrics()
+        with metrics.timer('page'):
+            pass
+        metrics.observe('page', 2.0)
+        metrics.increment('rows_parsed', 50)
+        self.assertEqual(metrics.timers['page']['count'], 2)
+        self.assertEqual(metrics.timers['page']['max'], 2.0)
+        
+        # Shard workers send as_dict() back to the parent
+        combined = RunMetrics()
+        combined.merge(metrics.as_dict())
+        combined.merge(json.loads(json.dumps(metrics.as_dict())))
+        self.assertEqual(combined.timers['page']['count'], 4)
+        self.assertEqual(combined.counters['rows_parsed'], 100)
+        self.assertGreater(combined.pages_per_minute(), 0)
+
+    def test_writer_times_flushes(self):
+        """Test the record writer times each flush"""
+        metrics = RunMetrics()
+        writer = RecordWriter(batch_size=10, metrics=metrics)
+        writer.add(make_record("2024-00001"))
+        writer.flush()
+        self.assertEqual(metrics.timers['db_flush']['count'], 1)
+
+    def test_metrics_endpoint(self):
+        """Test the Prometheus endpoint is off by default and reports run outcomes when enabled"""
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+        
+        run = ScrapeRun.start('01/01/2024', '01/31/2024')
+        metrics = RunMetrics()
+        metrics.observe('execute_search', 3.25)
+        run.finish(True, records_scraped=10, pages=1, stats={'inserted': 10}, metrics=metrics)
+        ScrapeRun.start().finish(False)
+        
+        with override_settings(SCRAPER_METRICS_ENABLED=True):
+            response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('crimrec_scraper_runs{status="success"} 1', body)
+        self.assertIn('crimrec_scraper_runs{status="failure"} 1', body)
+        self.assertIn('crimrec_scraper_last_run_success 0', body)
+
+    def test_finish_stores_page_stats(self):
+        """Test finish saves one ScrapePage per page, with empty writer counts for shard pages"""
+        run = ScrapeRun.start('01/01/2024', '01/31/2024')
+        started_at = timezone.now()
+        run.finish(True, records_scraped=3, pages=2, page_stats=[
+            {'page_number': 1, 'started_at': started_at, 'seconds': 1.5, 'rows_parsed': 2, 'records': 2,
+             'skipped': 0, 'errors': 0, 'inserted': 1, 'updated': 1, 'unchanged': 0},
+            {'page_number': 1, 'started_at': started_at, 'seconds': 2.5, 'rows_parsed': 1, 'records': 1,
+             'skipped': 0, 'errors': 0, 'inserted': None, 'updated': None, 'unchanged': None,
+             'shard': "02/01/2024-02/29/2024"},
+        ])
+
+        pages = list(ScrapePage.objects.filter(run=run).order_by('seconds'))
+        self.assertEqual([(page.shard, page.records, page.seconds) for page in pages],
+                         [('', 2, 1.5), ("02/01/2024-02/29/2024", 1, 2.5)])
+        self.assertEqual((pages[0].inserted, pages[0].updated, pages[0].unchanged), (1, 1, 0))
+        self.assertIsNone(pages[1].inserted)
+
+
+class RunDashboardTest(TestCase):
+    def make_run(self, seconds_per_page, success=True):
+        run = ScrapeRun.start('01/01/2024', '01/31/2024')
+        metrics = RunMetrics()
+        metrics.observe('page', seconds_per_page)
+        run.finish(success, pages=1, stats={'inserted': 5}, metrics=metrics)
+        return run
+
+    def test_slowdown_against_recent_median(self):
+        """Test a run is flagged when its seconds per page far exceed the recent median"""
+        for seconds in (2.0, 2.2, 1.8):
+            self.make_run(seconds)
+        self.assertIsNone(slowdown(list(ScrapeRun.objects.all())))
+        
+        slow = self.make_run(6.0)
+        latest, baseline = slowdown(list(ScrapeRun.objects.all()))
+        self.assertEqual(latest, slow)
+        self.assertEqual(baseline, 2.0)
+
+    def test_dashboard_lists_runs_and_daily_totals(self):
+        """Test the runs dashboard lists runs, daily totals and the slowdown warning"""
+        self.make_run(2.0)
+        self.make_run(9.0, success=False)
+        response = self.client.get('/runs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['runs']), 2)
+        self.assertEqual(response.context['days'][0]['pages'], 2)
+        self.assertContains(response, 'recent median of 2.00s')
+
+
+class ScrapeJobQueueTest(TestCase):
+    def test_enqueue_merges_active_duplicates(self):
+        """Test queueing an active range returns the existing job at the higher priority"""
+        job, created = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com')
+        self.assertTrue(created)
+        again, created = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com', priority=5)
+        self.assertFalse(created)
+        self.assertEqual((again.pk, again.priority), (job.pk, 5))
+        
+        # Finished jobs no longer block a new one for the same range
+        ScrapeJob.objects.filter(pk=job.pk).update(status=ScrapeJob.DONE)
+        self.assertTrue(jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com')[1])
+        with self.assertRaises(ValueError):
+            jobs.enqueue('01/01/2024', '01/31/2024', options={'bogus': 1})
+
+    def test_claim_respects_priority_and_account_concurrency(self):
+        """Test workers claim the highest-priority job within the account's lease limit"""
+        low, _ = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com')
+        high, _ = jobs.enqueue('02/01/2024', '02/29/2024', account='a@example.com', priority=10)
+        jobs.enqueue('03/01/2024', '03/31/2024', account='b@example.com')
+        
+        claimed = jobs.claim_job('w1', 'a@example.com')
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (high.pk, ScrapeJob.RUNNING, 1))
+        # One live lease per account by default
+        self.assertIsNone(jobs.claim_job('w2', 'a@example.com'))
+        self.assertIsNotNone(jobs.claim_job('w2', 'b@example.com'))
+        self.assertEqual(jobs.claim_job('w2', 'a@example.com', account_concurrency=2).pk, low.pk)
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test a job whose worker stopped renewing its lease is claimed by another worker"""
+        job, _ = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com')
+        jobs.claim_job('dead-worker', 'a@example.com')
+        ScrapeJob.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timezone.timedelta(seconds=1))
+        
+        reclaimed = jobs.claim_job('w2', 'a@example.com')
+        self.assertEqual((reclaimed.pk, reclaimed.lease_owner, reclaimed.attempts), (job.pk, 'w2', 2))
+        self.assertFalse(jobs.renew_lease(job, 'dead-worker'))
+
+    def test_expired_last_attempt_is_failed_not_reclaimed(self):
+        """Test a job whose last attempt's lease expired is marked failed instead of reclaimed"""
+        job, _ = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com', max_attempts=1)
+        jobs.claim_job('dead-worker', 'a@example.com')
+        ScrapeJob.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timezone.timedelta(seconds=1))
+
+        self.assertIsNone(jobs.claim_job('w2', 'a@example.com'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.lease_expires_at), (ScrapeJob.FAILED, 1, None))
+        self.assertIn("Lease expired", job.last_error)
+
+    def test_failures_back_off_then_fail(self):
+        """Test failed jobs are retried after a backoff, then marked failed after max_attempts"""
+        job, _ = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com', max_attempts=2)
+        job = jobs.claim_job('w1', 'a@example.com')
+        jobs.fail_job(job, 'w1', 'boom')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.PENDING)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(jobs.claim_job('w1', 'a@example.com'))
+        
+        ScrapeJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = jobs.claim_job('w1', 'a@example.com')
+        jobs.fail_job(job, 'w1', 'boom again')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (ScrapeJob.FAILED, 'boom again'))
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'a@example.com'})
+    def test_worker_runs_jobs_until_idle(self):
+        """Test the worker runs every due job and records success and failure"""
+        done, _ = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com')
+        failing, _ = jobs.enqueue('02/01/2024', '02/29/2024', account='a@example.com')
+        
+        def fake_run_job(job, session_pool=None, headless=True):
+            if job.pk == failing.pk:
+                raise RuntimeError("login failed")
+            run = ScrapeRun.start()
+            run.finish(True, records_scraped=3)
+            return run
+        
+        worker = jobs.ScrapeWorker(worker_id='w1', account='a@example.com')
+        worker.session_pool = MagicMock()
+        with patch('scraper.jobs.run_job', side_effect=fake_run_job):
+            self.assertEqual(worker.run(exit_when_idle=True), 2)
+        
+        done.refresh_from_db()
+        failing.refresh_from_db()
+        self.assertEqual((done.status, done.run.records_scraped), (ScrapeJob.DONE, 3))
+        self.assertEqual((failing.status, failing.last_error), (ScrapeJob.PENDING, 'login failed'))
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'a@example.com'})
+    def test_first_signal_stops_after_current_job(self):
+        """Test the first signal stops the worker gracefully and a second interrupts it"""
+        worker = jobs.ScrapeWorker(worker_id='w1', account='a@example.com')
+        worker.handle_signal(15, None)
+        self.assertTrue(worker.stopping.is_set())
+        self.assertEqual(worker.run(), 0)
+        with self.assertRaises(KeyboardInterrupt):
+            worker.handle_signal(15, None)
+
+    @patch.dict(os.environ, {'ECLERKS_EMAIL': 'a@example.com'})
+    def test_other_accounts_are_refused(self):
+        """Test workers and jobs for an account other than the ECLERKS_EMAIL login are refused"""
+        with self.assertRaises(jobs.AccountMismatch):
+            jobs.ScrapeWorker(worker_id='w1', account='b@example.com')
+        with self.assertRaises(CommandError):
+            call_command('scrape_worker', '--account=b@example.com', '--exit-when-idle', stdout=StringIO())
+
+        # A job queued under another login fails at once instead of being retried
+        jobs.enqueue('01/01/2024', '01/31/2024', account='b@example.com')
+        job = jobs.claim_job('w1', 'b@example.com')
+        worker = jobs.ScrapeWorker(worker_id='w1')
+        with patch('scraper.scrapers.EClerksScraper') as mock_scraper_class:
+            self.assertFalse(worker.process(job))
+        mock_scraper_class.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.FAILED)
+        self.assertIn("not the configured login", job.last_error)
+        self.assertFalse(ScrapeRun.objects.exists())
+
+    def test_heartbeat_survives_database_errors(self):
+        """Test a failed lease renewal is retried rather than ending the heartbeat"""
+        job, _ = jobs.enqueue('01/01/2024', '01/31/2024', account='a@example.com')
+        renewals = [OperationalError("database is locked")] + [True] * 100
+        with patch('scraper.jobs.renew_lease', side_effect=renewals) as mock_renew:
+            heartbeat = jobs.LeaseHeartbeat(job, 'w1', lease_seconds=0.03)
+            heartbeat.start()
+            deadline = time.monotonic() + 2
+            while mock_renew.call_count < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(heartbeat.is_alive())
+            heartbeat.stop()
+        self.assertGreaterEqual(mock_renew.call_count, 3)
+
+    def test_enqueue_command(self):
+        """Test enqueue_scrape queues a job and reports an already queued range"""
+        out = StringIO()
+        call_command('enqueue_scrape', '--from-date=01/01/2024', '--to-date=01/31/2024', '--account=a@example.com',
+                     '--max-pages=3', stdout=out)
+        call_command('enqueue_scrape', '--from-date=01/01/2024', '--to-date=01/31/2024', '--account=a@example.com',
+                     stdout=out)
+        self.assertIn("already queued", out.getvalue())
+        self.assertEqual(ScrapeJob.objects.get().options['max_pages'], 3)
+
+    @patch('scraper.management.commands.scrape_worker.ScrapeWorker')
+    def test_worker_command_claims_for_account(self, mock_worker_class):
+        """Test scrape_worker --account is the account whose jobs the worker claims"""
+        mock_worker_class.return_value.run.return_value = 0
+        call_command('scrape_worker', '--account=b@example.com', '--exit-when-idle', stdout=StringIO())
+        self.assertEqual(mock_worker_class.call_args.kwargs['account'], 'b@example.com')
+        mock_worker_class.return_value.run.assert_called_once_with(max_jobs=None, exit_when_idle=True)
+
+
+class ChargeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_charges_splits_on_citations(self):
+        """Test charges are split where a statute citation starts, keeping commas in descriptions"""
+        self.assertEqual(parse_charges("14:67 THEFT, FIRST OFFENSE, RS 40:966(A)(1) POSSESSION"), [
+            ('14:67', 'THEFT, FIRST OFFENSE'), ('40:966(A)(1)', 'POSSESSION'),
+        ])
+        self.assertEqual(parse_charges("NO CODE\n14:98.1 - DWI"), [('', 'NO CODE'), ('14:98.1', 'DWI')])
+        self.assertEqual(parse_charges(""), [])
+
+    def test_codes_are_bare_citations(self):
+        """Test Revised Statutes prefixes are dropped and a citation may run into its description"""
+        self.assertEqual(parse_charges("RS 14:67 THEFT, LRS 14:34 BATTERY\nR.S. 14:98.1 DWI"), [
+            ('14:67', 'THEFT'), ('14:34', 'BATTERY'), ('14:98.1', 'DWI'),
+        ])
+        self.assertEqual(parse_charges("14:67-THEFT, 14:34-BATTERY"), [('14:67', 'THEFT'), ('14:34', 'BATTERY')])
+        # Other codes keep their prefix, so they do not merge with a Revised Statutes citation
+        self.assertEqual(parse_charges("MC 54:403 LITTERING"), [('MC 54:403', 'LITTERING')])
+
+    def test_writer_parses_charges_in_bulk(self):
+        """Test the writer stores parsed charges and replaces them when the record changes"""
+        writer = RecordWriter(batch_size=10)
+        writer.add(make_record("2023-00001", charges="14:67 THEFT, 14:34 BATTERY"))
+        writer.add(make_record("2023-00002", charges="14:67 THEFT"))
+        writer.flush()
+        self.assertEqual(
+            list(Charge.objects.filter(record__case_number="2023-00001").values_list('ordinal', 'code', 'description')),
+            [(1, '14:67', 'THEFT'), (2, '14:34', 'BATTERY')]
+        )
+        
+        # Changed charges are replaced, unchanged rows are left alone
+        writer.add(make_record("2023-00001", charges="14:95 WEAPON"))
+        writer.add(make_record("2023-00002", charges="14:67 THEFT"))
+        writer.flush()
+        self.assertEqual(list(Charge.objects.values_list('code', flat=True).order_by('code')), ['14:67', '14:95'])
+
+    def test_backfill_command(self):
+        """Test backfill_charges parses charges for records that have none"""
+        CriminalRecord.objects.create(**make_record("2023-00001", charges="14:67 THEFT, 14:34 BATTERY"))
+        CriminalRecord.objects.create(**make_record("2023-00002", charges="14:67 THEFT"))
+        Charge.objects.all().delete()
+        
+        out = StringIO()
+        call_command('backfill_charges', '--batch-size=1', stdout=out)
+        self.assertIn("Parsed 3 charges from 2 records", out.getvalue())
+        call_command('backfill_charges', stdout=out)
+        self.assertIn("Parsed 0 charges from 0 records", out.getvalue())
+
+    def test_charge_filter_and_summary_views(self):
+        """Test the list view filters by charge code and the summary counts records per code"""
+        CriminalRecord.objects.create(**make_record("2023-00001", charges="14:67 THEFT, 14:34 BATTERY"))
+        CriminalRecord.objects.create(**make_record("2023-00002", charges="14:67 THEFT", parish="Caddo"))
+        CriminalRecord.objects.create(**make_record("2023-00003", charges="14:34 BATTERY"))
+        
+        CriminalRecord.objects.create(**make_record("2023-00004", charges="RS 14:67 THEFT", parish="Caddo"))
+        CriminalRecord.objects.create(**make_record("2023-00005", charges="14:67-THEFT", parish="Caddo"))
+
+        response = self.client.get('/', {'charge': '14:67'})
+        self.assertEqual(response.context['total_records'], 4)
+        self.assertEqual({record.case_number for record in response.context['page_obj']},
+                         {"2023-00001", "2023-00002", "2023-00004", "2023-00005"})
+        # A prefixed filter finds the same records
+        response = self.client.get('/', {'charge': 'rs 14:67'})
+        self.assertEqual(response.context['total_records'], 4)
+        response = self.client.get('/charges/')
+        self.assertEqual(response.context['charges'][0], {'code': '14:67', 'description': 'THEFT', 'records': 4})
+        
+        response = self.client.get('/charges/', {'parish': 'Orleans'})
+        self.assertEqual(
+            [(row['code'], row['records']) for row in response.context['charges']], [('14:34', 2), ('14:67', 1)]
+        )
+
+
+class DefendantTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_key_normalizes_name(self):
+        """Test defendant keys ignore name punctuation, order and case but not birth date"""
+        self.assertEqual(normalize_name("Doe,  John A."), "DOE JOHN A")
+        self.assertEqual(defendant_key(make_record("1", defendant_name="DOE, JOHN")),
+                         defendant_key(make_record("2", defendant_name="Doe John")))
+        self.assertNotEqual(defendant_key(make_record("1")), defendant_key(make_record("1", birth_date=None)))
+
+    def test_writer_resolves_defendants_per_batch(self):
+        """Test the writer links a batch's records to defendants in a fixed number of queries"""
+        writer = RecordWriter(batch_size=10)
+        writer.add(make_record("2023-00001"))
+        writer.add(make_record("2023-00002", defendant_name="JOHN  DOE"))
+        writer.add(make_record("2023-00003", defendant_name="Jane Roe", sex='F'))
+        # Two defendant lookups and one insert, however many rows the batch holds
+        with self.assertNumQueries(12):
+            writer.flush()
+        self.assertEqual(Defendant.objects.count(), 2)
+        john = Defendant.objects.get(normalized_name="JOHN DOE")
+        self.assertEqual(sorted(john.records.values_list('case_number', flat=True)), ["2023-00001", "2023-00002"])
+        
+        # A later batch finds the existing person
+        writer.add(make_record("2023-00004", date_filed=date(2024, 3, 1)))
+        writer.flush()
+        self.assertEqual(Defendant.objects.count(), 2)
+        
+        response = self.client.get(f'/defendants/{john.pk}/')
+        self.assertEqual([record.case_number for record in response.context['records']][:1], ["2023-00004"])
+        self.assertEqual(len(response.context['records']), 3)
+
+    def test_single_saves_link_defendants(self):
+        """Test records saved one at a time are linked, and relinked when the person changes"""
+        record = CriminalRecord.objects.create(**make_record("2023-00001"))
+        john = Defendant.objects.get()
+        self.assertEqual(record.defendant_id, john.pk)
+        self.assertEqual(CriminalRecord.objects.get(pk=record.pk).defendant_id, john.pk)
+        other = CriminalRecord.objects.create(**make_record("2023-00002", defendant_name="john  doe"))
+        self.assertEqual(other.defendant_id, john.pk)
+
+        record.defendant_name = "Jane Roe"
+        record.save()
+        record.refresh_from_db()
+        self.assertEqual(record.defendant.normalized_name, "JANE ROE")
+        self.assertEqual(Defendant.objects.count(), 2)
+
+    def test_backfill_command(self):
+        """Test backfill_defendants links unlinked records to defendants"""
+        CriminalRecord.objects.create(**make_record("2023-00001"))
+        CriminalRecord.objects.create(**make_record("2023-00002"))
+        CriminalRecord.objects.update(defendant=None)
+        Defendant.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_defendants', '--batch-size=1', stdout=out)
+        self.assertIn("Linked 2 records; 1 defendants stored", out.getvalue())
+        self.assertFalse(CriminalRecord.objects.filter(defendant__isnull=True).exists())
@@ -0,0 +1,39 @@
+from datetime import timedelta
+from statistics import median
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import ScrapeRun
+
+# A run is flagged as slow when its seconds per page exceed the recent median by this factor
+SLOWDOWN_FACTOR = 1.5
+# Finished runs before the latest one that the median is taken over
+BASELINE_RUNS = 10
+
+
+def daily_throughput(days=30):
+    """Per-day run count, pages, inserted rows and average seconds per page, newest first"""
+    since = timezone.now() - timedelta(days=days)
+    return (
+        ScrapeRun.objects.filter(finished_at__isnull=False, started_at__gte=since)
+        .annotate(day=TruncDate('started_at'))
+        .values('day')
+        .annotate(runs=Count('id'), pages=Sum('pages'), inserted=Sum('inserted'),
+                  seconds_per_page=Avg('seconds_per_page'))
+        .order_by('-day')
+    )
+
+
+def slowdown(runs, factor=SLOWDOWN_FACTOR, baseline_runs=BASELINE_RUNS):
+    """(latest run, baseline seconds per page) when the latest timed run is unusually slow, else None
+
+    runs are finished ScrapeRuns, newest first; runs without page timings are ignored.
+    """
+    timed = [run for run in runs if run.seconds_per_page]
+    if len(timed) < 2:
+        return None
+    latest, previous = timed[0], timed[1:baseline_runs + 1]
+    baseline = median(run.seconds_per_page for run in previous)
+    if latest.seconds_per_page > baseline * factor:
+        return latest, baseline
+    return None
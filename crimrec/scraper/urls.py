@@ -5,6 +5,11 @@ app_name = 'scraper'
 
 urlpatterns = [
     path('', views.record_list, name='record_list'),
+    path('export/', views.record_export, name='record_export'),
+    path('charges/', views.charge_summary, name='charge_summary'),
+    path('runs/', views.run_dashboard, name='run_dashboard'),
+    path('metrics/', views.scrape_metrics, name='scrape_metrics'),
     path('<int:pk>/', views.record_detail, name='record_detail'),
+    path('defendants/<int:pk>/', views.defendant_detail, name='defendant_detail'),
 ]
 
@@ -1,45 +1,134 @@
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import CriminalRecord
+from .models import CriminalRecord, Defendant, ScrapeRun
+from .charges import charge_counts, records_with_charge
+from .exporters import EXPORT_FORMATS, RecordExporter
+from .facets import parish_counts, record_count, total_count
+from .metrics import prometheus_text
+from .parsing import parse_charges
+from .pagination import KeysetPaginator, RECORD_ORDERING, SEARCH_ORDERING
+from .search import search_records
+from .throughput import daily_throughput, slowdown
 
-def record_list(request):
-    query = request.GET.get('q', '')
-    parish_filter = request.GET.get('parish', '')
-    
-    records = CriminalRecord.objects.all().order_by('-date_filed')
+def filter_records(query, parish_filter, charge_filter=''):
+    """Records matching the list filters and the (field, descending) ordering they page by"""
+    records = CriminalRecord.objects.all()
+    ordering = RECORD_ORDERING
     
     if query:
-        records = records.filter(
-            Q(defendant_name__icontains=query) |
-            Q(case_number__icontains=query) |
-            Q(charges__icontains=query)
-        )
+        # Ranked full-text match, best results first
+        records = search_records(records, query)
+        if 'search_rank' in records.query.annotations:
+            ordering = SEARCH_ORDERING
     
     if parish_filter:
         records = records.filter(parish__iexact=parish_filter)
     
-    paginator = Paginator(records, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if charge_filter:
+        records = records_with_charge(records, charge_filter)
+    return records, ordering
+
+def record_list(request):
+    query = request.GET.get('q', '')
+    parish_filter = request.GET.get('parish', '')
+    charge_filter = request.GET.get('charge', '')
+    records, ordering = filter_records(query, parish_filter, charge_filter)
     
-    parishes = CriminalRecord.objects.values_list('parish', flat=True).distinct().order_by('parish')
+    # Seek pagination: every page is an index range scan, however deep
+    paginator = KeysetPaginator(records, 25, ordering=ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    # Facets and counts come from the cache, refreshed by the scraper's writes
+    total_records, total_is_estimate = record_count(records, query, parish_filter, charge_filter)
+    parishes = parish_counts()
     
     context = {
         'page_obj': page_obj,
         'query': query,
         'parishes': parishes,
         'selected_parish': parish_filter,
-        'total_records': records.count(),
+        'selected_charge': charge_filter,
+        'total_records': total_records,
+        'total_is_estimate': total_is_estimate,
     }
     return render(request, 'scraper/record_list.html', context)
 
+def record_export(request):
+    """Stream every record matching the list filters as CSV or JSON Lines (?format=, ?gzip=1)"""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unknown export format '{fmt}'")
+    records, ordering = filter_records(
+        request.GET.get('q', ''), request.GET.get('parish', ''), request.GET.get('charge', '')
+    )
+    records = records.order_by(*[f"{'-' if descending else ''}{field}" for field, descending in ordering])
+    
+    exporter = RecordExporter(records, fmt, compress=request.GET.get('gzip') == '1')
+    response = StreamingHttpResponse(exporter, content_type=exporter.content_type)
+    response['Content-Disposition'] = f'attachment; filename="criminal_records.{exporter.extension}"'
+    return response
+
+def scrape_metrics(request):
+    """Prometheus scrape target: latest run timings and outcome counts (SCRAPER_METRICS_ENABLED)"""
+    if not getattr(settings, 'SCRAPER_METRICS_ENABLED', False):
+        raise Http404("Metrics are disabled")
+    finished = ScrapeRun.objects.filter(finished_at__isnull=False)
+    status_counts = finished.aggregate(
+        success=Count('id', filter=Q(success=True)),
+        failure=Count('id', filter=Q(success=False)),
+    )
+    latest = finished.order_by('-finished_at').first()
+    return HttpResponse(
+        prometheus_text(latest, status_counts, record_total=total_count()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+def run_dashboard(request):
+    """Recent scraper runs and daily throughput, to spot slowdowns after site changes"""
+    runs = list(ScrapeRun.objects.filter(finished_at__isnull=False)[:50])
+    slowest = max((run.seconds_per_page or 0 for run in runs), default=0)
+    for run in runs:
+        # Bar width for the seconds-per-page column
+        run.bar_percent = round(100 * run.seconds_per_page / slowest) if run.seconds_per_page else 0
+    context = {
+        'runs': runs,
+        'days': daily_throughput(),
+        'slowdown': slowdown(runs),
+        'running': ScrapeRun.objects.filter(finished_at__isnull=True).count(),
+    }
+    return render(request, 'scraper/run_dashboard.html', context)
+
+def charge_summary(request):
+    """Most frequent charge codes, overall or within one parish"""
+    parish_filter = request.GET.get('parish', '')
+    context = {
+        'charges': charge_counts(parish_filter),
+        'parishes': parish_counts(),
+        'selected_parish': parish_filter,
+    }
+    return render(request, 'scraper/charge_summary.html', context)
+
 def record_detail(request, pk):
     record = get_object_or_404(CriminalRecord, pk=pk)
-    charges_list = record.charges.split('\n') if record.charges else []
+    charges_list = [str(charge) for charge in record.charge_entries.all()]
+    if not charges_list:
+        # Not backfilled yet
+        charges_list = [f"{code} {description}".strip() for code, description in parse_charges(record.charges)]
     context = {
         'record': record,
         'charges_list': charges_list,
+        'defendant_cases': record.defendant.records.count() if record.defendant_id else 0,
     }
     return render(request, 'scraper/record_detail.html', context)
 
+def defendant_detail(request, pk):
+    """Every case of one person, newest first, from the (defendant, date_filed) index"""
+    defendant = get_object_or_404(Defendant, pk=pk)
+    records = defendant.records.order_by('-date_filed', '-id').prefetch_related('charge_entries')
+    context = {
+        'defendant': defendant,
+        'records': records,
+    }
+    return render(request, 'scraper/defendant_detail.html', context)
+
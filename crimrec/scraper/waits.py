@@ -0,0 +1,142 @@
+import time
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# Seconds allowed for each kind of wait, overridable per scraper
+DEFAULT_TIMEOUTS = {
+    'page': 20,         # document ready / AJAX idle
+    'element': 10,      # form fields and buttons
+    'eula': 10,         # EULA dialog appearing or closing
+    'results': 45,      # first results after a search
+    'rows': 15,         # result rows on each page
+    'next_page': 5,     # locating the pagination button
+    'page_change': 15,  # grid replaced after clicking Next
+}
+
+AJAX_IDLE_SCRIPT = """
+if (document.readyState !== 'complete') { return false; }
+if (window.Ext && Ext.Ajax && Ext.Ajax.isLoading) { return !Ext.Ajax.isLoading(); }
+if (window.jQuery) { return jQuery.active === 0; }
+return true;
+"""
+
+
+def document_ready(driver):
+    """Condition: the document has finished loading"""
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def page_idle(driver):
+    """Condition: the document is loaded and no ExtJS/jQuery requests are in flight"""
+    return bool(driver.execute_script(AJAX_IDLE_SCRIPT))
+
+
+LOGIN_STATE_SCRIPT = """
+if (document.readyState !== 'complete' || !document.body) { return null; }
+if (document.body.innerText.indexOf('Hello') !== -1) { return 'logged_in'; }
+if (document.querySelector('[placeholder="email address"]')) { return 'logged_out'; }
+return null;
+"""
+
+
+def login_state(driver):
+    """Condition: the page shows either the signed-in greeting or the login form"""
+    return driver.execute_script(LOGIN_STATE_SCRIPT)
+
+
+def element_gone(locator):
+    """Condition: no visible element matches locator"""
+    def condition(driver):
+        try:
+            return not any(element.is_displayed() for element in driver.find_elements(*locator))
+        except StaleElementReferenceException:
+            return True
+    return condition
+
+
+def row_count_changed(locator, previous_count):
+    """Condition: the number of rows matching locator differs from previous_count"""
+    def condition(driver):
+        count = len(driver.find_elements(*locator))
+        return count if count != previous_count else False
+    return condition
+
+
+def page_changed(old_first_row, locator, previous_count):
+    """Condition: the grid was re-rendered (old first row went stale or the row count changed)"""
+    count_changed = row_count_changed(locator, previous_count)
+
+    def condition(driver):
+        try:
+            old_first_row.is_enabled()
+        except StaleElementReferenceException:
+            return True
+        return bool(count_changed(driver))
+    return condition
+
+
+def values_equal(elements, expected):
+    """Condition: each input element holds its expected value"""
+    def condition(driver):
+        values = [driver.execute_script("return arguments[0].value;", element) for element in elements]
+        return values == list(expected)
+    return condition
+
+
+class WaitPolicy:
+    """Explicit waits with configurable timeouts that record how long each one took"""
+
+    def __init__(self, timeouts=None, poll_frequency=0.25):
+        self.driver = None
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.poll_frequency = poll_frequency
+        # name -> {'count', 'timeouts', 'total', 'max'}, aggregated as each wait ends so a
+        # long run holds one entry per wait name rather than one per wait
+        self.timings = {}
+
+    def until(self, name, condition, kind='element', timeout=None):
+        """Wait for condition, recording the elapsed time under name; raises TimeoutException"""
+        started = time.monotonic()
+        try:
+            result = WebDriverWait(
+                self.driver,
+                self.timeouts[kind] if timeout is None else timeout,
+                poll_frequency=self.poll_frequency,
+            ).until(condition)
+        except TimeoutException:
+            self._record(name, started, False)
+            raise
+        self._record(name, started, True)
+        return result
+
+    def settle(self, name, condition, kind='page'):
+        """Like until(), but a timeout is logged and reported as False instead of raised"""
+        try:
+            return self.until(name, condition, kind=kind)
+        except TimeoutException:
+            logger.warning(f"Wait '{name}' timed out after {self.timeouts[kind]}s, continuing")
+            return False
+        except WebDriverException as e:
+            logger.warning(f"Wait '{name}' failed: {e}")
+            return False
+
+    def _record(self, name, started, satisfied):
+        elapsed = time.monotonic() - started
+        entry = self.timings.setdefault(name, {'count': 0, 'timeouts': 0, 'total': 0.0, 'max': 0.0})
+        entry['count'] += 1
+        entry['timeouts'] += 0 if satisfied else 1
+        entry['total'] += elapsed
+        entry['max'] = max(entry['max'], elapsed)
+        logger.debug(f"Wait '{name}' {'satisfied' if satisfied else 'timed out'} after {elapsed:.2f}s")
+
+    def summary(self):
+        """Recorded waits by name: count, timeouts, total and max seconds"""
+        return {name: dict(entry) for name, entry in self.timings.items()}
+
+    def total_seconds(self):
+        """Total time spent waiting so far"""
+        return sum(entry['total'] for entry in self.timings.values())
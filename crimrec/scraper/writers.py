@@ -0,0 +1,267 @@
+import time
+import queue
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import CriminalRecord
+from .charges import replace_charges
+from .defendants import defendant_key, resolve_defendants
+from .facets import apply_parish_deltas
+from .hashing import HASH_FIELDS, content_hash
+
+logger = logging.getLogger(__name__)
+
+# Fields rewritten when an existing case number is scraped again with different content
+UPDATE_FIELDS = list(HASH_FIELDS)
+# Written alongside UPDATE_FIELDS whenever a record's content changes
+CHANGE_FIELDS = ['content_hash', 'last_seen', 'last_changed', 'defendant']
+
+
+class RecordWriter:
+    """Buffer scraped records and persist them with one bulk upsert per batch
+
+    Records whose content hash matches the stored one are not rewritten; only their
+    last_seen timestamp is bumped, in one UPDATE per batch. A batch that fails stays
+    buffered and is retried by the next flush; once it has failed max_attempts times its
+    rows are written one at a time, and those that still fail are set aside in rejected.
+    """
+
+    def __init__(self, batch_size=100, metrics=None, max_attempts=3):
+        self.batch_size = batch_size
+        self.metrics = metrics
+        self.max_attempts = max_attempts
+        self.buffer = {}
+        self.failures = 0
+        self.rejected = {}
+        self.stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    def add(self, record):
+        """Queue a record, flushing once the buffer reaches batch_size"""
+        # Keyed by case number so a row repeated within a batch is only written once
+        self.buffer[record['case_number']] = record
+        if len(self.buffer) >= self.batch_size:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Write buffered records in a single transaction and return the batch counts"""
+        if not self.buffer:
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+        records = list(self.buffer.values())
+        started = time.monotonic()
+        try:
+            batch_stats = self._write(records)
+        except Exception as e:
+            self.failures += 1
+            if self.failures < self.max_attempts:
+                # Only once committed: a failed batch stays buffered for the next flush
+                raise
+            logger.error(f"Writing {len(records)} records failed {self.failures} times, writing them one by one: {e}")
+            batch_stats = self._write_each(records)
+        self.buffer = {}
+        self.failures = 0
+
+        for key, value in batch_stats.items():
+            self.stats[key] += value
+        if self.metrics is not None:
+            self.metrics.observe('db_flush', time.monotonic() - started)
+
+        logger.info(
+            f"Flushed {len(records)} records: {batch_stats['inserted']} inserted, "
+            f"{batch_stats['updated']} updated, {batch_stats['unchanged']} unchanged"
+        )
+        return batch_stats
+
+    def _write_each(self, records):
+        """Write records in a transaction each, setting aside the ones that still fail"""
+        batch_stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        for record in records:
+            try:
+                row_stats = self._write([record])
+            except Exception as e:
+                logger.error(f"Setting aside record {record['case_number']}: {e}")
+                self.rejected[record['case_number']] = record
+                if self.metrics is not None:
+                    self.metrics.increment('rows_rejected')
+                continue
+            for key, value in row_stats.items():
+                batch_stats[key] += value
+        return batch_stats
+
+    def _write(self, records):
+        """Upsert records in one transaction and return their counts"""
+        batch_stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        now = timezone.now()
+        with transaction.atomic():
+            existing = {
+                row['case_number']: row
+                for row in CriminalRecord.objects.filter(
+                    case_number__in=[record['case_number'] for record in records]
+                ).values('case_number', 'content_hash', 'parish')
+            }
+
+            changed = []
+            seen = []
+            parish_deltas = Counter()
+            for record in records:
+                record_hash = content_hash(record)
+                current = existing.get(record['case_number'])
+                if current is None:
+                    batch_stats['inserted'] += 1
+                    parish_deltas[record['parish']] += 1
+                elif current['content_hash'] == record_hash:
+                    batch_stats['unchanged'] += 1
+                    seen.append(record['case_number'])
+                    continue
+                else:
+                    batch_stats['updated'] += 1
+                    if current['parish'] != record['parish']:
+                        parish_deltas[current['parish']] -= 1
+                        parish_deltas[record['parish']] += 1
+                changed.append((record, record_hash))
+
+            # One defendant lookup (and at most one insert) for the whole batch
+            defendant_ids = resolve_defendants([record for record, _ in changed]) if changed else {}
+            to_write = [
+                CriminalRecord(**record, content_hash=record_hash, last_seen=now, last_changed=now,
+                               defendant_id=defendant_ids[defendant_key(record)])
+                for record, record_hash in changed
+            ]
+
+            if to_write:
+                CriminalRecord.objects.bulk_create(
+                    to_write,
+                    update_conflicts=True,
+                    unique_fields=['case_number'],
+                    update_fields=UPDATE_FIELDS + CHANGE_FIELDS,
+                )
+                # Upserts do not return primary keys; look them up to re-parse the new charges
+                record_ids = dict(CriminalRecord.objects.filter(
+                    case_number__in=[record.case_number for record in to_write]
+                ).order_by().values_list('case_number', 'id'))
+                replace_charges({record_ids[record.case_number]: record.charges for record in to_write})
+            if seen:
+                CriminalRecord.objects.filter(case_number__in=seen).update(last_seen=now)
+
+        if to_write:
+            # Keep the list view's cached facets in step without recounting the table
+            apply_parish_deltas({parish: delta for parish, delta in parish_deltas.items() if delta})
+        return batch_stats
+
+    def call(self, function, *args):
+        """Run another database write; here on the caller's thread, in order with the batches"""
+        return function(*args)
+
+    def discard(self):
+        """Drop the buffered records without writing them; returns how many there were"""
+        dropped = len(self.buffer)
+        self.buffer = {}
+        self.failures = 0
+        return dropped
+
+    def close(self):
+        return self.flush()
+
+
+class ThreadedWriter:
+    """Run a RecordWriter on a thread of its own, fed through a bounded queue
+
+    The scraping thread only parses and queues rows; every row reaches the database
+    through the one writer thread, a batch per transaction, so a full batch no longer
+    stalls parsing. Checkpoint and page stats writes are queued with call(), so they run
+    on the same thread, after the rows queued before them. flush() waits until everything
+    queued is written and returns the counts of all batches written since the previous
+    flush(). A batch that fails is retried by the next write, up to the RecordWriter's
+    max_attempts; flush() raises the batch's error while it is still being retried, or
+    the error of a call() queued since the previous flush().
+    """
+
+    def __init__(self, writer, max_queued=1000):
+        self.writer = writer
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.thread = None
+
+    @property
+    def stats(self):
+        return self.writer.stats
+
+    @property
+    def rejected(self):
+        return self.writer.rejected
+
+    def add(self, record):
+        self._start()
+        self.queue.put(('add', record))
+        return None
+
+    def call(self, function, *args):
+        """Queue function(*args) to run on the writer thread; an error is raised by the next flush()"""
+        self._start()
+        self.queue.put(('call', (function, args)))
+        return None
+
+    def flush(self):
+        if self.thread is None:
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        done = Future()
+        self.queue.put(('flush', done))
+        return done.result()
+
+    def _start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='record-writer', daemon=True)
+            self.thread.start()
+
+    def close(self):
+        """Write what is still queued and stop the thread"""
+        try:
+            return self.flush()
+        finally:
+            if self.thread is not None:
+                self.queue.put(('stop', None))
+                self.thread.join()
+                self.thread = None
+
+    def _run(self):
+        written = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        call_error = None
+        try:
+            while True:
+                action, value = self.queue.get()
+                if action == 'stop':
+                    return
+                if action == 'call':
+                    function, args = value
+                    try:
+                        function(*args)
+                    except Exception as e:
+                        logger.error(f"Queued {getattr(function, '__name__', function)} failed: {e}")
+                        call_error = call_error or e
+                    continue
+                try:
+                    batch_stats = self.writer.add(value) if action == 'add' else self.writer.flush()
+                    for key, count in (batch_stats or {}).items():
+                        written[key] += count
+                except Exception as e:
+                    if action == 'add':
+                        # The row and its batch stay buffered; the next write retries them
+                        logger.warning(f"Writing a batch failed, retrying with the next write: {e}")
+                        continue
+                    value.set_exception(e)
+                    written = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+                    call_error = None
+                    continue
+                if action == 'flush':
+                    if call_error is not None:
+                        value.set_exception(call_error)
+                    else:
+                        value.set_result(written)
+                    written = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+                    call_error = None
+        finally:
+            # The thread's own database connection
+            connection.close()